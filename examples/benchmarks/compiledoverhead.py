@@ -0,0 +1,44 @@
+""" Compare the per-activation overhead of the interpreted networks with the 
+built-in compiled networks returned by .convertToFastNetwork(). Small networks 
+are used on purpose, so that the Python overhead dominates the arithmetic. """
+
+from timeit import Timer
+
+from scipy import random
+
+from pybrain.tools.shortcuts import buildNetwork
+from pybrain.structure import LSTMLayer
+
+
+def timeActivations(net, inputs, backward=False):
+    """ Return the average time in microseconds for one activation (and one 
+    backward pass, if `backward` is set). """
+    outerr = random.randn(net.outdim)
+    def run():
+        net.reset()
+        for x in inputs:
+            net.activate(x)
+            if backward:
+                net.backActivate(outerr)
+    repeats = 5
+    best = min(Timer(run).repeat(repeats, 1))
+    return best / len(inputs) * 1e6
+
+
+def benchmark(name, net, steps=1000, backward=False):
+    fast = net.convertToFastNetwork()
+    inputs = random.randn(steps, net.indim)
+    slow = timeActivations(net, inputs, backward)
+    quick = timeActivations(fast, inputs, backward)
+    print '%-32s interpreted: %7.1f us   compiled: %7.1f us   speedup: %.2f' % (
+        name, slow, quick, slow / quick)
+
+
+if __name__ == '__main__':
+    benchmark('feedforward 4-8-2', buildNetwork(4, 8, 2))
+    benchmark('feedforward 4-8-8-8-2', buildNetwork(4, 8, 8, 8, 2))
+    benchmark('recurrent 4-8-2', buildNetwork(4, 8, 2, recurrent=True))
+    benchmark('lstm 4-8-2', buildNetwork(4, 8, 2, hiddenclass=LSTMLayer),
+              steps=200)
+    benchmark('feedforward 4-8-2 (fwd+bwd)', buildNetwork(4, 8, 2), 
+              backward=True)
@@ -0,0 +1,86 @@
+""" Compare stepping a recurrent network through a sequence one time step at a
+time with processing the whole sequence at once via .activateSequence() and 
+.backActivateSequence(), and processing many short sequences one after the 
+other with processing them in lockstep via .activateSequenceBatch(). """
+
+from timeit import Timer
+
+from scipy import random
+
+from pybrain.tools.shortcuts import buildNetwork
+from pybrain.structure import LSTMLayer, TanhLayer, LinearLayer
+from pybrain.structure import FullConnection, RecurrentNetwork
+
+
+def timeStepwise(net, inputs, outerrs):
+    def run():
+        net.reset()
+        for x in inputs:
+            net.activate(x)
+        for e in reversed(outerrs):
+            net.backActivate(e)
+    return min(Timer(run).repeat(3, 1))
+
+
+def timeSequence(net, inputs, outerrs):
+    def run():
+        net.activateSequence(inputs)
+        net.backActivateSequence(outerrs)
+    return min(Timer(run).repeat(3, 1))
+
+
+def benchmark(name, net, steps=1000):
+    inputs = random.randn(steps, net.indim)
+    outerrs = random.randn(steps, net.outdim)
+    slow = timeStepwise(net, inputs, outerrs)
+    quick = timeSequence(net, inputs, outerrs)
+    print '%-42s stepwise: %6.3f s   sequence: %6.3f s   speedup: %.2f' % (
+        name, slow, quick, slow / quick)
+
+
+def benchmarkLockstep(name, net, sequences=64, steps=20):
+    inputs = random.randn(sequences, steps, net.indim)
+    outerrs = random.randn(sequences, steps, net.outdim)
+    def single():
+        for x, e in zip(inputs, outerrs):
+            net.activateSequence(x)
+            net.backActivateSequence(e)
+    def lockstep():
+        net.activateSequenceBatch(inputs)
+        net.backActivateSequenceBatch(outerrs)
+    slow = min(Timer(single).repeat(3, 1))
+    quick = min(Timer(lockstep).repeat(3, 1))
+    print '%-42s one by one: %6.3f s   lockstep: %6.3f s   speedup: %.2f' % (
+        name, slow, quick, slow / quick)
+
+
+def lstmWithoutFeedback():
+    net = RecurrentNetwork()
+    net.addInputModule(LinearLayer(4, name='in'))
+    net.addModule(LSTMLayer(16, name='hidden'))
+    net.addOutputModule(LinearLayer(2, name='out'))
+    net.addConnection(FullConnection(net['in'], net['hidden']))
+    net.addConnection(FullConnection(net['hidden'], net['out']))
+    net.sortModules()
+    return net
+
+
+def elmanNetwork():
+    net = buildNetwork(4, 16, 2, hiddenclass=TanhLayer, recurrent=True)
+    net.addRecurrentConnection(FullConnection(net['hidden0'], net['hidden0']))
+    net.sortModules()
+    return net
+
+
+if __name__ == '__main__':
+    benchmark('lstm 4-16-2 (no feedback)', lstmWithoutFeedback())
+    benchmark('lstm 4-16-2 (recurrent)', 
+              buildNetwork(4, 16, 2, hiddenclass=LSTMLayer, recurrent=True))
+    benchmark('lstm 4-16-2 (recurrent, peepholes)', 
+              buildNetwork(4, 16, 2, hiddenclass=LSTMLayer, recurrent=True,
+                           peepholes=True))
+    benchmark('elman 4-16-2', elmanNetwork())
+    benchmark('feedforward 4-16-2 (as RecurrentNetwork)', 
+              buildNetwork(4, 16, 2, recurrent=True))
+    benchmarkLockstep('lstm 4-16-2, 64 sequences of 20 steps',
+                      buildNetwork(4, 16, 2, hiddenclass=LSTMLayer))
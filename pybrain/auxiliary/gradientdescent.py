@@ -44,12 +44,12 @@ class GradientDescent(object):
         assert isinstance(values, ndarray)
         self.values = values.copy()
         if self.rprop:
-            self.lastgradient = zeros(len(values), dtype='float64')
+            self.lastgradient = zeros(len(values), values.dtype)
             self.rprop_theta = self.lastgradient + self.deltanull      
             self.momentumvector = None
         else:
             self.lastgradient = None
-            self.momentumvector = zeros(len(values))
+            self.momentumvector = zeros(len(values), values.dtype)
             
     def __call__(self, gradient, error=None):            
         """ calculates parameter change based on given gradient and returns updated parameters """
@@ -1,8 +1,8 @@
 __author__ = "Martin Felder, felder@in.tum.de"
 
-from numpy import zeros, where, ravel, r_, single
-from numpy.random import permutation
+from numpy import zeros, where, ravel, r_, single, sort, concatenate, unique
 from pybrain.datasets import SupervisedDataSet, SequentialDataSet
+from pybrain.datasets.dataset import _randomState
 
 class ClassificationDataSet(SupervisedDataSet):
     """ Specialized data set for classification data. Classes are to be numbered from 0 to nb_classes-1. """
@@ -29,6 +29,15 @@ class ClassificationDataSet(SupervisedDataSet):
         # copy classes (may be changed into other representation)
         self.setField('class', self.getField('target'))
 
+    @classmethod
+    def fromArrays(cls, inputs, targets, **kwargs):
+        """Return a new dataset with the given arrays of inputs and class 
+        numbers, one row per sample."""
+        ds = super(ClassificationDataSet, cls).fromArrays(inputs, targets, 
+                                                          **kwargs)
+        ds.calculateStatistics()
+        return ds
+
 
     @classmethod
     def load_matlab(cls, fname):
@@ -161,26 +170,52 @@ class ClassificationDataSet(SupervisedDataSet):
         """Produce two new datasets, the first one comprising only the class 
         selected (0..nClasses-1), the second one containing the remaining 
         samples."""
-        leftIndices, dummy = where(self['class'] == cls_select)
-        rightIndices, dummy = where(self['class'] != cls_select)        
-        leftDs = self.copy()
-        leftDs.clear()
-        rightDs = leftDs.copy()
-        # check which fields to split
-        splitThis = []
-        for f in ['input', 'target', 'class', 'importance', 'aux']:
-            if self.hasField(f):
-                splitThis.append(f)
-        # need to synchronize input, target, and class fields
-        for field in splitThis:
-            leftDs.setField(field, self[field][leftIndices, :])
-            leftDs.endmarker[field] = len(leftIndices)
-            rightDs.setField(field, self[field][rightIndices, :])
-            rightDs.endmarker[field] = len(rightIndices)
+        self.assignClasses()
+        classes = ravel(self['class'])
+        leftDs = self._subset(where(classes == cls_select)[0])
+        rightDs = self._subset(where(classes != cls_select)[0])
         leftDs.assignClasses()
         rightDs.assignClasses()
         return leftDs, rightDs
     
+    def _subset(self, indices):
+        self.assignClasses()
+        ds = super(ClassificationDataSet, self)._subset(indices)
+        ds.setField('class', self['class'][indices])
+        return ds
+        
+    def _splitClasses(self):
+        """Return the class of every part of a split, see ._splitSize()."""
+        self.assignClasses()
+        return ravel(self['class'])
+        
+    def stratifiedSplit(self, testfrac=0.15, evalfrac=0, seed=None):
+        """Stratified random split of a data set, i.e. (almost) same 
+        proportion of samples (or sequences) in each class for all fragments. 
+        Return (training, test[, eval]) data sets.
+
+        The parameter `testfrac` specifies the fraction of the samples of 
+        every class in the test dataset, while `evalfrac` specifies the 
+        fraction in the validation dataset. If `evalfrac` equals 0, no 
+        validationset is returned. The order of the samples is kept. If 
+        `seed` is given, the same split is returned on every call."""
+        random = _randomState(seed)
+        classes = self._splitClasses()
+        tst, val, trn = [], [], []
+        for c in unique(classes):
+            # scramble available samples for current class
+            idx = random.permutation(where(classes == c)[0])
+            nTst, nVal = (int(testfrac * len(idx)), int(evalfrac * len(idx)))
+            tst.append(idx[:nTst])
+            val.append(idx[nTst:nTst + nVal])
+            trn.append(idx[nTst + nVal:])
+        trnDs, tstDs, valDs = [self._splitSubset(sort(concatenate(part)))
+                               for part in (trn, tst, val)]
+        if len(valDs) > 0:
+            return trnDs, tstDs, valDs
+        else:
+            return trnDs, tstDs
+    
     def castToRegression(self, values):
         """Converts data set into a SupervisedDataSet for regression. Classes
         are used as indices into the value array given."""
@@ -220,43 +255,9 @@ class SequenceClassificationDataSet(SequentialDataSet, ClassificationDataSet):
         """ NOT IMPLEMENTED """
         raise NotImplementedError
     
-    def stratifiedSplit(self, testfrac=0.15, evalfrac=0):
-        """Stratified random split of a sequence data set, i.e. (almost) same
-        proportion of sequences in each class for all fragments. Return 
-        (training, test[, eval]) data sets.
-
-        The parameter `testfrac` specifies the fraction of total sequences in
-        the test dataset, while `evalfrac` specifies the fraction of sequences
-        in the validation dataset. If `evalfrac` equals 0, no validationset is 
-        returned.
-        
-        It is assumed that the last target for each class is the class of the 
-        sequence. Also mind that the data will be sorted by class in the 
-        resulting data sets."""
-        lastidx = ravel(self['sequence_index'][1:] - 1).astype(int)
-        classes = ravel(self['class'][lastidx])
-        trnDs = self.copy()
-        trnDs.clear()
-        tstDs = trnDs.copy()
-        valDs = trnDs.copy()
-        for c in range(self.nClasses):
-            # scramble available sequences for current class
-            idx, = where(classes == c)
-            nCls = len(idx)
-            perm = permutation(nCls).tolist()
-            nTst, nVal = (int(testfrac * nCls), int(evalfrac * nCls))
-            for count, ds in zip([nTst, nVal, nCls - nTst - nVal], [tstDs, valDs, trnDs]):
-                for _ in range(count):
-                    feat = self.getSequence(idx[perm.pop()])[0]
-                    ds.newSequence()
-                    for s in feat:
-                        ds.addSample(s, [c])
-                ds.assignClasses()
-            assert perm == []
-        if len(valDs) > 0:
-            return trnDs, tstDs, valDs
-        else:
-            return trnDs, tstDs
+    def _splitClasses(self):
+        self.assignClasses()
+        return self.getSequenceClass()
 
     def getSequenceClass(self, index=None):
         """Return a flat array (or single scalar) comprising one class per 
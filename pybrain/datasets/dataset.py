@@ -2,11 +2,15 @@ from __future__ import with_statement
 
 __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 
+import os
+import json
 import random
 import pickle
 from itertools import chain
-from scipy import zeros, resize, ravel, asarray
+from scipy import zeros, ravel, asarray, array, memmap, sort, concatenate, \
+    array_split, dtype as _dtype
 import scipy
+import numpy
 
 from pybrain.utilities import Serializable
 
@@ -16,11 +20,21 @@ class VectorFormatError(Exception): pass
 class NoLinkedFieldsError(Exception): pass
 
 
+# Name of the file that describes a dataset stored in a directory.
+METAFILE = 'dataset.json'
+
+# Name of the array that describes a dataset saved as .npz archive.
+NPZMETA = '__dataset__'
+
+
 class DataSet(Serializable):
     """DataSet is a general base class for other data set classes 
     (e.g. SupervisedDataSet, SequentialDataSet, ...). It consists of several
     fields. A field is a NumPy array with a label (a string) attached to it. 
     Fields can be linked together which means they must have the same length."""
+    
+    # Directory whose files hold the fields, see .storeInDirectory().
+    directory = None
         
     def __init__(self):
         self.data = {}
@@ -45,6 +59,18 @@ class DataSet(Serializable):
         """Return the given field."""
         return self.getField(field)
         
+    @classmethod
+    def fromArrays(cls, *arrays, **kwargs):
+        """Return a new dataset whose linked fields hold the given arrays, one 
+        row per sample, in the order of the linked fields. 
+        
+        The numbers of columns of the arrays are passed to the constructor, 
+        together with the keyword arguments `kwargs`."""
+        arrays = [_asRows(a) for a in arrays]
+        ds = cls(*[a.shape[1] for a in arrays], **kwargs)
+        ds.extendLinked(*arrays)
+        return ds
+        
     def __iter__(self):
         self.reset()
         while not self.endOfData():
@@ -178,14 +204,24 @@ class DataSet(Serializable):
             label = self.data
         
         for l in label:
-            self.data[l] = self._resizeArray(self.data[l])
+            self._growField(l, (self.data[l].shape[0] + 1) * 2)
     
-    def _resizeArray(self, a):
-        """Increase the buffer size. It should always be one longer than the
-        current sequence length and double on every growth step."""
-        shape = list(a.shape)
-        shape[0] = (shape[0] + 1) * 2
-        return resize(a, shape)
+    def _growField(self, label, length):
+        """Increase the buffer size of the field `label` to `length` rows. 
+        Growing it to one more than twice its size on every step keeps 
+        appending cheap."""
+        if self.directory is None:
+            self.data[label] = _growArray(self.data[label], length)
+        else:
+            self.data[label] = self._mapField(label, length)
+    
+    def reserve(self, n):
+        """Make room for `n` samples in all linked fields (or in all fields, 
+        if none are linked), so that appending up to that many samples does 
+        not need to reallocate them."""
+        for label in self.link or self.data.keys():
+            if self.data[label].shape[0] < n:
+                self._growField(label, n)
             
     def _appendUnlinked(self, label, row):
         """Append `row` to the field array with the given `label`. 
@@ -195,7 +231,7 @@ class DataSet(Serializable):
         if self.data[label].shape[0] <= self.endmarker[label]:
             self._resize(label)
          
-        self.data[label][self.endmarker[label], :] = row
+        self._writableField(label)[self.endmarker[label], :] = row
         self.endmarker[label] += 1
 
     def append(self, label, row):
@@ -214,6 +250,37 @@ class DataSet(Serializable):
         assert len(args) == len(self.link)
         for i, l in enumerate(self.link):
             self._appendUnlinked(l, args[i])
+            
+    def extendLinked(self, *args):
+        """Add blocks of rows to all linked fields at once: one array of shape 
+        (n, dim) per linked field, with the same number of rows n. 
+        One-dimensional arrays are taken as columns."""
+        assert len(args) == len(self.link)
+        blocks = [_asRows(a) for a in args]
+        for block in blocks:
+            if block.shape[0] != blocks[0].shape[0]:
+                raise OutOfSyncError
+        for l, block in zip(self.link, blocks):
+            self._extendUnlinked(l, block)
+            
+    def _extendUnlinked(self, label, block):
+        """Append the rows of `block` to the field array with the given 
+        `label`."""
+        start = self.endmarker[label]
+        stop = start + block.shape[0]
+        capacity = self.data[label].shape[0]
+        if capacity < stop:
+            self._growField(label, max(stop, (capacity + 1) * 2))
+        self._writableField(label)[start:stop] = block
+        self.endmarker[label] = stop
+        
+    def _writableField(self, label):
+        """Return the field `label`. A field that is mapped read only from a 
+        file is copied into memory first."""
+        a = self.data[label]
+        if not a.flags.writeable:
+            a = self.data[label] = array(a)
+        return a
      
     def getLinked(self, index=None):
         """Access the dataset randomly or sequential.
@@ -260,6 +327,13 @@ class DataSet(Serializable):
         except KeyError:
             raise KeyError('convertField: dataset field %s not found.' % label)
             
+    def setDtype(self, dtype):
+        """Convert the linked fields (those that are fed to modules) to the 
+        given type, e.g. float32 to halve memory. Samples that are appended 
+        later are stored with the same type."""
+        for label in self.link:
+            self.data[label] = self.data[label].astype(dtype)
+            
     def endOfData(self):
         """Tell if the end of the data set is reached."""
         return self.index == self.getLength()
@@ -284,7 +358,7 @@ class DataSet(Serializable):
             shape = list(self.data[k].shape)
             # set to zero rows
             shape[0] = 0
-            self.data[k] = zeros(shape)
+            self.data[k] = zeros(shape, self.data[k].dtype)
             self.endmarker[k] = 0
     
     @classmethod
@@ -305,6 +379,141 @@ class DataSet(Serializable):
                 self.setField(field, temp)
         Serializable.save_pickle(self, flo, protocol)
 
+    def storeInDirectory(self, path):
+        """Keep the fields of the dataset in files in the directory `path`, 
+        one per field, which are mapped into memory. The directory is created 
+        if necessary. 
+        
+        Appending samples grows the files; the data that is not accessed stays 
+        on disk. Call .flush() to make the files consistent before the 
+        dataset is opened again with DataSet.loadFromDirectory()."""
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self.directory = path
+        self._mapped = {}
+        self.flush()
+        
+    def flush(self):
+        """Write the fields of a dataset that is stored in a directory to 
+        their files, together with the description of the dataset."""
+        assert self.directory is not None, \
+            "The dataset is not stored in a directory."
+        for label, a in self.data.items():
+            if self._mapped.get(label) is a:
+                a.flush()
+            else:
+                # Replaced by an array in memory, e.g. by .clear().
+                self.data[label] = self._mapField(label, a.shape[0])
+        meta = self._describe()
+        meta['fields'] = dict((label, {'dtype': a.dtype.str, 
+                                       'shape': list(a.shape)})
+                              for label, a in self.data.items())
+        # Replace the old description only once the new one is complete.
+        filename = os.path.join(self.directory, METAFILE)
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(meta, f, indent=1)
+        os.rename(filename + '.tmp', filename)
+        
+    def _mapField(self, label, length):
+        """Return the field `label` with `length` rows, mapped from its file 
+        in the directory of the dataset."""
+        a = self.data[label]
+        filename = os.path.join(self.directory, '%s.dat' % label)
+        shape = (length,) + a.shape[1:]
+        nbytes = int(scipy.prod(shape)) * a.dtype.itemsize
+        if self._mapped.get(label) is a:
+            # Extend the file. The old mapping stays valid.
+            a.flush()
+            with open(filename, 'r+b') as f:
+                f.truncate(nbytes)
+            del self._mapped[label]
+            if length == 0:
+                return zeros(shape, a.dtype)
+            result = memmap(filename, a.dtype, 'r+', shape=shape)
+        else:
+            # The array might be a view of the current file, so a new one is
+            # written next to it.
+            self._mapped.pop(label, None)
+            with open(filename + '.tmp', 'wb') as f:
+                f.truncate(nbytes)
+            if length == 0:
+                os.rename(filename + '.tmp', filename)
+                return zeros(shape, a.dtype)
+            result = memmap(filename + '.tmp', a.dtype, 'r+', shape=shape)
+            rows = min(length, a.shape[0])
+            result[:rows] = a[:rows]
+            os.rename(filename + '.tmp', filename)
+        self._mapped[label] = result
+        return result
+        
+    @staticmethod
+    def loadFromDirectory(path, mode='r+'):
+        """Return the dataset that was stored in the directory `path` with 
+        .storeInDirectory(), whose fields are mapped from their files.
+        
+            :key mode: 'r+' to keep the dataset in the directory, 'r' to read 
+                it only, 'c' to keep changes in memory only. In the latter two
+                modes, fields are copied into memory when they grow; in mode 
+                'r' also when samples are added or removed."""
+        with open(os.path.join(path, METAFILE)) as f:
+            meta = json.load(f)
+        obj = _fromDescription(meta)
+        mapped = {}
+        for label, field in meta['fields'].items():
+            label = str(label)
+            shape = tuple(field['shape'])
+            dt = _dtype(str(field['dtype']))
+            if shape[0] == 0:
+                obj.data[label] = zeros(shape, dt)
+            else:
+                obj.data[label] = mapped[label] = memmap(
+                    os.path.join(path, '%s.dat' % label), dt, mode, 
+                    shape=shape)
+        if mode == 'r+':
+            obj.directory = path
+            obj._mapped = mapped
+        return obj
+
+    def save_npz(self, flo, compressed=False):
+        """Save the data set as a NumPy .npz archive: the used rows of every 
+        field as binary array, and its description as JSON."""
+        arrays = dict((label, self.data[label][:self.endmarker[label]])
+                      for label in self.data)
+        arrays[NPZMETA] = array(json.dumps(self._describe()))
+        if compressed:
+            numpy.savez_compressed(flo, **arrays)
+        else:
+            numpy.savez(flo, **arrays)
+            
+    @classmethod
+    def load_npz(cls, flo):
+        """Return the data set saved with .save_npz(), as an instance of the 
+        class it was saved from."""
+        archive = numpy.load(flo)
+        try:
+            obj = _fromDescription(json.loads(str(archive[NPZMETA])))
+            for label in archive.files:
+                if label != NPZMETA:
+                    obj.data[str(label)] = archive[label]
+        finally:
+            archive.close()
+        return obj
+        
+    def _describe(self):
+        """Return everything but the fields that is needed to recreate the 
+        data set, as a dictionary that can be written as JSON."""
+        creator, args = self.__reduce__()[:2]
+        if not isinstance(creator, type):
+            args = ()
+        return {
+            'class': '%s.%s' % (self.__class__.__module__, 
+                                self.__class__.__name__),
+            'args': list(args),
+            'link': self.link,
+            'endmarker': self.endmarker,
+            'vectorformat': self.vectorformat,
+        }
+
     def __reduce__(self):
         def creator():
             obj = self.__class__()
@@ -357,6 +566,52 @@ class DataSet(Serializable):
         permutation = random.shuffle(range(len(self)))
         return self.batches(label, n, permutation)
 
+    def _subset(self, indices):
+        """Return a new data set of the same class with copies of the rows
+        `indices` of the linked fields, and of the other fields."""
+        ds = _fromDescription(self._describe())
+        for label in self.data:
+            if label in self.link:
+                ds.data[label] = self.data[label][indices]
+                ds.endmarker[label] = len(indices)
+            else:
+                ds.data[label] = self.data[label][:self.endmarker[label]].copy()
+        return ds
+        
+    def _splitSize(self):
+        """Return the number of parts the data set is split into: samples, 
+        or sequences for sequential data sets."""
+        return len(self)
+        
+    def _splitSubset(self, indices):
+        """Return the data set of the parts `indices`, see ._splitSize()."""
+        return self._subset(indices)
+        
+    def splitWithProportion(self, proportion=0.5, seed=None):
+        """Produce two new datasets, the first one containing the fraction given
+        by `proportion` of the samples (or sequences), chosen at random. Their 
+        order is kept. 
+        
+        If `seed` is given, the same split is returned on every call."""
+        perm = _randomState(seed).permutation(self._splitSize())
+        n = int(len(perm) * proportion)
+        return self._splitSubset(sort(perm[:n])), self._splitSubset(sort(perm[n:]))
+        
+    def splitIntoFolds(self, n, seed=None):
+        """Return a list of `n` datasets with disjoint random parts of the 
+        samples (or sequences) of (almost) equal size."""
+        folds = array_split(_randomState(seed).permutation(self._splitSize()), n)
+        return [self._splitSubset(sort(fold)) for fold in folds]
+        
+    def crossValidationSplits(self, n, seed=None):
+        """Yield the (training, test) pairs of datasets of `n`-fold cross 
+        validation: every one of `n` random parts of the samples (or 
+        sequences) is the test set once, with the other parts for training."""
+        folds = array_split(_randomState(seed).permutation(self._splitSize()), n)
+        for i in range(n):
+            training = concatenate(folds[:i] + folds[i + 1:])
+            yield self._splitSubset(sort(training)), self._splitSubset(sort(folds[i]))
+
     def replaceNansByMeans(self):
         """Replace all not-a-number entries in the dataset by the means of the
         corresponding column."""
@@ -366,3 +621,55 @@ class DataSet(Serializable):
                 for j in xrange(ds.dim):
                     if not scipy.isfinite(d[i, j]):
                         d[i, j] = means[j]
+
+
+def _fromDescription(meta):
+    """Return a data set without fields, as described by the dictionary 
+    `meta` that was returned by DataSet._describe()."""
+    modulename, classname = str(meta['class']).rsplit('.', 1)
+    module = __import__(modulename, fromlist=[classname])
+    obj = getattr(module, classname)(*_strings(meta['args']))
+    obj.vectorformat = str(meta['vectorformat'])
+    obj.link = [str(label) for label in meta['link']]
+    obj.endmarker = dict((str(label), n) 
+                         for label, n in meta['endmarker'].items())
+    obj.data = {}
+    return obj
+
+
+def _strings(value):
+    """Return `value` as read from JSON, with its unicode strings converted 
+    back to str."""
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    elif isinstance(value, list):
+        return [_strings(v) for v in value]
+    elif isinstance(value, dict):
+        return dict((_strings(k), _strings(v)) for k, v in value.items())
+    return value
+
+
+def _randomState(seed):
+    """Return a RandomState seeded with `seed`, or numpy.random, which uses the
+    global state, if it is None."""
+    if seed is None:
+        return numpy.random
+    return numpy.random.RandomState(seed)
+
+
+def _asRows(a):
+    """Return `a` as a two-dimensional array with one row per sample."""
+    a = asarray(a)
+    if a.ndim == 1:
+        a = a.reshape(-1, 1)
+    return a
+
+
+def _growArray(a, length):
+    """Return a copy of the array `a` with `length` rows, of which the ones 
+    that follow those of `a` are zero."""
+    shape = list(a.shape)
+    shape[0] = length
+    result = zeros(shape, a.dtype)
+    result[:a.shape[0]] = a
+    return result
@@ -3,6 +3,7 @@ __author__ = 'Tom Schaul, tom@idsia.ch'
 from scipy import ones, dot
 
 from sequential import SequentialDataSet
+from dataset import _asRows
 from pybrain.utilities import fListToString
 
 
@@ -29,6 +30,18 @@ class ImportanceDataSet(SequentialDataSet):
         if importance == None:
             importance = ones(len(target))
         self.appendLinked(inp, target, importance)
+        
+    @classmethod
+    def fromArrays(cls, inputs, targets, importances=None):
+        """Return a new dataset with a single sequence of the given arrays of
+        inputs, targets and importances, one row per sample. By default, all
+        importances are 1."""
+        inputs, targets = _asRows(inputs), _asRows(targets)
+        if importances is None:
+            importances = ones(targets.shape)
+        ds = cls(inputs.shape[1], targets.shape[1])
+        ds.extendLinked(inputs, targets, importances)
+        return ds
 
     def _evaluateSequence(self, f, seq, verbose = False):
         """ return the importance-ponderated MSE over one sequence. """
@@ -1,8 +1,8 @@
 __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 
 from sequential import SequentialDataSet
-from dataset import DataSet
-from scipy import zeros
+from dataset import DataSet, _asRows
+from scipy import zeros, int64
 
 
 class ReinforcementDataSet(SequentialDataSet):
@@ -22,6 +22,7 @@ class ReinforcementDataSet(SequentialDataSet):
         self.index = 0
         # add field that stores the beginning of a new episode
         self.addField('sequence_index', 1)
+        self.convertField('sequence_index', int64)
         self.append('sequence_index', 0)
         self.currentSeq = 0
         self.statedim = statedim
@@ -38,6 +39,14 @@ class ReinforcementDataSet(SequentialDataSet):
             :key action: the executed action by the agent
             :key reward: the reward received for action in state """
         self.appendLinked(state, action, reward)
+        
+    @classmethod
+    def fromArrays(cls, states, actions, rewards):
+        """Return a new dataset with a single sequence of the given arrays of
+        states, actions and rewards, one row per step."""
+        ds = cls(_asRows(states).shape[1], _asRows(actions).shape[1])
+        ds.extendLinked(states, actions, rewards)
+        return ds
  
     def getSumOverSequences(self, field):
         sums = zeros((self.getNumSequences(), self.getDimension(field)))
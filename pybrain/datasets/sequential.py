@@ -1,8 +1,9 @@
 __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 # $Id$
 
-from scipy import ravel, r_
-from random import sample
+from scipy import r_, zeros, lexsort, rand, searchsorted, int64, cumsum, \
+    repeat, arange
+from random import shuffle
 
 from supervised import SupervisedDataSet
 
@@ -21,6 +22,7 @@ class SequentialDataSet(SupervisedDataSet):
         SupervisedDataSet.__init__(self, indim, targetdim)
         # add field that stores the beginning of a new episode
         self.addField('sequence_index', 1)
+        self.convertField('sequence_index', int64)
         self.append('sequence_index', 0)
         self.currentSeq = 0
         
@@ -31,21 +33,38 @@ class SequentialDataSet(SupervisedDataSet):
         exception will be raised."""
         length = self.getLength()
         if length != 0:            
-            if ravel(self.getField('sequence_index'))[-1] == length:
+            if self._sequenceStarts()[-1] == length:
                 raise EmptySequenceError
             self._appendUnlinked('sequence_index', length) 
 
+    def _sequenceStarts(self):
+        """Return the indices of the first samples of all sequences, as a 
+        view of the sequence_index field."""
+        if self.data['sequence_index'].dtype != int64:
+            # Data sets saved when the field held floats.
+            self.data['sequence_index'] = \
+                self.data['sequence_index'].astype(int64)
+        return self.data['sequence_index'][:self.endmarker['sequence_index'], 0]
+        
+    def _sequenceBounds(self, index):
+        """Return the indices of the first sample of the sequence `index` and 
+        of the one following its last sample."""
+        starts = self._sequenceStarts()
+        if not -len(starts) <= index < len(starts):
+            raise IndexError('sequence does not exist.')
+        index %= len(starts)
+        if index == len(starts) - 1:
+            # the last sequence goes until the end of data
+            return int(starts[index]), self.getLength()
+        return int(starts[index]), int(starts[index + 1])
+
     def _getSequenceField(self, index, field):
         """Return a sequence of one single field given by `field` and indexed by
         `index`."""
-        seq = ravel(self.getField('sequence_index'))
-        if len(seq) == index + 1:
-            # user wants to access the last sequence, return until end of data
-            return self.getField(field)[ravel(self.getField('sequence_index'))[index]:]            
-        if len(seq) < index + 1:
-            # sequence index beyond number of sequences. raise exception
-            raise IndexError('sequence does not exist.')
-        return self.getField(field)[ravel(self.getField('sequence_index'))[index]:ravel(self.getField('sequence_index'))[index + 1]]
+        start, stop = self._sequenceBounds(index)
+        if self.vectorformat == 'list':
+            return self.data[field][start:stop].tolist()
+        return self.data[field][start:stop]
 
     def getSequence(self, index):
         """Returns the sequence given by `index`. 
@@ -66,77 +85,48 @@ class SequentialDataSet(SupervisedDataSet):
         sequence `index`, False otherwise. 
         
         Mostly used like .endOfData() with while loops."""
-        seq = ravel(self.getField('sequence_index'))
-        if len(seq) == index + 1:
-            # user wants to access the last sequence, return until end of data
-            return self.endOfData()
-        if len(seq) < index + 1:
-            # sequence index beyond number of sequences. raise exception
-            raise IndexError('sequence does not exist.')  
-        else:
-            return self.index >= seq[index + 1]
+        return self.index >= self._sequenceBounds(index)[1]
     
     def gotoSequence(self, index):
         """Move the internal marker to the beginning of sequence `index`."""
-        try:
-            self.index = ravel(self.getField('sequence_index'))[index]
-        except IndexError:
-            raise IndexError('sequence does not exist')
+        self.index = self._sequenceBounds(index)[0]
      
     def getCurrentSequence(self):
         """Return the current sequence, according to the marker position."""
-        seq = ravel(self.getField('sequence_index'))
-        return len(seq) - sum(seq > self.index) - 1
+        return int(searchsorted(self._sequenceStarts(), self.index, 'right')) - 1
         
     def getNumSequences(self):
         """Return the number of sequences. The last (open) sequence is also 
         counted in, even though there is no additional 'newSequence' marker."""
-        return self.getField('sequence_index').shape[0]
+        return self.endmarker['sequence_index']
     
     def getSequenceLength(self, index):
         """Return the length of the given sequence. If `index` is pointing
         to the last sequence, the sequence is considered to go until the end
         of the dataset."""
-        seq = ravel(self.getField('sequence_index'))
-        if len(seq) == index + 1:
-            # user wants to access the last sequence, return until end of data
-            return int(self.getLength() - seq[index])
-        if len(seq) < index + 1:
-            # sequence index beyond number of sequences. raise exception
-            raise IndexError('sequence does not exist.')  
-        return int(seq[index + 1] - seq[index])
+        start, stop = self._sequenceBounds(index)
+        return stop - start
     
     def removeSequence(self, index):
         """Remove the `index`'th sequence from the dataset and places the
         marker to the sample following the removed sequence."""
-        if index >= self.getNumSequences():
-            # sequence doesn't exist, raise exception
-            raise IndexError('sequence does not exist.')
-        sequences = ravel(self.getField('sequence_index'))
-        seqstart = sequences[index]
-        if index == self.getNumSequences() - 1:
-            # last sequence is going to be removed
-            lastSeqDeleted = True
-            seqend = self.getLength()
-        else:
-            lastSeqDeleted = False 
-            # sequence to remove is not last one (sequence_index exists)
-            seqend = sequences[index + 1]
+        seqstart, seqend = self._sequenceBounds(index)
+        index %= self.getNumSequences()
+        lastSeqDeleted = index == self.getNumSequences() - 1
+        removed = seqend - seqstart
+        length = self.getLength()
         
-        # cut out data from all fields
+        # move the following samples of all fields to the front at once
         for label in self.link:
-            # concatenate rows from start to seqstart and from seqend to end
-            self.data[label] = r_[self.data[label][:seqstart, :], self.data[label][seqend:, :]]
+            a = self._writableField(label)
+            a[seqstart:length - removed] = a[seqend:length].copy()
             # update endmarkers of linked fields
-            self.endmarker[label] -= seqend - seqstart
+            self.endmarker[label] -= removed
         
-        # update sequence indices
-        for i, val in enumerate(sequences):
-            if val > seqstart:
-                self.data['sequence_index'][i, :] -= seqend - seqstart
-        
-        # remove sequence index of deleted sequence and reduce its endmarker
-        self.data['sequence_index'] = r_[self.data['sequence_index'][:index, :], self.data['sequence_index'][index + 1:, :]]
+        # shift the following sequences and drop the removed one
+        self._sequenceStarts()
+        starts = self._writableField('sequence_index')
+        starts[index:-1] = starts[index + 1:] - removed
         self.endmarker['sequence_index'] -= 1
 
         if lastSeqDeleted:
@@ -153,7 +143,7 @@ class SequentialDataSet(SupervisedDataSet):
             # move sequence marker to the new sequence at position 'index'
             self.currentSeq = index
             # move sample marker to beginning of sequence at position 'index'
-            self.index = ravel(self.getField('sequence_index'))[index]
+            self.index = seqstart
 
         
     def clear(self):
@@ -171,6 +161,38 @@ class SequentialDataSet(SupervisedDataSet):
         """Return an iterator over sequence lists."""
         return iter(map(list, iter(self)))
     
+    def getPaddedSequenceBatches(self, batchsize, randomize=False):
+        """Return an iterator over batches of at most `batchsize` sequences. 
+        
+        Sequences of similar length are put into the same batch, and the 
+        shorter ones are padded with zeros at their end. Every batch is a tuple
+        of a list, which holds one array of shape (sequences, time steps, dim) 
+        for each linked field, and an array of the sequence lengths. 
+        
+        If `randomize` is set, the order of the batches and that of sequences 
+        of equal length is random."""
+        starts = self._sequenceStarts()
+        ends = r_[starts[1:], self.getLength()]
+        lengths = ends - starts
+        if randomize:
+            order = lexsort((rand(len(lengths)), lengths))
+        else:
+            order = lexsort((lengths,))
+        batches = [order[i:i + batchsize] 
+                   for i in xrange(0, len(order), batchsize)]
+        if randomize:
+            shuffle(batches)
+        for batch in batches:
+            batchlengths = lengths[batch]
+            arrays = []
+            for field in self.link:
+                data = self.getField(field)
+                padded = zeros((len(batch), batchlengths.max(), data.shape[1]))
+                for j, i in enumerate(batch):
+                    padded[j, :lengths[i]] = data[starts[i]:ends[i]]
+                arrays.append(padded)
+            yield arrays, batchlengths
+    
     def evaluateModuleMSE(self, module, averageOver=1, **args):
         """Evaluate the predictions of a module on a sequential dataset
         and return the MSE (potentially average over a number of epochs)."""
@@ -186,27 +208,19 @@ class SequentialDataSet(SupervisedDataSet):
             assert ponderation > 0          
             res += totalError / ponderation    
         return res / averageOver
-   
-    def splitWithProportion(self, proportion=0.5):
-        """Produce two new datasets, each containing a part of the sequences. 
-        
-        The first dataset will have a fraction given by `proportion` of the 
-        dataset."""
-        l = self.getNumSequences()
-        leftIndices = sample(range(l), int(l * proportion))
-        leftDs = self.copy()
-        leftDs.clear()
-        rightDs = leftDs.copy()
-        index = 0
-        for seq in iter(self):
-            if index in leftIndices:
-                leftDs.newSequence()
-                for sp in seq:
-                    leftDs.addSample(*sp)
-            else:
-                rightDs.newSequence()
-                for sp in seq:
-                    rightDs.addSample(*sp)
-            index += 1
-        return leftDs, rightDs
 
+    def _splitSize(self):
+        return self.getNumSequences()
+        
+    def _splitSubset(self, indices):
+        """Return the data set of the sequences `indices`."""
+        starts = self._sequenceStarts()
+        lengths = (r_[starts[1:], self.getLength()] - starts)[indices]
+        offsets = cumsum(lengths) - lengths
+        rows = repeat(starts[indices] - offsets, lengths) + arange(lengths.sum())
+        ds = self._subset(rows)
+        if len(offsets) == 0:
+            # like a cleared data set
+            offsets = zeros(1, int64)
+        ds.setField('sequence_index', offsets.reshape(-1, 1))
+        return ds
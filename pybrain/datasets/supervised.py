@@ -1,6 +1,5 @@
 __author__ = 'Thomas Rueckstiess, ruecksti@in.tum.de'
 
-from random import sample
 from scipy import isscalar
 
 from dataset import DataSet
@@ -99,20 +98,4 @@ class SupervisedDataSet(DataSet):
             res += self.evaluateMSE(module.activate, **args)
         return res/averageOver
         
-    def splitWithProportion(self, proportion = 0.5):
-        """Produce two new datasets, the first one containing the fraction given
-        by `proportion` of the samples."""
-        leftIndices = sample(range(len(self)), int(len(self)*proportion))
-        leftDs = self.copy()
-        leftDs.clear()
-        rightDs = leftDs.copy()
-        index = 0
-        for sp in self:
-            if index in leftIndices:
-                leftDs.addSample(*sp)
-            else:
-                rightDs.addSample(*sp)
-            index += 1
-        return leftDs, rightDs
-        
         
\ No newline at end of file
@@ -21,9 +21,9 @@ class ENAC(PolicyGradientLearner):
 
         # collect sufficient statistics
         print self.dataset.getNumSequences()
+        seqidx = ravel(self.dataset['sequence_index'])
         for n in range(self.dataset.getNumSequences()):
             _state, _action, reward = self.dataset.getSequence(n)
-            seqidx = ravel(self.dataset['sequence_index'])
             if n == self.dataset.getNumSequences() - 1:
                 # last sequence until end of dataset
                 loglh = self.loglh['loglh'][seqidx[n]:, :]
@@ -8,7 +8,8 @@ from pybrain.structure.parametercontainer import ParameterContainer
 from pybrain.tools.shortcuts import buildNetwork
 from pybrain.utilities import one_to_n
 
-from scipy import argmax, array, r_, asarray, where
+from scipy import argmax, r_, asarray, where, atleast_2d, zeros, eye, \
+    tile, repeat
 from random import choice
 
 
@@ -66,9 +67,9 @@ class ActionValueTable(Table, ActionValueInterface):
 class ActionValueNetwork(Module, ActionValueInterface):
     """ A network that approximates action values for continuous state / 
         discrete action RL environments. To receive the maximum action
-        for a given state, a forward pass is executed for all discrete 
-        actions, and the maximal action is returned. This network is used
-        for the NFQ algorithm. """
+        for a given state, the network is evaluated for all discrete 
+        actions in one batch, and the maximal action is returned. This 
+        network is used for the NFQ algorithm. """
         
     def __init__(self, dimState, numActions, name=None):
         Module.__init__(self, dimState, 1, name)
@@ -86,9 +87,33 @@ class ActionValueNetwork(Module, ActionValueInterface):
         return argmax(self.getActionValues(state))
 
     def getActionValues(self, state):
-        """ Run forward activation for each of the actions and returns all values. """
-        values = array([self.network.activate(r_[state, one_to_n(i, self.numActions)]) for i in range(self.numActions)])
-        return values
+        """ Return the values of all actions for the given state. """
+        return self.getActionValuesBatch([state])[0]
+
+    def getActionValuesBatch(self, states):
+        """ Return a matrix with the values of all actions (columns) for 
+            every one of the given states (rows), computed in a single 
+            batch activation of the network. """
+        states = atleast_2d(states)
+        values = self.network.activateBatch(self._actionInputs(states))
+        return values.reshape(len(states), self.numActions)
+
+    def getValues(self, states, actions):
+        """ Return the values of the given actions in the given states, 
+            computed in a single batch activation of the network. """
+        states = atleast_2d(states)
+        inputs = zeros((len(states), self.network.indim))
+        inputs[:, :states.shape[1]] = states
+        inputs[range(len(states)), states.shape[1] + asarray(actions, int)] = 1
+        return self.network.activateBatch(inputs)[:, 0]
+
+    def _actionInputs(self, states):
+        """ Return the inputs of the network for all actions in every one of
+            the given states, one row per pair, grouped by state. """
+        inputs = zeros((len(states) * self.numActions, self.network.indim))
+        inputs[:, :states.shape[1]] = repeat(states, self.numActions, axis=0)
+        inputs[:, states.shape[1]:] = tile(eye(self.numActions), (len(states), 1))
+        return inputs
 
     def getValue(self, state, action):
         return self.network.activate(r_[state, one_to_n(action, self.numActions)])
\ No newline at end of file
@@ -1,4 +1,4 @@
-from scipy import r_
+from scipy import r_, array
 
 from pybrain.rl.learners.valuebased.valuebased import ValueBasedLearner
 from pybrain.datasets import SupervisedDataSet
@@ -19,6 +19,9 @@ class NFQ(ValueBasedLearner):
         # convert reinforcement dataset to NFQ supervised dataset
         supervised = SupervisedDataSet(self.module.network.indim, 1)
         
+        # collect the transitions first, so that the network can evaluate 
+        # them in two batches
+        states, actions, rewards, nextstates = [], [], [], []
         for seq in self.dataset:
             lastexperience = None
             for state, action, reward in seq:
@@ -29,16 +32,22 @@ class NFQ(ValueBasedLearner):
                 
                 # use experience from last timestep to do Q update
                 (state_, action_, reward_) = lastexperience
-                
-                Q = self.module.getValue(state_, action_[0])
-                
-                inp = r_[state_, one_to_n(action_[0], self.module.numActions)]
-                tgt = Q + 0.5*(reward_ + self.gamma * max(self.module.getActionValues(state)) - Q)
-                supervised.addSample(inp, tgt)
+                states.append(state_)
+                actions.append(action_[0])
+                rewards.append(reward_[0])
+                nextstates.append(state)
                 
                 # update last experience with current one
                 lastexperience = (state, action, reward)
         
+        if states:
+            Q = self.module.getValues(states, actions)
+            maxQ = self.module.getActionValuesBatch(nextstates).max(axis=1)
+            targets = Q + 0.5*(array(rewards) + self.gamma * maxQ - Q)
+            for state_, action_, tgt in zip(states, actions, targets):
+                inp = r_[state_, one_to_n(action_, self.module.numActions)]
+                supervised.addSample(inp, [tgt])
+        
         # train module with backprop/rprop on dataset
         trainer = RPropMinusTrainer(self.module.network, dataset=supervised, batchlearning=True, verbose=False)
         trainer.trainUntilConvergence(maxEpochs=self.maxEpochs)
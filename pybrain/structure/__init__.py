@@ -1,4 +1,5 @@
 from connections.__init__ import *
 from modules.__init__ import *
 from networks.__init__ import *
-from modulemesh import ModuleMesh
\ No newline at end of file
+from modulemesh import ModuleMesh
+from executioncontext import ExecutionContext
\ No newline at end of file
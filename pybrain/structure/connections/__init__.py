@@ -2,4 +2,7 @@ from full import FullConnection
 from identity import IdentityConnection
 from shared import SharedFullConnection, MotherConnection, SharedConnection
 from linear import LinearConnection
-from fullnotself import FullNotSelfConnection
\ No newline at end of file
+from fullnotself import FullNotSelfConnection
+from convolution import ConvolutionConnection
+from sparse import SparseConnection
+from quantized import QuantizedFullConnection
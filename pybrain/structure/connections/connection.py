@@ -92,11 +92,55 @@ class Connection(Named):
             self.inmod.outputerror[inmodOffset, self.inSliceFrom:self.inSliceTo],
             self.inmod.outputbuffer[inmodOffset, self.inSliceFrom:self.inSliceTo])
 
+    def forwardBatch(self):
+        """Like .forward(), but for the batch buffers of the modules: every row
+        of the incoming module's output batch is propagated at once."""
+        self._forwardBatchImplementation(
+            self.inmod.outputbatch[:, self.inSliceFrom:self.inSliceTo],
+            self.outmod.inputbatch[:, self.outSliceFrom:self.outSliceTo])
+        
+    def backwardBatch(self):
+        """Like .backward(), but for the batch buffers of the modules. The 
+        parameter derivatives are summed over all rows."""
+        self._backwardBatchImplementation(
+            self.outmod.inputerrorbatch[:, self.outSliceFrom:self.outSliceTo],
+            self.inmod.outputerrorbatch[:, self.inSliceFrom:self.inSliceTo],
+            self.inmod.outputbatch[:, self.inSliceFrom:self.inSliceTo])
+
+    def forwardRows(self, inrows, outrows):
+        """Like .forward(), but for several rows of the buffers at once: the
+        rows given by the slice `inrows` of the incoming module's output buffer
+        are propagated to the rows `outrows` of the outgoing module's input
+        buffer."""
+        self._forwardBatchImplementation(
+            self.inmod.outputbuffer[inrows, self.inSliceFrom:self.inSliceTo],
+            self.outmod.inputbuffer[outrows, self.outSliceFrom:self.outSliceTo])
+        
+    def backwardRows(self, inrows, outrows):
+        """Like .backward(), but for several rows of the buffers at once. The 
+        parameter derivatives are summed over all rows."""
+        self._backwardBatchImplementation(
+            self.outmod.inputerror[outrows, self.outSliceFrom:self.outSliceTo],
+            self.inmod.outputerror[inrows, self.inSliceFrom:self.inSliceTo],
+            self.inmod.outputbuffer[inrows, self.inSliceFrom:self.inSliceTo])
+
     def _forwardImplementation(self, inbuf, outbuf):
         abstractMethod()
     
     def _backwardImplementation(self, outerr, inerr, inbuf):
         abstractMethod()
+        
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        """Batch version of _forwardImplementation, one sample per row. Falls 
+        back to the single-sample implementation."""
+        for i in xrange(inbuf.shape[0]):
+            self._forwardImplementation(inbuf[i], outbuf[i])
+    
+    def _backwardBatchImplementation(self, outerr, inerr, inbuf):
+        """Batch version of _backwardImplementation, one sample per row. Falls
+        back to the single-sample implementation."""
+        for i in xrange(outerr.shape[0]):
+            self._backwardImplementation(outerr[i], inerr[i], inbuf[i])
 
     def __repr__(self):
         """A simple representation (this should probably be expanded by 
@@ -0,0 +1,169 @@
+from scipy import dot, newaxis, ones
+from numpy.lib.stride_tricks import as_strided
+
+from connection import Connection
+from pybrain.structure.parametercontainer import ParameterContainer
+
+
+class ConvolutionConnection(Connection, ParameterContainer):
+    """Connection that convolves a two-dimensional plane of inputs with a set of
+    kernels, one per feature map of the output.
+
+    The output buffer of the incoming module holds the plane row by row, with
+    all channels of a position next to each other. The outputs are laid out in
+    the same way, with one channel per feature map. All kernels are stored in a
+    single weight matrix with one row per feature map, and the whole plane is
+    processed by one matrix product."""
+
+    inshape = None
+    kernelshape = None
+
+    def __init__(self, inmod, outmod, inshape, kernelshape, name=None,
+                 inSliceFrom=0, inSliceTo=None, outSliceFrom=0, outSliceTo=None):
+        """
+            :arg inshape: (height, width, channels) of the input plane
+            :arg kernelshape: (height, width) of the kernels
+
+        The number of feature maps follows from the size of the output."""
+        Connection.__init__(self, inmod, outmod, name,
+                            inSliceFrom, inSliceTo, outSliceFrom, outSliceTo)
+        self.setArgs(inshape=tuple(inshape), kernelshape=tuple(kernelshape))
+        height, width, channels = self.inshape
+        kheight, kwidth = self.kernelshape
+        assert self.indim == height * width * channels, \
+            "Input plane does not match the input dimension."
+        assert 1 <= kheight <= height and 1 <= kwidth <= width, \
+            "Kernels have to be at least 1x1 and fit into the input plane."
+        self.outshape = height - kheight + 1, width - kwidth + 1
+        positions = self.outshape[0] * self.outshape[1]
+        assert positions > 0 and self.outdim % positions == 0, \
+            "Output dimension is not a multiple of the output plane size."
+        self.features = self.outdim / positions
+        self.kerneldim = kheight * kwidth * channels
+        ParameterContainer.__init__(self, self.features * self.kerneldim)
+
+    def _planes(self, buf):
+        """Return a view of the flat input planes in the rows of `buf` with the
+        shape (rows, height, width, channels)."""
+        return _splitRows(buf, self.inshape)
+
+    def _windows(self, buf):
+        """Return a view of all kernel-sized windows of the planes in `buf`
+        with the shape (rows, outheight, outwidth, kheight, kwidth, channels).
+        """
+        planes = self._planes(buf)
+        s = planes.strides
+        return as_strided(planes, planes.shape[:1] + self.outshape +
+                          self.kernelshape + planes.shape[3:],
+                          s[:3] + s[1:])
+
+    def _columns(self, inbuf):
+        """Return the matrix with the flattened window of every output position
+        in its rows."""
+        return self._windows(inbuf).reshape(-1, self.kerneldim)
+
+    def _outputs(self, buf):
+        """Return a view of the flat output planes in the rows of `buf` with
+        the shape (rows, positions, features)."""
+        return _splitRows(buf, (-1, self.features))
+
+    def _forwardImplementation(self, inbuf, outbuf):
+        weights = self.params.reshape(self.features, self.kerneldim)
+        outputs = self._outputs(outbuf)
+        outputs += dot(self._columns(inbuf), weights.T).reshape(outputs.shape)
+
+    def _backwardImplementation(self, outerr, inerr, inbuf):
+        weights = self.params.reshape(self.features, self.kerneldim)
+        outerr = self._outputs(outerr).reshape(-1, self.features)
+        derivs = self.derivs.reshape(self.features, self.kerneldim)
+        derivs += dot(outerr.T, self._columns(inbuf))
+        # Every window adds its errors to the inputs it covers.
+        colerr = dot(outerr, weights).reshape(
+            (-1,) + self.outshape + self.kernelshape + self.inshape[2:])
+        planes = self._planes(inerr)
+        outheight, outwidth = self.outshape
+        for i in xrange(self.kernelshape[0]):
+            for j in xrange(self.kernelshape[1]):
+                planes[:, i:i + outheight, j:j + outwidth] += colerr[:, :, :, i, j]
+
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _backwardBatchImplementation(self, outerr, inerr, inbuf):
+        self._backwardImplementation(outerr, inerr, inbuf)
+
+
+class PaddingConnection(Connection, ParameterContainer):
+    """Connection that places a two-dimensional plane of inputs in the middle of
+    a bigger plane. The border around it is filled with a trainable value per
+    channel.
+
+    Both planes are laid out as for the ConvolutionConnection."""
+
+    inshape = None
+    padding = None
+
+    def __init__(self, inmod, outmod, inshape, padding, name=None,
+                 inSliceFrom=0, inSliceTo=None, outSliceFrom=0, outSliceTo=None):
+        """
+            :arg inshape: (height, width, channels) of the input plane
+            :arg padding: number of rows and columns that are added on each
+                side, or a tuple (before, after) if they differ"""
+        Connection.__init__(self, inmod, outmod, name,
+                            inSliceFrom, inSliceTo, outSliceFrom, outSliceTo)
+        if isinstance(padding, int):
+            padding = padding, padding
+        self.setArgs(inshape=tuple(inshape), padding=tuple(padding))
+        height, width, channels = self.inshape
+        before, after = self.padding
+        self.outshape = (height + before + after, width + before + after,
+                         channels)
+        assert self.indim == height * width * channels, \
+            "Input plane does not match the input dimension."
+        assert self.outdim == reduce(lambda x, y: x * y, self.outshape), \
+            "Padded plane does not match the output dimension."
+        self.border = ones(self.outshape[:2], dtype=bool)
+        self.border[before:before + height, before:before + width] = False
+        ParameterContainer.__init__(self, channels)
+
+    def _inner(self, planes):
+        """Return the part of the padded planes that holds the inputs."""
+        before = self.padding[0]
+        height, width = self.inshape[:2]
+        return planes[:, before:before + height, before:before + width]
+
+    def _forwardImplementation(self, inbuf, outbuf):
+        planes = _splitRows(outbuf, self.outshape)
+        planes[:, self.border] += self.params
+        self._inner(planes)[...] += _splitRows(inbuf, self.inshape)
+
+    def _backwardImplementation(self, outerr, inerr, inbuf):
+        planes = _splitRows(outerr, self.outshape)
+        derivs = self.derivs
+        derivs += planes[:, self.border].sum(axis=0).sum(axis=0)
+        _splitRows(inerr, self.inshape)[...] += self._inner(planes)
+
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        self._forwardImplementation(inbuf, outbuf)
+
+    def _backwardBatchImplementation(self, outerr, inerr, inbuf):
+        self._backwardImplementation(outerr, inerr, inbuf)
+
+
+def _splitRows(buf, shape):
+    """Return a view of the rows of the one- or two-dimensional array `buf`
+    with the given shape each (one entry may be -1). The rows do not need to be
+    contiguous in memory, as long as their elements are."""
+    if buf.ndim == 1:
+        buf = buf[newaxis]
+    rows, length = buf.shape
+    shape = list(shape)
+    if -1 in shape:
+        known = reduce(lambda x, y: x * y, [d for d in shape if d != -1], 1)
+        shape[shape.index(-1)] = length / known
+    rowstride, step = buf.strides
+    strides = []
+    for d in reversed(shape):
+        strides.insert(0, step)
+        step *= d
+    return as_strided(buf, [rows] + shape, [rowstride] + strides)
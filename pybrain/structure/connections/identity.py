@@ -17,4 +17,8 @@ class IdentityConnection(Connection):
         outbuf += inbuf
         
     def _backwardImplementation(self, outerr, inerr, inbuf):
-        inerr += outerr
\ No newline at end of file
+        inerr += outerr
+        
+    # Both directions are elementwise, so they work on matrices unchanged.
+    _forwardBatchImplementation = _forwardImplementation
+    _backwardBatchImplementation = _backwardImplementation
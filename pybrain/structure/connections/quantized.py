@@ -0,0 +1,109 @@
+from scipy import dot, asarray, absolute, around, clip, int8, float16, \
+    float32, float64
+
+from connection import Connection
+
+
+class QuantizedFullConnection(Connection):
+    """Inference only version of the FullConnection, whose weights are stored
+    with less precision: as 8 bit integers with a scale for every output, or
+    as half precision floats.
+
+    During the matrix product, the weights are converted to single precision
+    for blocks of `blocksize` outputs at a time, so that the full weight matrix
+    is never held in memory with more precision. Converting to double
+    precision would take twice as long, and half precision values cannot be
+    more precise anyway."""
+
+    weights = None
+    scales = None
+    weighttype = None
+    blocksize = 256
+
+    def __init__(self, inmod, outmod, weights, scales=None, name=None,
+                 inSliceFrom=0, inSliceTo=None, outSliceFrom=0, outSliceTo=None,
+                 weighttype=None):
+        """
+            :key weights: quantized weight matrix of shape (outdim, indim),
+                as int8 or float16 array or as nested lists
+            :key scales: scale of the weights of every output, for int8
+                weights
+            :key weighttype: name of the type of the weights, 'int8' or
+                'float16'. By default, the type of the `weights` array."""
+        Connection.__init__(self, inmod, outmod, name,
+                            inSliceFrom, inSliceTo, outSliceFrom, outSliceTo)
+        if weighttype is None:
+            weighttype = asarray(weights).dtype
+        weights = asarray(weights, dtype=weighttype)
+        assert weights.shape == (self.outdim, self.indim), \
+            "The weights do not match the dimensions of the connection."
+        assert weights.dtype in (int8, float16), \
+            "Only int8 and float16 weights are supported."
+        assert (scales is None) == (weights.dtype == float16), \
+            "Scales have to be given for int8 weights only."
+        if scales is not None:
+            scales = asarray(scales, dtype=float32)
+        # The arguments are kept as lists, so that the XML reader can rebuild
+        # them.
+        self.setArgs(weights=weights.tolist(), weighttype=weights.dtype.name)
+        if scales is not None:
+            self.setArgs(scales=scales.tolist())
+        self.weights = weights
+        self.scales = scales
+
+    @staticmethod
+    def fromFullConnection(c, dtype=int8):
+        """Return a QuantizedFullConnection between the same modules and
+        buffer slices as the FullConnection `c`, with its weights quantized to
+        `dtype`. For int8, every output gets the scale that maps its largest
+        weight to 127."""
+        w = c.params.reshape(c.outdim, c.indim)
+        scales = None
+        if dtype == float16:
+            weights = w.astype(float16)
+        elif dtype == int8:
+            scales = absolute(w).max(axis=1) / 127.
+            scales[scales == 0] = 1.
+            weights = clip(around(w / scales[:, None]), -127, 127).astype(int8)
+        else:
+            raise ValueError("Cannot quantize to %s." % dtype)
+        return QuantizedFullConnection(c.inmod, c.outmod, weights, scales,
+                                       c.name, c.inSliceFrom, c.inSliceTo,
+                                       c.outSliceFrom, c.outSliceTo)
+
+    def dequantized(self, dtype=float64):
+        """Return the weight matrix as an array of type `dtype`."""
+        w = self.weights.astype(dtype)
+        if self.scales is not None:
+            w *= self.scales[:, None]
+        return w
+
+    def _blocks(self):
+        """Yield the slices of outputs and their weights, converted to single
+        precision but not yet scaled."""
+        for start in xrange(0, self.outdim, self.blocksize):
+            rows = slice(start, start + self.blocksize)
+            yield rows, self.weights[rows].astype(float32)
+
+    def _forwardImplementation(self, inbuf, outbuf):
+        scales = self.scales
+        inbuf = inbuf.astype(float32)
+        for rows, w in self._blocks():
+            if scales is None:
+                outbuf[rows] += dot(w, inbuf)
+            else:
+                outbuf[rows] += dot(w, inbuf) * scales[rows]
+
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        scales = self.scales
+        inbuf = inbuf.astype(float32)
+        for rows, w in self._blocks():
+            if scales is None:
+                outbuf[:, rows] += dot(inbuf, w.T)
+            else:
+                outbuf[:, rows] += dot(inbuf, w.T) * scales[rows]
+
+    def _backwardImplementation(self, outerr, inerr, inbuf):
+        raise NotImplementedError("Quantized connections are inference only.")
+
+    _backwardBatchImplementation = _backwardImplementation
@@ -0,0 +1,104 @@
+from scipy import zeros, array, arange, diff, repeat, asarray, flatnonzero, int32
+from scipy.sparse import csr_matrix
+
+from connection import Connection
+from pybrain.structure.parametercontainer import ParameterContainer
+
+
+class SparseConnection(Connection, ParameterContainer):
+    """Connection like the FullConnection, but with only some of the weights.
+
+    The weight matrix is stored in compressed sparse row (CSR) format: the
+    parameters are the weights that are present, ordered by the output they
+    lead to and then by their input. `indices` holds the input of every weight
+    and the weights leading to output `i` are those from `indptr[i]` to
+    `indptr[i+1]`. Forward and backward passes only touch these weights."""
+
+    indices = None
+    indptr = None
+
+    def __init__(self, inmod, outmod, mask=None, name=None,
+                 inSliceFrom=0, inSliceTo=None, outSliceFrom=0, outSliceTo=None,
+                 indices=None, indptr=None):
+        """
+            :key mask: boolean matrix of shape (outdim, indim), or a flat array
+                of the same size, that tells which weights are present. All
+                weights are present if neither this nor the CSR structure is
+                given.
+            :key indices: input of every weight, in CSR format
+            :key indptr: start of the weights of every output, in CSR format"""
+        Connection.__init__(self, inmod, outmod, name,
+                            inSliceFrom, inSliceTo, outSliceFrom, outSliceTo)
+        if indices is None:
+            if mask is None:
+                mask = [True] * (self.indim * self.outdim)
+            mask = asarray(mask, dtype=bool).reshape(self.outdim, self.indim)
+            indices = list(mask.nonzero()[1])
+            indptr = [0] + list(mask.sum(axis=1).cumsum())
+        self.setArgs(indices=[int(i) for i in indices],
+                     indptr=[int(i) for i in indptr])
+        assert len(self.indptr) == self.outdim + 1, \
+            "The CSR structure does not match the output dimension."
+        self._columns = array(self.indices, dtype=int32)
+        self._rows = repeat(arange(self.outdim, dtype=int32),
+                            diff(self.indptr))
+        self._matrix = None
+        ParameterContainer.__init__(self, len(self.indices))
+        if not self.paramdim:
+            # Containers without parameters get no arrays allocated.
+            self._params = zeros(0, self.dtype)
+            self._derivs = zeros(0, self.dtype)
+
+    @staticmethod
+    def fromFullConnection(c, mask=None):
+        """Return a SparseConnection between the same modules and buffer slices
+        as the FullConnection `c`, that keeps the weights of `c` where `mask`
+        is true. By default, the weights that are not zero are kept."""
+        weights = c.params
+        if mask is None:
+            mask = weights != 0
+        mask = asarray(mask, dtype=bool)
+        sparse = SparseConnection(c.inmod, c.outmod, mask, c.name,
+                                  c.inSliceFrom, c.inSliceTo,
+                                  c.outSliceFrom, c.outSliceTo)
+        sparse.params[:] = weights[flatnonzero(mask)]
+        return sparse
+
+    def _csr(self):
+        """Return the weight matrix in CSR format. Its values are the 
+        parameters themselves, so it only needs to be rebuilt if they are 
+        reallocated."""
+        if self._matrix is None or self._matrix.data is not self.params:
+            self._matrix = csr_matrix(
+                (self.params, self._columns, array(self.indptr, dtype=int32)),
+                shape=(self.outdim, self.indim))
+            # The constructor may copy the values.
+            self._matrix.data = self.params
+        return self._matrix
+
+    def _forwardImplementation(self, inbuf, outbuf):
+        outbuf += self._csr().dot(inbuf)
+
+    def _backwardImplementation(self, outerr, inerr, inbuf):
+        inerr += self._csr().T.dot(outerr)
+        ds = self.derivs
+        ds += outerr[self._rows] * inbuf[self._columns]
+
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        outbuf += self._csr().dot(inbuf.T).T
+
+    def _backwardBatchImplementation(self, outerr, inerr, inbuf):
+        inerr += self._csr().T.dot(outerr.T).T
+        ds = self.derivs
+        ds += (outerr[:, self._rows] * inbuf[:, self._columns]).sum(axis=0)
+
+    def __getstate__(self):
+        # The CSR matrix shares the parameters, so it is rebuilt from them.
+        state = self.__dict__.copy()
+        state['_matrix'] = None
+        return state
+
+    def whichBuffers(self, paramIndex):
+        """Return the index of the input module's output buffer and
+        the output module's input buffer for the given weight."""
+        return self._columns[paramIndex], self._rows[paramIndex]
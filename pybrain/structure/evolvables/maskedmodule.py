@@ -28,6 +28,12 @@ class MaskedModule(MaskedParameters, Module):
     def activateOnDataset(self, *args, **kwargs):
         return self.pcontainer.activateOnDataset(*args, **kwargs)
     
+    def sparseModule(self):
+        """ return a copy of the wrapped network, in which the full connections 
+        are replaced by sparse ones that only contain the enabled parameters. """
+        from pybrain.tools.sparsity import sparsifyNetwork
+        return sparsifyNetwork(self.pcontainer, self.mask)
+    
     
     
     
@@ -0,0 +1,109 @@
+"""Module that contains the ExecutionContext class."""
+
+import copy
+
+from pybrain.structure.parametercontainer import ParameterContainer
+from pybrain.structure.networks.network import Network
+
+
+class ExecutionContext(object):
+    """The buffers and the state of a module for one of several callers that
+    share the module's parameters.
+
+    A module keeps everything that it computes in its buffers, so activating
+    one module from several threads at once mixes up their values. A context
+    holds a copy of the module's structure with buffers of its own, while the
+    parameters stay views on those of the module. Every caller gets its own
+    context and passes it to `.activate()`:
+
+        ctx = ExecutionContext(net)
+        net.activate(x, ctx=ctx)
+
+    Contexts of different threads can be used at the same time without any
+    locking, as long as each of them is only used by one thread at a time.
+    Changes of the module's parameters, in place or by ._setParameters(), are
+    seen by all contexts. Changes of the module's structure are not: contexts
+    have to be created after the module has been built.
+
+    Recurrent networks keep their time steps in the context, so the state of
+    every caller is kept separately and reset by .reset() of the context."""
+
+    def __init__(self, module, inferenceOnly=True):
+        """
+            :key inferenceOnly: allocate neither error buffers nor derivatives
+                for the context. Contexts that are not inference only can be
+                used for backward passes and accumulate derivatives of their
+                own."""
+        self.source = module
+        # The parameters of all containers are put into the memo, so that the
+        # copy of the module works on the same arrays.
+        memo = {}
+        for pc in _containers(module):
+            memo[id(pc.params)] = pc.params
+        self.module = copy.deepcopy(module, memo)
+        self._share()
+        if self.module.paramdim > 0 and self.module.hasDerivatives:
+            # The derivatives have been copied one container after another.
+            self.module._setDerivatives(self.module.derivs, self.module.owner)
+        if inferenceOnly and not module.inferenceOnly:
+            _setInferenceOnly(self.module)
+        self.module.reset()
+
+    def _share(self):
+        """Make the parameters of the context views on those of the module."""
+        if self.module.paramdim > 0:
+            self.module._setParameters(self.source.params, self.module.owner)
+
+    def _update(self):
+        # Optimizers replace the parameter array of the module.
+        if (self.module.paramdim > 0 and
+            self.module.params is not self.source.params):
+            self._share()
+
+    def activate(self, inpt, out=None):
+        """Do one transformation of an input with the buffers of the context
+        and return the result, or write it into the array `out`."""
+        self._update()
+        return self.module.activate(inpt, out)
+
+    def activateBatch(self, inpt, out=None):
+        """Transform a matrix of inputs, one sample per row, with the buffers
+        of the context and return the matrix of outputs."""
+        self._update()
+        return self.module.activateBatch(inpt, out)
+
+    def backActivate(self, outerr):
+        """Backpropagate an output error through the last activation of the
+        context and return the error on the input."""
+        self._update()
+        return self.module.backActivate(outerr)
+
+    @property
+    def derivs(self):
+        """The derivatives that have been accumulated in the context."""
+        return self.module.derivs
+
+    def reset(self):
+        """Clear the buffers and the time steps of the context."""
+        self.module.reset()
+
+
+def _containers(module):
+    """Return all parameter containers of a module, including itself."""
+    if not isinstance(module, ParameterContainer) or module.paramdim == 0:
+        return []
+    result = [module]
+    if isinstance(module, Network):
+        for pc in module._containerIterator():
+            result.extend(_containers(pc))
+    return result
+
+
+def _setInferenceOnly(module):
+    if isinstance(module, Network):
+        module.setInferenceOnly()
+        return
+    module.inferenceOnly = True
+    module._resetBuffers()
+    if isinstance(module, ParameterContainer) and module.paramdim > 0:
+        module._dropDerivatives()
@@ -13,4 +13,9 @@ class BiasUnit(NeuronLayer):
         Module.__init__(self, 0, 1, name = name)
         
     def _forwardImplementation(self, inbuf, outbuf):
-        outbuf[:] = 1    
\ No newline at end of file
+        outbuf[:] = 1
+        
+    _forwardBatchImplementation = _forwardImplementation
+    
+    def _backwardBatchImplementation(self, outerr, inerr, outbuf, inbuf):
+        pass
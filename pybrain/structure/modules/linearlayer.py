@@ -10,4 +10,8 @@ class LinearLayer(NeuronLayer):
         outbuf[:] = inbuf
     
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
-        inerr[:] = outerr
\ No newline at end of file
+        inerr[:] = outerr
+        
+    # The transformation is elementwise, so it works on matrices unchanged.
+    _forwardBatchImplementation = _forwardImplementation
+    _backwardBatchImplementation = _backwardImplementation
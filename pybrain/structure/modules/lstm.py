@@ -1,6 +1,6 @@
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import tanh
+from scipy import tanh, zeros
 
 from neuronlayer import NeuronLayer
 from module import Module
@@ -60,6 +60,10 @@ class LSTMLayer(NeuronLayer, ParameterContainer):
             self._setDerivatives(self.derivs)
                     
         
+    def _shiftBuffers(self, steps):
+        Module._shiftBuffers(self, steps)
+        self.maxoffset = max(self.maxoffset - steps, 0)
+        
     def _setParameters(self, p, owner = None):
         ParameterContainer._setParameters(self, p, owner)
         dim = self.outdim
@@ -73,6 +77,12 @@ class LSTMLayer(NeuronLayer, ParameterContainer):
         self.ingatePeepDerivs = self.derivs[:dim]
         self.forgetgatePeepDerivs = self.derivs[dim:dim*2]
         self.outgatePeepDerivs = self.derivs[dim*2:]
+        
+    def _dropDerivatives(self):
+        ParameterContainer._dropDerivatives(self)
+        self.ingatePeepDerivs = None
+        self.forgetgatePeepDerivs = None
+        self.outgatePeepDerivs = None
 
 
     def _isLastTimestep(self):
@@ -142,6 +152,185 @@ class LSTMLayer(NeuronLayer, ParameterContainer):
         inerr[dim*2:dim*3] = cellError
         inerr[dim*3:] = self.outgateError[self.offset]
         
+    def _blocks(self, buf, length, width):
+        """Return a view on the first `length` time steps of a buffer as an
+        array of shape (length, width, dim)."""
+        return buf[:length * width].reshape(length, width, buf.shape[1])
+        
+    def forwardSequence(self, length, recurrentConns=(), width=1):
+        """Run the forward pass over the first `length` time steps at once. 
+        
+        The gate activations are computed for the whole sequence in one go,
+        only the cell state recurrence (and the peepholes, which depend on it)
+        is done step by step. If the layer feeds back into itself, its inputs
+        depend on its previous outputs and it has to be stepped through 
+        time."""
+        if recurrentConns:
+            return Module.forwardSequence(self, length, recurrentConns, width)
+        self.maxoffset = max(length, self.maxoffset)
+        dim = self.outdim
+        blocks = lambda buf: self._blocks(buf, length, width)
+        inbuf = blocks(self.inputbuffer)
+        ingatex = blocks(self.ingatex)
+        forgetgatex = blocks(self.forgetgatex)
+        outgatex = blocks(self.outgatex)
+        ingate = blocks(self.ingate)
+        forgetgate = blocks(self.forgetgate)
+        outgate = blocks(self.outgate)
+        state = blocks(self.state)
+        
+        ingatex[:] = inbuf[..., :dim]
+        forgetgatex[:] = inbuf[..., dim:dim*2]
+        cellin = self.g(inbuf[..., dim*2:dim*3])
+        outgatex[:] = inbuf[..., dim*3:]
+        
+        if not self.peepholes:
+            ingate[:] = self.f(ingatex)
+            forgetgate[:] = self.f(forgetgatex)
+            state[:] = ingate * cellin
+            for t in xrange(1, length):
+                state[t] += forgetgate[t] * state[t-1]
+        else:
+            f = self.f
+            ingatePeep = self.ingatePeepWeights
+            forgetgatePeep = self.forgetgatePeepWeights
+            for t in xrange(length):
+                if t > 0:
+                    ingatex[t] += ingatePeep * state[t-1]
+                    forgetgatex[t] += forgetgatePeep * state[t-1]
+                ingate[t] = f(ingatex[t])
+                forgetgate[t] = f(forgetgatex[t])
+                state[t] = ingate[t] * cellin[t]
+                if t > 0:
+                    state[t] += forgetgate[t] * state[t-1]
+            outgatex += self.outgatePeepWeights * state
+        outgate[:] = self.f(outgatex)
+        blocks(self.outputbuffer)[:] = outgate * self.h(state)
+        
+    def backwardSequence(self, length, recurrentConns=(), width=1):
+        """Run the backward pass over the first `length` time steps at once.
+        
+        The buffers need to have at least one time step beyond the sequence, 
+        which is treated as the (empty) future."""
+        if recurrentConns:
+            return Module.backwardSequence(self, length, recurrentConns, width)
+        dim = self.outdim
+        blocks = lambda buf: self._blocks(buf, length, width)
+        outerr = blocks(self.outputerror)
+        cellx = blocks(self.inputbuffer)[..., dim*2:dim*3]
+        state = blocks(self.state)
+        prevstate = zeros(state.shape, state.dtype)
+        prevstate[1:] = state[:-1]
+        # The error buffers include the future time step.
+        stateError = self._blocks(self.stateError, length + 1, width)
+        ingateError = self._blocks(self.ingateError, length + 1, width)
+        forgetgateError = self._blocks(self.forgetgateError, length + 1, width)
+        forgetgate = self._blocks(self.forgetgate, length + 1, width)
+        outgateError = blocks(self.outgateError)
+        
+        outgateError[:] = self.fprime(blocks(self.outgatex)) * outerr * self.h(state)
+        localError = outerr * blocks(self.outgate) * self.hprime(state)
+        if self.peepholes:
+            localError += outgateError * self.outgatePeepWeights
+        # Factors that turn the state error into the gate errors.
+        ingateFactor = self.fprime(blocks(self.ingatex)) * self.g(cellx)
+        forgetgateFactor = self.fprime(blocks(self.forgetgatex)) * prevstate
+        
+        if not self.peepholes:
+            for t in reversed(xrange(length)):
+                stateError[t] = localError[t] + stateError[t+1] * forgetgate[t+1]
+            ingateError[:length] = ingateFactor * stateError[:length]
+            forgetgateError[:length] = forgetgateFactor * stateError[:length]
+        else:
+            ingatePeep = self.ingatePeepWeights
+            forgetgatePeep = self.forgetgatePeepWeights
+            for t in reversed(xrange(length)):
+                stateError[t] = (localError[t] 
+                                 + stateError[t+1] * forgetgate[t+1]
+                                 + ingateError[t+1] * ingatePeep
+                                 + forgetgateError[t+1] * forgetgatePeep)
+                ingateError[t] = ingateFactor[t] * stateError[t]
+                forgetgateError[t] = forgetgateFactor[t] * stateError[t]
+            total = lambda x: x.reshape(-1, dim).sum(axis=0)
+            self.outgatePeepDerivs += total(outgateError * state)
+            self.ingatePeepDerivs += total(ingateError[:length] * prevstate)
+            self.forgetgatePeepDerivs += total(forgetgateError[:length] * prevstate)
+        
+        inerr = blocks(self.inputerror)
+        inerr[..., :dim] = ingateError[:length]
+        inerr[..., dim:dim*2] = forgetgateError[:length]
+        inerr[..., dim*2:dim*3] = blocks(self.ingate) * self.gprime(cellx) * stateError[:length]
+        inerr[..., dim*3:] = outgateError
+        
+    def forwardStep(self, t, width=1):
+        """Produce the output of time step `t` of `width` sequences that are 
+        processed in lockstep."""
+        self.maxoffset = max(t + 1, self.maxoffset)
+        dim = self.outdim
+        rows = slice(t * width, (t + 1) * width)
+        inbuf = self.inputbuffer[rows]
+        ingatex = self.ingatex[rows]
+        forgetgatex = self.forgetgatex[rows]
+        outgatex = self.outgatex[rows]
+        state = self.state[rows]
+        
+        ingatex[:] = inbuf[:, :dim]
+        forgetgatex[:] = inbuf[:, dim:dim*2]
+        outgatex[:] = inbuf[:, dim*3:]
+        if t > 0:
+            prevstate = self.state[(t - 1) * width:t * width]
+            if self.peepholes:
+                ingatex += self.ingatePeepWeights * prevstate
+                forgetgatex += self.forgetgatePeepWeights * prevstate
+        self.ingate[rows] = self.f(ingatex)
+        self.forgetgate[rows] = self.f(forgetgatex)
+        state[:] = self.ingate[rows] * self.g(inbuf[:, dim*2:dim*3])
+        if t > 0:
+            state += self.forgetgate[rows] * prevstate
+        if self.peepholes:
+            outgatex += self.outgatePeepWeights * state
+        self.outgate[rows] = self.f(outgatex)
+        self.outputbuffer[rows] = self.outgate[rows] * self.h(state)
+        
+    def backwardStep(self, t, width=1):
+        """Produce the input error of time step `t` of `width` sequences that 
+        are processed in lockstep. The time step after the last one has to be
+        present in the buffers, with zero errors."""
+        dim = self.outdim
+        rows = slice(t * width, (t + 1) * width)
+        nextrows = slice((t + 1) * width, (t + 2) * width)
+        outerr = self.outputerror[rows]
+        cellx = self.inputbuffer[rows, dim*2:dim*3]
+        state = self.state[rows]
+        stateError = self.stateError[rows]
+        outgateError = self.outgateError[rows]
+        
+        outgateError[:] = self.fprime(self.outgatex[rows]) * outerr * self.h(state)
+        stateError[:] = outerr * self.outgate[rows] * self.hprime(state)
+        stateError += self.stateError[nextrows] * self.forgetgate[nextrows]
+        if self.peepholes:
+            stateError += outgateError * self.outgatePeepWeights
+            stateError += self.ingateError[nextrows] * self.ingatePeepWeights
+            stateError += self.forgetgateError[nextrows] * self.forgetgatePeepWeights
+        self.ingateError[rows] = self.fprime(self.ingatex[rows]) * self.g(cellx) * stateError
+        if t > 0:
+            prevstate = self.state[(t - 1) * width:t * width]
+            self.forgetgateError[rows] = self.fprime(self.forgetgatex[rows]) * prevstate * stateError
+        else:
+            self.forgetgateError[rows] = 0
+            
+        if self.peepholes:
+            self.outgatePeepDerivs += (outgateError * state).sum(axis=0)
+            if t > 0:
+                self.ingatePeepDerivs += (self.ingateError[rows] * prevstate).sum(axis=0)
+                self.forgetgatePeepDerivs += (self.forgetgateError[rows] * prevstate).sum(axis=0)
+                
+        inerr = self.inputerror[rows]
+        inerr[:, :dim] = self.ingateError[rows]
+        inerr[:, dim:dim*2] = self.forgetgateError[rows]
+        inerr[:, dim*2:dim*3] = self.ingate[rows] * self.gprime(cellx) * stateError
+        inerr[:, dim*3:] = outgateError
+        
     def whichNeuron(self, inputIndex = None, outputIndex = None):
         if inputIndex != None:
             return inputIndex % self.dim
@@ -69,6 +69,10 @@ class MDLSTMLayer(NeuronLayer, ParameterContainer):
             self._setParameters(self.params)
             self._setDerivatives(self.derivs)        
  
+    def _shiftBuffers(self, steps):
+        Module._shiftBuffers(self, steps)
+        self.maxoffset = max(self.maxoffset - steps, 0)
+        
     def _setParameters(self, p, owner=None):
         ParameterContainer._setParameters(self, p, owner)
         size = self.dim
@@ -83,7 +87,13 @@ class MDLSTMLayer(NeuronLayer, ParameterContainer):
         self.forgetgatePeepDerivs = \
             self.derivs[size:size * (1 + self.dimensions)]
         self.outgatePeepDerivs = \
-            self.derivs[size * (1 + self.dimensions):]        
+            self.derivs[size * (1 + self.dimensions):]
+        
+    def _dropDerivatives(self):
+        ParameterContainer._dropDerivatives(self)
+        self.ingatePeepDerivs = None
+        self.forgetgatePeepDerivs = None
+        self.outgatePeepDerivs = None
                 
     def _forwardImplementation(self, inbuf, outbuf):
         self.maxoffset = max(self.offset + 1, self.maxoffset)
@@ -157,6 +167,144 @@ class MDLSTMLayer(NeuronLayer, ParameterContainer):
         inerr[size*(2+self.dimensions):size*(3+self.dimensions)] = self.outgateError[self.offset]
         inerr[size * (3 + self.dimensions):] = instateErrors
             
+    def _forwardRows(self, rows):
+        """Like _forwardImplementation, but for all the buffer rows in the 
+        slice `rows` at once."""
+        self.maxoffset = max(rows.stop, self.maxoffset)
+        self._forwardArrays(self.inputbuffer[rows], self.outputbuffer[rows],
+                            self._internalRows(rows))
+        
+    def _backwardRows(self, rows):
+        """Like _backwardImplementation, but for all the buffer rows in the 
+        slice `rows` at once."""
+        self._backwardArrays(self.outputerror[rows], self.inputerror[rows],
+                             self.inputbuffer[rows], self._internalRows(rows))
+        
+    def _internalRows(self, rows):
+        """Return a dictionary with the rows `rows` of all internal buffers."""
+        return dict((name, getattr(self, name)[rows]) 
+                    for name in self._internalBuffers())
+    
+    def _internalBuffers(self):
+        return [name for name, _ in self._allocatedBuffers()
+                if name not in ('inputbuffer', 'inputerror', 
+                                'outputbuffer', 'outputerror')]
+        
+    def _resetBatchBuffers(self, length):
+        Module._resetBatchBuffers(self, length)
+        # The internal values of every sample of a batch have to be kept for 
+        # the backward pass.
+        self.internalbatch = dict(
+            (name, zeros((length, dim), self.dtype)) 
+            for name, dim in self._allocatedBuffers() 
+            if name in self._internalBuffers())
+        
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        self._forwardArrays(inbuf, outbuf, self.internalbatch)
+        
+    def _backwardBatchImplementation(self, outerr, inerr, outbuf, inbuf):
+        self._backwardArrays(outerr, inerr, inbuf, self.internalbatch)
+        
+    def _forwardArrays(self, inbuf, outbuf, internal):
+        """Forward pass over all rows of `inbuf`, writing the internal values
+        into the dictionary of arrays `internal`."""
+        size = self.dim
+        dims = self.dimensions
+        ingatex = internal['ingatex']
+        forgetgatex = internal['forgetgatex']
+        outgatex = internal['outgatex']
+        forgetgate = internal['forgetgate']
+        state = internal['state']
+        ingatex[:] = inbuf[:, :size]
+        forgetgatex[:] = inbuf[:, size:size*(1+dims)]
+        cellx = inbuf[:, size*(1+dims):size*(2+dims)]
+        outgatex[:] = inbuf[:, size*(2+dims):size*(3+dims)]
+        laststates = inbuf[:, size*(3+dims):]
+        
+        if self.peepholes:
+            for i in range(dims):
+                ingatex += self.ingatePeepWeights * laststates[:, size*i:size*(i+1)]
+            forgetgatex += self.forgetgatePeepWeights * laststates
+            
+        internal['ingate'][:] = self.f(ingatex)
+        forgetgate[:] = self.f(forgetgatex)
+        
+        state[:] = internal['ingate'] * self.g(cellx)
+        for i in range(dims):
+            state += forgetgate[:, size*i:size*(i+1)] * laststates[:, size*i:size*(i+1)]
+        
+        if self.peepholes:
+            outgatex += self.outgatePeepWeights * state
+        internal['outgate'][:] = self.f(outgatex)
+        
+        outbuf[:, :size] = internal['outgate'] * self.h(state)
+        outbuf[:, size:] = state
+        
+    def _backwardArrays(self, outerr2, inerr, inbuf, internal):
+        """Backward pass over all rows, using the internal values of the
+        forward pass in the dictionary of arrays `internal`."""
+        size = self.dim
+        dims = self.dimensions
+        cellx = inbuf[:, size*(1+dims):size*(2+dims)]
+        laststates = inbuf[:, size*(3+dims):]
+        outerr = outerr2[:, :size]
+        nextstateerr = outerr2[:, size:]
+        state = internal['state']
+        stateError = internal['stateError']
+        outgateError = internal['outgateError']
+        ingateError = internal['ingateError']
+        forgetgateError = internal['forgetgateError']
+        forgetgate = internal['forgetgate']
+        
+        outgateError[:] = self.fprime(internal['outgatex']) * outerr * self.h(state)
+        stateError[:] = outerr * internal['outgate'] * self.hprime(state)
+        stateError += nextstateerr
+        if self.peepholes:
+            stateError += outgateError * self.outgatePeepWeights
+        cellError = internal['ingate'] * self.gprime(cellx) * stateError
+        for i in range(dims):
+            forgetgateError[:, size*i:size*(i+1)] = (
+                self.fprime(internal['forgetgatex'][:, size*i:size*(i+1)]) 
+                * stateError * laststates[:, size*i:size*(i+1)])
+        ingateError[:] = self.fprime(internal['ingatex']) * stateError * self.g(cellx)
+        
+        if self.peepholes:
+            self.outgatePeepDerivs += (outgateError * state).sum(axis=0)
+            for i in range(dims):
+                self.ingatePeepDerivs += (ingateError * laststates[:, size*i:size*(i+1)]).sum(axis=0)
+                self.forgetgatePeepDerivs[size*i:size*(i+1)] += \
+                    (forgetgateError[:, size*i:size*(i+1)] * laststates[:, size*i:size*(i+1)]).sum(axis=0)
+        
+        inerr[:, :size] = ingateError
+        inerr[:, size:size*(1+dims)] = forgetgateError
+        inerr[:, size*(1+dims):size*(2+dims)] = cellError
+        inerr[:, size*(2+dims):size*(3+dims)] = outgateError
+        for i in range(dims):
+            instateErrors = inerr[:, size*(3+dims+i):size*(4+dims+i)]
+            instateErrors[:] = stateError * forgetgate[:, size*i:size*(i+1)]
+            if self.peepholes:
+                instateErrors += ingateError * self.ingatePeepWeights
+                instateErrors += forgetgateError[:, size*i:size*(i+1)] * \
+                                 self.forgetgatePeepWeights[size*i:size*(i+1)]
+                
+    def forwardSequence(self, length, recurrentConns=(), width=1):
+        # The internal buffers are indexed by time step, so the rows cannot be
+        # handed to the batch implementation.
+        if recurrentConns:
+            return Module.forwardSequence(self, length, recurrentConns, width)
+        self._forwardRows(slice(0, length * width))
+        
+    def backwardSequence(self, length, recurrentConns=(), width=1):
+        if recurrentConns:
+            return Module.backwardSequence(self, length, recurrentConns, width)
+        self._backwardRows(slice(0, length * width))
+        
+    def forwardStep(self, t, width=1):
+        self._forwardRows(slice(t * width, (t + 1) * width))
+        
+    def backwardStep(self, t, width=1):
+        self._backwardRows(slice(t * width, (t + 1) * width))
+        
     def meatSlice(self):
         """Return a moduleslice that wraps the meat part of the layer."""
         return ModuleSlice(self, 
@@ -1,6 +1,6 @@
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import zeros
+from scipy import zeros, asarray, float64
 
 from pybrain.utilities import abstractMethod, Named
 
@@ -20,6 +20,13 @@ class Module(Named):
     # independent.
     sequential = False
     
+    # Type of the values in the buffers.
+    dtype = float64
+    
+    # Flag that marks modules which are only activated, never backpropagated
+    # through: they allocate neither error buffers nor derivatives.
+    inferenceOnly = False
+    
     # Flag which at the same time provides info on how many trainable parameters
     # the module might contain.
     paramdim = 0
@@ -30,6 +37,12 @@ class Module(Named):
     
     bufferlist = None
     
+    # Buffers used by the minibatch path, one sample per row.
+    batchbufferlist = [('inputbatch', 'indim'),
+                       ('inputerrorbatch', 'indim'),
+                       ('outputbatch', 'outdim'),
+                       ('outputerrorbatch', 'outdim'), ]
+    
     def __init__(self, indim, outdim, name=None, **args):
         """Create a Module with an input dimension of indim and an output 
         dimension of outdim."""
@@ -37,8 +50,6 @@ class Module(Named):
         
         # Make sure that it does not matter wether Module.__init__ is called
         # before or after adding elements to bufferlist in subclasses.
-        # TODO: it should be possible to use less than these buffers. For some
-        # methods, an error is not completely necessary. (e.g. evolution)
         self.bufferlist = [] if not self.bufferlist else self.bufferlist
         self.bufferlist += [('inputbuffer', indim),
                             ('inputerror', indim),
@@ -53,19 +64,70 @@ class Module(Named):
     def _resetBuffers(self, length=1):
         """Reset buffers to a length (in time dimension) of 1."""
         for buffername, dim in self.bufferlist:
-            setattr(self, buffername, zeros((length, dim)))
+            if self.inferenceOnly and _isErrorBuffer(buffername):
+                setattr(self, buffername, None)
+            else:
+                setattr(self, buffername, zeros((length, dim), self.dtype))
+                
+    def _allocatedBuffers(self):
+        """Return the (name, dimension) pairs of the buffers that are 
+        allocated."""
+        if self.inferenceOnly:
+            return [(n, dim) for n, dim in self.bufferlist 
+                    if not _isErrorBuffer(n)]
+        return self.bufferlist
         
-    def _growBuffers(self):
-        """Double the size of the modules buffers in its first dimension and 
-        keep the current values."""
+    def _growBuffers(self, length=None):
+        """Grow the modules buffers to `length` in their first dimension (by 
+        default, double their size) and keep the current values. If `length` 
+        is smaller than the current size, the buffers are shrunk and only their
+        first `length` time steps are kept."""
         currentlength = getattr(self, self.bufferlist[0][0]).shape[0]
+        if length is None:
+            length = currentlength * 2
         # Save the current buffers
-        tmp = [getattr(self, n) for n, _ in self.bufferlist]
-        Module._resetBuffers(self, currentlength * 2)
+        buffers = self._allocatedBuffers()
+        tmp = [getattr(self, n) for n, _ in buffers]
+        Module._resetBuffers(self, length)
 
-        for previous, (buffername, _dim) in zip(tmp, self.bufferlist):
+        for previous, (buffername, _dim) in zip(tmp, buffers):
             buffer_ = getattr(self, buffername)
-            buffer_[:currentlength] = previous
+            buffer_[:currentlength] = previous[:length]
+            
+    def _shiftBuffers(self, steps):
+        """Drop the first `steps` time steps from the buffers by moving the 
+        later ones to the front. The buffers are changed in place, without 
+        temporary copies: the time steps are moved in blocks of `steps`, which
+        do not overlap with their destination."""
+        for buffername, _dim in self._allocatedBuffers():
+            buffer_ = getattr(self, buffername)
+            length = buffer_.shape[0]
+            for start in xrange(0, length - steps, steps):
+                stop = min(start + steps, length - steps)
+                buffer_[start:stop] = buffer_[start + steps:stop + steps]
+            buffer_[-steps:] = 0
+            
+    def _resetErrors(self, rows):
+        """Set the errors of the time steps given by the slice `rows` to zero, 
+        so that they can be backpropagated through once more."""
+        if self.inferenceOnly:
+            return
+        self.inputerror[rows] = 0
+        self.outputerror[rows] = 0
+            
+    def _resetBatchBuffers(self, length):
+        """Provide zeroed batch buffers of `length` rows. Existing buffers of the
+        right size and type are reused."""
+        for buffername, dimname in self.batchbufferlist:
+            if self.inferenceOnly and _isErrorBuffer(buffername):
+                setattr(self, buffername, None)
+                continue
+            shape = length, getattr(self, dimname)
+            buf = getattr(self, buffername, None)
+            if buf is None or buf.shape != shape or buf.dtype != self.dtype:
+                setattr(self, buffername, zeros(shape, self.dtype))
+            else:
+                buf[:] = 0
             
     def forward(self):
         """Produce the output from the input."""
@@ -79,10 +141,93 @@ class Module(Named):
                                      self.outputbuffer[self.offset],
                                      self.inputbuffer[self.offset])        
         
+    def forwardBatch(self):
+        """Produce the output batch from the input batch."""
+        self._forwardBatchImplementation(self.inputbatch, self.outputbatch)
+        
+    def backwardBatch(self):
+        """Produce the input error batch from the output error batch."""
+        self._backwardBatchImplementation(self.outputerrorbatch,
+                                          self.inputerrorbatch,
+                                          self.outputbatch,
+                                          self.inputbatch)
+        
+    def forwardSequence(self, length, recurrentConns=(), width=1):
+        """Run the forward pass over the first `length` time steps of the 
+        buffers. `recurrentConns` are connections from the module to itself,
+        which are applied from each time step to the next.
+        
+        If `width` is bigger than one, that many sequences are processed in 
+        lockstep: the buffers then hold the time steps one after the other, 
+        each as a block of `width` rows.
+        
+        Modules that are not sequential and do not feed back into themselves 
+        process all steps at once."""
+        if self.sequential or recurrentConns:
+            for t in xrange(length):
+                if t > 0:
+                    for c in recurrentConns:
+                        c.forwardRows(slice((t - 1) * width, t * width), 
+                                      slice(t * width, (t + 1) * width))
+                self.forwardStep(t, width)
+        else:
+            rows = length * width
+            self._forwardBatchImplementation(self.inputbuffer[:rows],
+                                             self.outputbuffer[:rows])
+            
+    def backwardSequence(self, length, recurrentConns=(), width=1):
+        """Run the backward pass over the first `length` time steps of the 
+        buffers, in reverse order."""
+        if self.sequential or recurrentConns:
+            for t in reversed(xrange(length)):
+                if t < length - 1:
+                    for c in recurrentConns:
+                        c.backwardRows(slice(t * width, (t + 1) * width), 
+                                       slice((t + 1) * width, (t + 2) * width))
+                self.backwardStep(t, width)
+        else:
+            rows = length * width
+            self._backwardBatchImplementation(self.outputerror[:rows],
+                                              self.inputerror[:rows],
+                                              self.outputbuffer[:rows],
+                                              self.inputbuffer[:rows])
+            
+    def forwardStep(self, t, width=1):
+        """Produce the output of time step `t` of `width` sequences that are 
+        processed in lockstep."""
+        if width == 1:
+            self.offset = t
+            self.forward()
+        elif self.sequential:
+            raise NotImplementedError(
+                "%s cannot process several sequences in lockstep." 
+                % self.__class__.__name__)
+        else:
+            rows = slice(t * width, (t + 1) * width)
+            self._forwardBatchImplementation(self.inputbuffer[rows],
+                                             self.outputbuffer[rows])
+            
+    def backwardStep(self, t, width=1):
+        """Produce the input error of time step `t` of `width` sequences that 
+        are processed in lockstep."""
+        if width == 1:
+            self.offset = t
+            self.backward()
+        elif self.sequential:
+            raise NotImplementedError(
+                "%s cannot process several sequences in lockstep." 
+                % self.__class__.__name__)
+        else:
+            rows = slice(t * width, (t + 1) * width)
+            self._backwardBatchImplementation(self.outputerror[rows],
+                                              self.inputerror[rows],
+                                              self.outputbuffer[rows],
+                                              self.inputbuffer[rows])
+        
     def reset(self):
         """Set all buffers, past and present, to zero."""
         self.offset = 0
-        for buffername, l  in self.bufferlist:
+        for buffername, l  in self._allocatedBuffers():
             buf = getattr(self, buffername)
             buf[:] = zeros(l)
         
@@ -91,27 +236,75 @@ class Module(Named):
         and return the output."""        
         dataset.reset()
         self.reset()
-        out = zeros((len(dataset), self.outdim))
+        out = zeros((len(dataset), self.outdim), self.dtype)
         for i, sample in enumerate(dataset):
             # FIXME: Can we always assume that sample[0] is the input data?
-            out[i, :] = self.activate(sample[0])
+            self.activate(sample[0], out[i])
         self.reset()
         dataset.reset()
         return out
         
-    def activate(self, inpt):
-        """Do one transformation of an input and return the result."""
+    def activate(self, inpt, out=None, ctx=None):
+        """Do one transformation of an input and return the result. 
+        
+        If an array `out` is given, the result is written into it instead of a 
+        newly allocated array, and `out` is returned. If an ExecutionContext 
+        `ctx` of the module is given, its buffers are used instead of the 
+        module's own ones."""
+        if ctx is not None:
+            return _activateInContext(self, ctx, inpt, out)
         assert len(self.inputbuffer[self.offset]) == len(inpt), str((len(self.inputbuffer[self.offset]), len(inpt))) 
         self.inputbuffer[self.offset] = inpt
         self.forward()
-        return self.outputbuffer[self.offset].copy()
+        return _provideResult(self.outputbuffer[self.offset], out)
     
     def backActivate(self, outerr):
         """Do one transformation of an output error outerr backward and return 
         the error on the input."""
+        assert not self.inferenceOnly, "Inference only modules have no errors."
         self.outputerror[self.offset] = outerr
         self.backward()
         return self.inputerror[self.offset].copy()
+    
+    def activateBatch(self, inpt, out=None):
+        """Transform a matrix of inputs, one sample per row, and return the 
+        matrix of outputs. 
+        
+        The result is the same as calling .activate() on every row, but 
+        modules can process the whole matrix at once. As with .activate(), the
+        result can be written into a given array `out`."""
+        assert not self.sequential, \
+            "Batch activation is only defined for non-sequential modules."
+        inpt = asarray(inpt)
+        assert inpt.ndim == 2 and inpt.shape[1] == self.indim, \
+            str((inpt.shape, self.indim))
+        self._resetBatchBuffers(inpt.shape[0])
+        self.inputbatch[:] = inpt
+        self.forwardBatch()
+        return _provideResult(self.outputbatch, out)
+    
+    def backActivateBatch(self, outerr):
+        """Transform a matrix of output errors backward, one sample per row, 
+        and return the matrix of input errors. Must follow a call to 
+        .activateBatch() on the corresponding inputs."""
+        assert not self.inferenceOnly, "Inference only modules have no errors."
+        self.outputerrorbatch[:] = outerr
+        self.backwardBatch()
+        return self.inputerrorbatch.copy()
+        
+    def activateSequence(self, inputs):
+        """Reset the module and transform a whole sequence of inputs, one time
+        step per row. Return the matrix of outputs."""
+        self.reset()
+        return asarray([self.activate(inpt) for inpt in inputs])
+    
+    def backActivateSequence(self, outerrs):
+        """Transform the output errors of the sequence that was last passed to
+        .activateSequence() backward through time. Return the matrix of input 
+        errors."""
+        inerrs = [self.backActivate(outerr) for outerr in reversed(outerrs)]
+        inerrs.reverse()
+        return asarray(inerrs)
         
     def _forwardImplementation(self, inbuf, outbuf):
         """Actual forward transformation function. To be overwritten in 
@@ -123,3 +316,36 @@ class Module(Named):
         in subclasses, does not have to.
         
         Should also compute the derivatives of the parameters."""
+        
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        """Forward transformation of a matrix of inputs, one sample per row. 
+        Falls back to the single-sample implementation; overwrite in 
+        subclasses that can process all rows at once."""
+        for i in xrange(inbuf.shape[0]):
+            self._forwardImplementation(inbuf[i], outbuf[i])
+            
+    def _backwardBatchImplementation(self, outerr, inerr, outbuf, inbuf):
+        """Converse of the batch transformation function. Falls back to the 
+        single-sample implementation."""
+        for i in xrange(outerr.shape[0]):
+            self._backwardImplementation(outerr[i], inerr[i], outbuf[i], inbuf[i])
+
+
+def _provideResult(result, out):
+    """Return a copy of the buffer contents `result`, or write them into the
+    array `out` if one is given."""
+    if out is None:
+        return result.copy()
+    out[...] = result
+    return out
+
+
+def _activateInContext(module, ctx, inpt, out):
+    assert ctx.source is module, "The context belongs to another module."
+    return ctx.activate(inpt, out)
+
+
+def _isErrorBuffer(buffername):
+    """Tell whether a buffer holds errors, which are only needed by the
+    backward pass."""
+    return 'error' in buffername.lower()
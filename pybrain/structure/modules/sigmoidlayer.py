@@ -13,3 +13,6 @@ class SigmoidLayer(NeuronLayer):
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         inerr[:] = outbuf * (1 - outbuf) * outerr
         
+    # The transformation is elementwise, so it works on matrices unchanged.
+    _forwardBatchImplementation = _forwardImplementation
+    _backwardBatchImplementation = _backwardImplementation
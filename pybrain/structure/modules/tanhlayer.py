@@ -13,3 +13,7 @@ class TanhLayer(NeuronLayer):
         
     def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
         inerr[:] = (1 - outbuf**2) * outerr
+        
+    # The transformation is elementwise, so it works on matrices unchanged.
+    _forwardBatchImplementation = _forwardImplementation
+    _backwardBatchImplementation = _backwardImplementation
@@ -5,3 +5,4 @@ from feedforward import FeedForwardNetwork
 from recurrent import RecurrentNetwork
 from network import Network
 from bidirectional import BidirectionalNetwork
+from compiled import CompiledFeedForwardNetwork, CompiledRecurrentNetwork
@@ -0,0 +1,346 @@
+"""Module that contains networks which are compiled into a flat execution plan.
+
+Instead of walking the module graph on every activation, looking up the
+connections of every module in a dictionary and resolving the buffers of every
+module and connection through attribute access, a compiled network flattens
+its structure into a list of steps. Every step holds its kernel together with
+the buffers and slices it works on. The plan is rebuilt lazily whenever the
+buffers or parameters of the network are reallocated.
+
+Optionally, layers are fused with their incoming full connections: a single
+step computes the input of the layer from all of them and applies the transfer
+function, and connections from a bias unit are folded in as bias vectors."""
+
+
+from scipy import dot, outer
+
+from pybrain.structure.modules.module import Module, _activateInContext
+from pybrain.structure.modules.biasunit import BiasUnit
+from pybrain.structure.networks.network import Network
+from pybrain.structure.networks.feedforward import FeedForwardNetwork
+from pybrain.structure.networks.recurrent import RecurrentNetwork
+from pybrain.structure.connections.full import FullConnection
+from pybrain.structure.connections.shared import SharedFullConnection
+
+
+def _isInstrumented(x):
+    """Tell whether the kernels of a module or connection have been replaced on
+    the object itself, e.g. by a profiler. Such objects get steps of their own
+    that call their kernels."""
+    return '_forwardImplementation' in x.__dict__
+
+
+def _moduleForwardStep(m):
+    kernel = m._forwardImplementation
+    inbuf, outbuf = m.inputbuffer, m.outputbuffer
+    def step(inoffset, outoffset):
+        kernel(inbuf[outoffset], outbuf[outoffset])
+    return step
+
+
+def _moduleBackwardStep(m):
+    kernel = m._backwardImplementation
+    inbuf, outbuf = m.inputbuffer, m.outputbuffer
+    inerr, outerr = m.inputerror, m.outputerror
+    def step(inoffset, offset):
+        m.offset = offset
+        kernel(outerr[offset], inerr[offset], outbuf[offset], inbuf[offset])
+    return step
+
+
+def _connectionBuffers(c):
+    """Return the buffers and slices a connection works on."""
+    insl = slice(c.inSliceFrom, c.inSliceTo)
+    outsl = slice(c.outSliceFrom, c.outSliceTo)
+    return (c.inmod.outputbuffer, c.inmod.outputerror, insl,
+            c.outmod.inputbuffer, c.outmod.inputerror, outsl)
+
+
+def _connectionForwardStep(c):
+    inbuf, _, insl, outbuf, _, outsl = _connectionBuffers(c)
+    if (type(c) in (FullConnection, SharedFullConnection) 
+        and not _isInstrumented(c)):
+        # The weight matrix is a view on the parameters, so it only needs to be
+        # created once.
+        weights = c.params.reshape(c.outdim, c.indim)
+        def step(inoffset, outoffset):
+            outbuf[outoffset, outsl] += dot(weights, inbuf[inoffset, insl])
+    else:
+        kernel = c._forwardImplementation
+        def step(inoffset, outoffset):
+            kernel(inbuf[inoffset, insl], outbuf[outoffset, outsl])
+    return step
+
+
+def _connectionBackwardStep(c):
+    inbuf, inerr, insl, _, outerr, outsl = _connectionBuffers(c)
+    if (type(c) in (FullConnection, SharedFullConnection) 
+        and not _isInstrumented(c)):
+        weights = c.params.reshape(c.outdim, c.indim)
+        derivs = c.derivs.reshape(c.outdim, c.indim)
+        def step(inoffset, outoffset):
+            err = outerr[outoffset, outsl]
+            inerr[inoffset, insl] += dot(err, weights)
+            derivs[:] += outer(err, inbuf[inoffset, insl])
+    else:
+        kernel = c._backwardImplementation
+        def step(inoffset, outoffset):
+            kernel(outerr[outoffset, outsl], inerr[inoffset, insl],
+                   inbuf[inoffset, insl])
+    return step
+
+
+def _fusedTerms(m, conns, inmodules):
+    """Split the connections into a layer into the ones from bias units, given
+    as (weights, derivatives, outslice), and the others, given as (weights, 
+    derivatives, inbuffer, inerror, inslice, outslice)."""
+    biases = []
+    terms = []
+    for c in conns:
+        weights = c.params.reshape(c.outdim, c.indim)
+        derivs = None
+        if c.derivs is not None:
+            derivs = c.derivs.reshape(c.outdim, c.indim)
+        inbuf, inerr, insl, _, _, outsl = _connectionBuffers(c)
+        if type(c.inmod) is BiasUnit and c.inmod not in inmodules:
+            # The bias unit always puts out one, so the weights are simply
+            # added to the input of the layer.
+            biases.append((weights[:, 0], 
+                           None if derivs is None else derivs[:, 0], outsl))
+        else:
+            terms.append((weights, derivs, inbuf, inerr, insl, outsl))
+    return biases, terms
+
+
+def _fusedForwardStep(m, conns, inmodules):
+    biases, terms = _fusedTerms(m, conns, inmodules)
+    kernel = m._forwardImplementation
+    inbuf, outbuf = m.inputbuffer, m.outputbuffer
+    first = None
+    if (terms and terms[0][5] == slice(0, m.indim) 
+        and terms[0][0].dtype == inbuf.dtype):
+        # The product of the first connection is written into the input of
+        # the layer directly.
+        first = terms.pop(0)
+    def step(inoffset, offset):
+        x = inbuf[offset]
+        if first is None:
+            x[:] = 0
+        else:
+            weights, _, source, _, insl, _ = first
+            dot(weights, source[offset, insl], out=x)
+        for bias, _, outsl in biases:
+            x[outsl] += bias
+        for weights, _, source, _, insl, outsl in terms:
+            x[outsl] += dot(weights, source[offset, insl])
+        kernel(x, outbuf[offset])
+    return step
+
+
+def _fusedBackwardStep(m, conns, inmodules):
+    biases, terms = _fusedTerms(m, conns, inmodules)
+    kernel = m._backwardImplementation
+    inbuf, outbuf = m.inputbuffer, m.outputbuffer
+    inerr, outerr = m.inputerror, m.outputerror
+    def step(inoffset, offset):
+        m.offset = offset
+        err = inerr[offset]
+        kernel(outerr[offset], err, outbuf[offset], inbuf[offset])
+        for _, derivs, outsl in biases:
+            derivs += err[outsl]
+        for weights, derivs, source, sourceerr, insl, outsl in terms:
+            e = err[outsl]
+            sourceerr[offset, insl] += dot(e, weights)
+            derivs += outer(e, source[offset, insl])
+    return step
+
+
+class CompiledNetworkComponent(object):
+    """Mixin that executes a network through a flat execution plan that is
+    built when the modules are sorted."""
+
+    _plan = None
+    
+    # If set, layers are fused with their incoming full connections when the
+    # plan is built.
+    fused = False
+
+    def __getstate__(self):
+        # The plan consists of closures, which cannot be copied or pickled. It
+        # is simply rebuilt on the next activation.
+        state = self.__dict__.copy()
+        state.pop('_plan', None)
+        return state
+
+    def sortModules(self):
+        super(CompiledNetworkComponent, self).sortModules()
+        self._compile()
+
+    def _compile(self):
+        """Flatten the module graph into the execution plan."""
+        for m in self.modules:
+            if isinstance(m, Network):
+                raise ValueError("Nested networks cannot be compiled.")
+        recurrentConns = getattr(self, 'recurrentConns', [])
+        plan = {}
+        plan['inputs'] = [m.inputbuffer for m in self.inmodules]
+        plan['outputs'] = [m.outputbuffer for m in self.outmodules]
+        # Buffers that connections accumulate into have to be cleared before
+        # every pass.
+
+        fused = self._fusedModules() if self.fused else {}
+        plan['inbuffers'] = [m.inputbuffer for m in self.modulesSorted 
+                             if m not in fused]
+
+        forward = []
+        for m in self.modulesSorted:
+            if m in fused:
+                forward.append(_fusedForwardStep(m, fused[m], self.inmodules))
+            else:
+                forward.append(_moduleForwardStep(m))
+            for c in self.connections[m]:
+                if c.outmod not in fused:
+                    forward.append(_connectionForwardStep(c))
+        plan['forward'] = forward
+        plan['recurrentforward'] = [_connectionForwardStep(c)
+                                    for c in recurrentConns]
+        if self.inferenceOnly:
+            # There are neither errors nor derivatives to compute.
+            self._plan = plan
+            return
+
+        plan['outputerrors'] = [m.outputerror for m in self.outmodules]
+        plan['inputerrors'] = [m.inputerror for m in self.inmodules]
+        plan['outerrors'] = [m.outputerror for m in self.modulesSorted]
+        backward = []
+        for m in reversed(self.modulesSorted):
+            for c in self.connections[m]:
+                if c.outmod not in fused:
+                    backward.append(_connectionBackwardStep(c))
+            if m in fused:
+                backward.append(_fusedBackwardStep(m, fused[m], self.inmodules))
+            else:
+                backward.append(_moduleBackwardStep(m))
+        plan['backward'] = backward
+        plan['recurrentbackward'] = [_connectionBackwardStep(c)
+                                     for c in recurrentConns]
+        self._plan = plan
+
+    def _fusedModules(self):
+        """Return a dictionary that maps the modules which can be fused with 
+        their incoming connections to the list of these connections.
+        
+        These are modules without parameters and internal state that are fed 
+        by full connections only, and not by recurrent ones."""
+        recurrentConns = getattr(self, 'recurrentConns', [])
+        incoming = dict((m, []) for m in self.modulesSorted)
+        for m in self.modulesSorted:
+            for c in self.connections[m]:
+                incoming[c.outmod].append(c)
+        fused = {}
+        for m in self.modulesSorted:
+            conns = incoming[m]
+            if (not conns or m in self.inmodules or m.sequential
+                or m.paramdim > 0 or len(m.bufferlist) != 4
+                or m in [c.outmod for c in recurrentConns]
+                or _isInstrumented(m)):
+                continue
+            if all(type(c) in (FullConnection, SharedFullConnection) 
+                   and not _isInstrumented(c) for c in conns):
+                fused[m] = conns
+        return fused
+
+    def _invalidate(self):
+        """Drop the execution plan; it is rebuilt on the next pass."""
+        self._plan = None
+
+    def _resetBuffers(self, length=1):
+        super(CompiledNetworkComponent, self)._resetBuffers(length)
+        self._invalidate()
+
+    def _growBuffers(self, length=None):
+        super(CompiledNetworkComponent, self)._growBuffers(length)
+        self._invalidate()
+
+    def _setParameters(self, p, owner=None):
+        super(CompiledNetworkComponent, self)._setParameters(p, owner)
+        self._invalidate()
+
+    def _setDerivatives(self, d, owner=None):
+        super(CompiledNetworkComponent, self)._setDerivatives(d, owner)
+        self._invalidate()
+
+    def copy(self, keepBuffers=False):
+        self._invalidate()
+        return super(CompiledNetworkComponent, self).copy(keepBuffers)
+
+    def _forwardImplementation(self, inbuf, outbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        if self._plan is None:
+            self._compile()
+        plan = self._plan
+        offset = self.offset
+        for buf in plan['inbuffers']:
+            buf[offset] = 0
+
+        index = 0
+        for buf in plan['inputs']:
+            dim = buf.shape[1]
+            buf[offset] = inbuf[index:index + dim]
+            index += dim
+
+        if offset > 0:
+            for step in plan['recurrentforward']:
+                step(offset - 1, offset)
+        for step in plan['forward']:
+            step(offset, offset)
+
+        index = 0
+        for buf in plan['outputs']:
+            dim = buf.shape[1]
+            outbuf[index:index + dim] = buf[offset]
+            index += dim
+
+    def _backwardImplementation(self, outerr, inerr, outbuf, inbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        if self._plan is None:
+            self._compile()
+        plan = self._plan
+        offset = self.offset
+        for buf in plan['outerrors']:
+            buf[offset] = 0
+
+        index = 0
+        for buf in plan['outputerrors']:
+            dim = buf.shape[1]
+            buf[offset] = outerr[index:index + dim]
+            index += dim
+
+        if self.sequential and not self._isLastTimestep():
+            for step in plan['recurrentbackward']:
+                step(offset, offset + 1)
+        for step in plan['backward']:
+            step(offset, offset)
+
+        index = 0
+        for buf in plan['inputerrors']:
+            dim = buf.shape[1]
+            inerr[index:index + dim] = buf[offset]
+            index += dim
+
+
+class CompiledFeedForwardNetwork(CompiledNetworkComponent, FeedForwardNetwork):
+    """FeedForwardNetwork that is executed through a flat execution plan."""
+
+    def activate(self, inpt, out=None, ctx=None):
+        """Do one transformation of an input and return the result."""
+        if ctx is not None:
+            return _activateInContext(self, ctx, inpt, out)
+        # The plan clears the accumulating buffers itself, so the complete
+        # reset of the interpreted network is not necessary.
+        self.offset = 0
+        return Module.activate(self, inpt, out)
+
+
+class CompiledRecurrentNetwork(CompiledNetworkComponent, RecurrentNetwork):
+    """RecurrentNetwork that is executed through a flat execution plan."""
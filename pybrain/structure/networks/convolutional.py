@@ -1,14 +1,12 @@
 from pybrain.structure.modules.linearlayer import LinearLayer
 from pybrain.structure.modules.tanhlayer import TanhLayer
-from pybrain.structure.moduleslice import ModuleSlice
 from pybrain.structure.networks.feedforward import FeedForwardNetwork
-from pybrain.structure.connections.shared import MotherConnection, SharedFullConnection
+from pybrain.structure.connections.convolution import ConvolutionConnection
 from pybrain.structure.modules.sigmoidlayer import SigmoidLayer
 
 __author__ = 'Tom Schaul, tom@idsia.ch'
 
 # TODO: code up a more general version
-# TODO: use modulemash.viewonflatlayer()
 
 
 class SimpleConvolutionalNetwork(FeedForwardNetwork):
@@ -32,24 +30,12 @@ class SimpleConvolutionalNetwork(FeedForwardNetwork):
         outlayer = SigmoidLayer(outdim * outdim, name='out')
         self.addOutputModule(outlayer)
         
-        # build shared weights
-        convConns = []
-        for i in range(convSize):
-            convConns.append(MotherConnection(convSize * numFeatureMaps * inputdim, name='conv' + str(i)))
-        outConn = MotherConnection(numFeatureMaps)
-        
-        # establish the connections.
-        for i in range(outdim):
-            for j in range(outdim):
-                offset = i * outdim + j
-                outmod = ModuleSlice(hlayer, inSliceFrom=offset * numFeatureMaps, inSliceTo=(offset + 1) * numFeatureMaps,
-                                     outSliceFrom=offset * numFeatureMaps, outSliceTo=(offset + 1) * numFeatureMaps)
-                self.addConnection(SharedFullConnection(outConn, outmod, outlayer, outSliceFrom=offset, outSliceTo=offset + 1))
-                
-                for k, mc in enumerate(convConns):
-                    offset = insize * (i + k) + j
-                    inmod = ModuleSlice(inlayer, outSliceFrom=offset * inputdim, outSliceTo=offset * inputdim + convSize * inputdim)
-                    self.addConnection(SharedFullConnection(mc, inmod, outmod))
+        # the convolution with all feature maps, followed by a 1x1 convolution 
+        # that combines them into the output
+        self.addConnection(ConvolutionConnection(inlayer, hlayer, (insize, insize, inputdim), 
+                                                 (convSize, convSize), name='conv'))
+        self.addConnection(ConvolutionConnection(hlayer, outlayer, (outdim, outdim, numFeatureMaps), 
+                                                 (1, 1), name='outconv'))
             
         
 if __name__ == '__main__':
@@ -1,10 +1,6 @@
 from pybrain.structure.modules.linearlayer import LinearLayer
-from pybrain.structure.moduleslice import ModuleSlice
-from pybrain.structure.connections.identity import IdentityConnection
 from pybrain.structure.networks.feedforward import FeedForwardNetwork
-from pybrain.structure.connections.shared import MotherConnection, SharedFullConnection
-from pybrain.structure.modules.biasunit import BiasUnit
-from pybrain.utilities import crossproduct
+from pybrain.structure.connections.convolution import PaddingConnection
 from pybrain.structure.networks.convolutional import SimpleConvolutionalNetwork
 
 __author__ = 'Tom Schaul, tom@idsia.ch'
@@ -29,30 +25,10 @@ class ConvolutionalBoardNetwork(SimpleConvolutionalNetwork):
         paddedlayer = LinearLayer(inputdim*insize*insize, name = 'pad')
         self.addModule(paddedlayer)
         
-        # we connect a bias to the padded-parts (with shared but trainable weights).
-        bias = BiasUnit()
-        self.addModule(bias)
-        biasConn = MotherConnection(inputdim)
-        
-        paddable = []
-        if convSize % 2 == 0: 
-            xs = range(x)+range(insize-x+1, insize)
-        else:
-            xs = range(x)+range(insize-x, insize)
-        paddable.extend(crossproduct([range(insize), xs]))
-        paddable.extend(crossproduct([xs, range(x, boardSize+x)]))
-        
-        for (i, j) in paddable:
-            self.addConnection(SharedFullConnection(biasConn, bias, paddedlayer, 
-                                                    outSliceFrom = (i*insize+j)*inputdim, 
-                                                    outSliceTo = (i*insize+j+1)*inputdim))
-                
-        for i in range(boardSize):
-            inmod = ModuleSlice(inlayer, outSliceFrom = i*boardSize*inputdim, 
-                                outSliceTo = (i+1)*boardSize*inputdim)
-            outmod = ModuleSlice(paddedlayer, inSliceFrom = ((i+x)*insize+x)*inputdim, 
-                                 inSliceTo = ((i+x)*insize+x+boardSize)*inputdim)
-            self.addConnection(IdentityConnection(inmod, outmod))
+        # the padded parts get a trainable value (shared by all positions).
+        padding = (x, x - 1) if convSize % 2 == 0 else (x, x)
+        self.addConnection(PaddingConnection(inlayer, paddedlayer, 
+                                             (boardSize, boardSize, inputdim), padding))
             
         self._buildStructure(inputdim, insize, paddedlayer, convSize, numFeatureMaps)
         self.sortModules()
@@ -6,6 +6,7 @@
 
 __author__ = 'Justin Bayer, bayer.justin@googlemail.com'
 
+from pybrain.structure.modules.module import _activateInContext
 from pybrain.structure.networks.network import Network
 
 
@@ -14,10 +15,12 @@ class FeedForwardNetworkComponent(object):
     def __init__(self, name=None, **args):
         pass
 
-    def activate(self, inpt):
+    def activate(self, inpt, out=None, ctx=None):
         """Do one transformation of an input and return the result."""
+        if ctx is not None:
+            return _activateInContext(self, ctx, inpt, out)
         self.reset()
-        return super(FeedForwardNetworkComponent, self).activate(inpt)
+        return super(FeedForwardNetworkComponent, self).activate(inpt, out)
         
     def _forwardImplementation(self, inbuf, outbuf):
         assert self.sorted, ".sortModules() has not been called"
@@ -55,6 +58,58 @@ class FeedForwardNetworkComponent(object):
             inerr[index:index + m.indim] = m.inputerror[offset]
             index += m.indim
             
+    def activateOnDataset(self, dataset):
+        """Run the network's forward pass on the given dataset and return the 
+        output. All samples are processed at once by .activateBatch()."""
+        # FIXME: Can we always assume that the first linked field is the input?
+        return self.activateBatch(dataset.getField(dataset.link[0]))
+            
+    def activateSequence(self, inputs):
+        """Transform a sequence of inputs. Since the samples are independent,
+        they are processed as one batch."""
+        return self.activateBatch(inputs)
+    
+    def backActivateSequence(self, outerrs):
+        """Transform the output errors of the sequence that was last passed to
+        .activateSequence() backward."""
+        return self.backActivateBatch(outerrs)
+            
+    def _forwardBatchImplementation(self, inbuf, outbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        for m in self.modules:
+            m._resetBatchBuffers(inbuf.shape[0])
+        index = 0
+        for m in self.inmodules:
+            m.inputbatch[:] = inbuf[:, index:index + m.indim]
+            index += m.indim
+        
+        for m in self.modulesSorted:
+            m.forwardBatch()
+            for c in self.connections[m]:
+                c.forwardBatch()
+                
+        index = 0
+        for m in self.outmodules:
+            outbuf[:, index:index + m.outdim] = m.outputbatch
+            index += m.outdim
+            
+    def _backwardBatchImplementation(self, outerr, inerr, outbuf, inbuf):
+        assert self.sorted, ".sortModules() has not been called"
+        index = 0
+        for m in self.outmodules:
+            m.outputerrorbatch[:] = outerr[:, index:index + m.outdim]
+            index += m.outdim
+        
+        for m in reversed(self.modulesSorted):
+            for c in self.connections[m]:
+                c.backwardBatch()
+            m.backwardBatch()
+                
+        index = 0
+        for m in self.inmodules:
+            inerr[:, index:index + m.indim] = m.inputerrorbatch
+            index += m.indim
+            
             
 class FeedForwardNetwork(FeedForwardNetworkComponent, Network):
     """FeedForwardNetworks are networks that do not work for sequential data. 
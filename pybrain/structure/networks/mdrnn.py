@@ -13,6 +13,7 @@ try:
     from arac.pybrainbridge import _FeedForwardNetwork #@UnresolvedImport
 except:
     _FeedForwardNetwork = object
+from pybrain.structure.modules.module import _activateInContext
 from pybrain.structure.modules.mdrnnlayer import MdrnnLayer
 from pybrain.structure import LinearLayer
 from pybrain.structure.connections.permutation import PermutationConnection
@@ -77,11 +78,13 @@ class _Mdrnn(_FeedForwardNetwork):
         # slicing correctly.
         return [self._standardPermutation()]
         
-    def activate(self, inpt):
+    def activate(self, inpt, out=None, ctx=None):
+        if ctx is not None:
+            return _activateInContext(self, ctx, inpt, out)
         inpt.shape = self.shape
         inpt_ = permuteToBlocks(inpt, self.blockshape)
         inpt.shape = scipy.size(inpt),
-        return super(_Mdrnn, self).activate(inpt_)
+        return super(_Mdrnn, self).activate(inpt_, out)
         
     def filterResult(self, inpt):
         return inpt
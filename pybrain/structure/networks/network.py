@@ -138,10 +138,20 @@ class Network(Module, ParameterContainer):
             c.owner = self
         self.sorted = False
 
-    def _growBuffers(self):
+    def _growBuffers(self, length=None):
         for m in self.modules:
-            m._growBuffers()
-        super(Network, self)._growBuffers()
+            m._growBuffers(length)
+        super(Network, self)._growBuffers(length)
+        
+    def _resetErrors(self, rows):
+        for m in self.modules:
+            m._resetErrors(rows)
+        super(Network, self)._resetErrors(rows)
+        
+    def _shiftBuffers(self, steps):
+        for m in self.modules:
+            m._shiftBuffers(steps)
+        super(Network, self)._shiftBuffers(steps)
 
     def reset(self):
         """Reset all component modules and the network."""
@@ -149,6 +159,63 @@ class Network(Module, ParameterContainer):
         for m in self.modules:
             m.reset()    
     
+    def setDtype(self, dtype):
+        """Convert the parameters, derivatives and buffers of the network and 
+        all its modules and connections to the given type, e.g. float32 to 
+        halve memory and speed up the matrix operations."""
+        self.dtype = dtype
+        for m in self.modules:
+            if isinstance(m, Network):
+                m.setDtype(dtype)
+            else:
+                m.dtype = dtype
+        for c in combineLists(self.connections.values()) + self.motherconnections:
+            c.dtype = dtype
+        for c in getattr(self, 'recurrentConns', []):
+            c.dtype = dtype
+        self._resetBuffers(self.inputbuffer.shape[0])
+        self._resetBatchBuffers(0)
+        # Nested networks get their parameters from the outermost network.
+        if self.paramdim > 0 and self.owner in (None, self):
+            self._params = self._params.astype(dtype)
+            self._setParameters(self._params, self.owner)
+            if not self.inferenceOnly:
+                self._derivs = self._derivs.astype(dtype)
+                self._setDerivatives(self._derivs, self.owner)
+        
+    def setInferenceOnly(self, flag=True):
+        """Restrict the network and all its modules to the forward pass, or 
+        lift that restriction again. 
+        
+        Inference only networks allocate neither error buffers nor derivatives,
+        which roughly halves their memory and makes copying them (e.g. for 
+        evolutionary methods) faster."""
+        self.inferenceOnly = flag
+        for m in self.modules:
+            if isinstance(m, Network):
+                m.setInferenceOnly(flag)
+            else:
+                m.inferenceOnly = flag
+        if not self.sorted:
+            # The network is converted once its modules are sorted.
+            return
+        self._resetBuffers(self.inputbuffer.shape[0])
+        self._resetBatchBuffers(0)
+        if self.paramdim == 0:
+            return
+        if flag:
+            for pc in self._containerIterator():
+                pc._dropDerivatives()
+            self._dropDerivatives()
+        else:
+            for pc in self._containerIterator():
+                pc.hasDerivatives = True
+            self.hasDerivatives = True
+            # Nested networks get their derivatives from the outermost network.
+            if self.owner in (None, self):
+                self._setDerivatives(scipy.zeros(self.paramdim, self.dtype), 
+                                     self.owner)
+        
     def _setParameters(self, p, owner=None):        
         """ put slices of this array back into the modules """        
         ParameterContainer._setParameters(self, p, owner)
@@ -226,19 +293,7 @@ class Network(Module, ParameterContainer):
             self.connections[m].sort(key=lambda x: x.name)
         self.motherconnections.sort(key=lambda x: x.name)
             
-        # Create a single array with all parameters.
-        tmp = [pc.params for pc in self._containerIterator()]
-        total_size = sum(scipy.size(i) for i in tmp)
-        ParameterContainer.__init__(self, total_size)
-        if total_size > 0:
-            self.params[:] = scipy.concatenate(tmp)
-            self._setParameters(self.params)
-        
-            # Create a single array with all derivatives.
-            tmp = [pc.derivs for pc in self._containerIterator()]
-            self.resetDerivatives()
-            self.derivs[:] = scipy.concatenate(tmp)
-            self._setDerivatives(self.derivs)
+        self._layoutParameters()
         
         # TODO: make this a property; indim and outdim are invalid before 
         # .sortModules is called!
@@ -257,30 +312,101 @@ class Network(Module, ParameterContainer):
         self.bufferlist = []
         Module.__init__(self, self.indim, self.outdim, name=self.name)
         self.sorted = True
+        if self.inferenceOnly:
+            # Convert modules that have been added since.
+            self.setInferenceOnly()
         
+    def _layoutParameters(self):
+        """Make the parameters (and derivatives) of all containers views on a 
+        single array, in the order of ._containerIterator(). 
+        
+        The values are copied directly into their place in the new arrays; if 
+        the containers are laid out in that order already, nothing is done."""
+        containers = list(self._containerIterator())
+        total = sum(x.paramdim for x in containers)
+        if total == 0:
+            self.paramdim = 0
+            return
+        withDerivs = not self.inferenceOnly
+        if self.paramdim == total and self._isLaidOut(containers, withDerivs):
+            return
+        params = scipy.empty(total, self.dtype)
+        derivs = scipy.empty(total, self.dtype) if withDerivs else None
+        index = 0
+        for x in containers:
+            params[index:index + x.paramdim] = x.params
+            if withDerivs:
+                derivs[index:index + x.paramdim] = x.derivs
+            index += x.paramdim
+        self.paramdim = total
+        self._setParameters(params, self.owner)
+        if withDerivs:
+            self.hasDerivatives = True
+            self._setDerivatives(derivs, self.owner)
+            
+    def _isLaidOut(self, containers, withDerivs):
+        """Tell whether the parameters (and derivatives) of the containers are 
+        consecutive slices of the ones of the network."""
+        arrays = [('params', self._params)]
+        if withDerivs:
+            if getattr(self, '_derivs', None) is None:
+                return False
+            arrays.append(('derivs', self._derivs))
+        for attr, whole in arrays:
+            address = whole.ctypes.data
+            for x in containers:
+                part = getattr(x, attr)
+                if (part is None or part.dtype != whole.dtype 
+                    or part.ctypes.data != address):
+                    return False
+                address += x.paramdim * whole.itemsize
+        return True
+            
+    def _replaceConnections(self, replacements):
+        """Replace the connections whose ids are keys of the dictionary 
+        `replacements` by its values, and sort the network again."""
+        conns = self.connections.values()
+        conns.append(getattr(self, 'recurrentConns', []))
+        for l in conns:
+            l[:] = [replacements.get(id(c), c) for c in l]
+        self.sorted = False
+        self.sortModules()
+            
     def _resetBuffers(self, length=1):
         super(Network, self)._resetBuffers(length)
         for m in self.modules:
             m._resetBuffers(length)
+            
+    def _resetBatchBuffers(self, length):
+        super(Network, self)._resetBatchBuffers(length)
+        for m in self.modules:
+            m._resetBatchBuffers(length)
     
     def copy(self, keepBuffers=False):
         if not keepBuffers:
             self._resetBuffers()
+            self._resetBatchBuffers(0)
         cp = Evolvable.copy(self)
         if self.paramdim > 0:
-            cp._setParameters(self.params.copy())
+            cp._setParameters(self.params.copy(), cp.owner)
+            # Copying does not keep the derivatives of the containers views on
+            # the ones of the network either.
+            if cp.hasDerivatives:
+                cp._setDerivatives(cp.derivs, cp.owner)
         return cp
 
     def convertToFastNetwork(self):
-        """ Attempt to transform the network into a fast network. If fast networks are not available,
-        or the network cannot be converted, it returns None. """
+        """ Attempt to transform the network into a fast network. The arac networks are used if
+        they are available, the built-in compiled networks otherwise. If the network cannot be 
+        converted, it returns None. """
         
         from pybrain.structure.networks import FeedForwardNetwork, RecurrentNetwork
         try:
             from arac.pybrainbridge import _RecurrentNetwork, _FeedForwardNetwork #@UnresolvedImport
-        except:
-            print "No fast networks available."
-            return None
+        except ImportError:
+            from pybrain.structure.networks.compiled import \
+                CompiledFeedForwardNetwork as _FeedForwardNetwork, \
+                CompiledRecurrentNetwork as _RecurrentNetwork
         
         net = self.copy()
         if isinstance(net, FeedForwardNetwork):
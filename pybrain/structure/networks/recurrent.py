@@ -8,17 +8,124 @@
 __author__ = 'Justin Bayer, bayer.justin@googlemail.com'
 
 
+from scipy import zeros, asarray, arange, newaxis
+
+from pybrain.structure.modules.module import Module, _provideResult, \
+    _activateInContext
 from pybrain.structure.networks.network import Network
 from pybrain.structure.connections.shared import SharedConnection
 
 
+def _stronglyConnectedComponents(nodes, successors):
+    """Return the strongly connected components of the graph given by the list
+    of `nodes` and the dictionary `successors`, in topological order.
+    
+    Tarjan's algorithm, which finds the components in reverse topological 
+    order."""
+    index = {}
+    lowlink = {}
+    stack = []
+    components = []
+    
+    def visit(node):
+        index[node] = lowlink[node] = len(index)
+        stack.append(node)
+        for succ in successors[node]:
+            if succ not in index:
+                visit(succ)
+                lowlink[node] = min(lowlink[node], lowlink[succ])
+            elif succ in stack:
+                lowlink[node] = min(lowlink[node], index[succ])
+        if lowlink[node] == index[node]:
+            component = []
+            while True:
+                member = stack.pop()
+                component.append(member)
+                if member is node:
+                    break
+            components.append(component)
+            
+    for node in nodes:
+        if node not in index:
+            visit(node)
+    components.reverse()
+    return components
+    
+    
+class _SequenceStage(object):
+    """A group of modules that is processed together when a whole sequence is
+    run through a RecurrentNetwork. 
+    
+    If several modules depend on each other, they are processed time step by
+    time step (`stepwise`). Otherwise the stage consists of a single module 
+    (together with the recurrent connections from the module to itself) that 
+    processes the whole sequence by itself. Connections leaving the stage never
+    feed back into it, so they are applied to all time steps at once."""
+    
+    def __init__(self, modules, connections, recurrentConns):
+        self.modules = modules
+        members = set(modules)
+        # Connections inside the stage, by their incoming module.
+        self.internal = dict((m, [c for c in connections[m] if c.outmod in members]) 
+                             for m in modules)
+        self.outgoing = [c for m in modules for c in connections[m] 
+                         if c.outmod not in members]
+        self.recurrent = [c for c in recurrentConns 
+                          if c.inmod in members and c.outmod in members]
+        self.outgoingRecurrent = [c for c in recurrentConns
+                                  if c.inmod in members and c.outmod not in members]
+        self.stepwise = len(modules) > 1
+        
+    def forward(self, length, width=1):
+        rows = length * width
+        if self.stepwise:
+            for t in xrange(length):
+                block = slice(t * width, (t + 1) * width)
+                if t > 0:
+                    for c in self.recurrent:
+                        c.forwardRows(slice((t - 1) * width, t * width), block)
+                for m in self.modules:
+                    m.forwardStep(t, width)
+                    for c in self.internal[m]:
+                        c.forwardRows(block, block)
+        else:
+            self.modules[0].forwardSequence(length, self.recurrent, width)
+        for c in self.outgoing:
+            c.forwardRows(slice(0, rows), slice(0, rows))
+        for c in self.outgoingRecurrent:
+            c.forwardRows(slice(0, rows - width), slice(width, rows))
+            
+    def backward(self, length, width=1):
+        rows = length * width
+        for c in self.outgoing:
+            c.backwardRows(slice(0, rows), slice(0, rows))
+        for c in self.outgoingRecurrent:
+            c.backwardRows(slice(0, rows - width), slice(width, rows))
+        if self.stepwise:
+            for t in reversed(xrange(length)):
+                block = slice(t * width, (t + 1) * width)
+                if t < length - 1:
+                    for c in self.recurrent:
+                        c.backwardRows(block, slice((t + 1) * width, (t + 2) * width))
+                for m in reversed(self.modules):
+                    for c in self.internal[m]:
+                        c.backwardRows(block, block)
+                    m.backwardStep(t, width)
+        else:
+            self.modules[0].backwardSequence(length, self.recurrent, width)
+
+
 class RecurrentNetworkComponent(object):
     
     sequential = True
     
+    # Maximum number of time steps that are kept in the buffers, if any.
+    historylimit = None
+    
     def __init__(self, name=None, *args, **kwargs):
         self.recurrentConns = []
         self.maxoffset = 0
+        self._sequenceStages = None
         
     def __str__(self):
         s = super(RecurrentNetworkComponent, self).__str__()
@@ -44,23 +151,61 @@ class RecurrentNetworkComponent(object):
         self.recurrentConns.append(c)
         self.sorted = False
         
-    def activate(self, inpt):
-        """Do one transformation of an input and return the result."""
+    def activate(self, inpt, out=None, ctx=None):
+        """Do one transformation of an input and return the result, or write
+        it into the array `out` if one is given."""
+        if ctx is not None:
+            return _activateInContext(self, ctx, inpt, out)
         self.inputbuffer[self.offset] = inpt
         self.forward()
-        return self.outputbuffer[self.offset - 1].copy()
+        return _provideResult(self.outputbuffer[self.offset - 1], out)
     
     def backActivate(self, outerr):
         """Do one transformation of an output error outerr backward and return 
         the error on the input."""
+        assert not self.inferenceOnly, "Inference only modules have no errors."
         self.outputerror[self.offset - 1] = outerr
         self.backward()
         return self.inputerror[self.offset].copy()
 
+    def reserveBuffers(self, length):
+        """Allocate the buffers for sequences of `length` time steps in 
+        advance, so that they do not have to be grown while the network is 
+        activated step by step."""
+        # One additional row stands for the (empty) future during the backward
+        # pass.
+        if self.inputbuffer.shape[0] < length + 1:
+            self._growBuffers(length + 1)
+            
+    def limitHistory(self, steps):
+        """Keep only a bounded number of time steps in the buffers, so that the
+        network can be activated indefinitely with constant memory. 
+        
+        The buffers are allocated once for a bit more than twice the given 
+        number of `steps`. Whenever they are full, the last `steps` time steps
+        (and the one before, whose state they depend on) are moved to their 
+        front. Backpropagation through time is thus truncated: at least the 
+        last `steps` time steps can always be backpropagated through. Passing 
+        None lifts the limit.
+        
+        A whole sequence passed to .activateSequence() is kept completely, so 
+        that it can be backpropagated through with .backActivateSequence(). 
+        Afterwards (or as soon as the network is activated step by step again,
+        or right away for inference only networks), the buffers are shrunk 
+        back."""
+        self.historylimit = steps
+        if steps is not None:
+            self.reserveBuffers(2 * steps + 1)
+
     def forward(self):
         """Produce the output from the input."""
+        if self.historylimit is not None:
+            self._limitBuffers()
         if not (self.offset + 1 < self.inputbuffer.shape[0]):
-            self._growBuffers()
+            if self.historylimit is not None and self.offset > self.historylimit + 1:
+                self._shiftBuffers(self.offset - self.historylimit - 1)
+            else:
+                self._growBuffers()
         super(RecurrentNetworkComponent, self).forward()
         self.offset += 1
         self.maxoffset = max(self.offset, self.maxoffset)
@@ -68,7 +213,28 @@ class RecurrentNetworkComponent(object):
     def backward(self):
         """Produce the input error from the output error."""
         self.offset -= 1
+        assert self.offset >= 0, \
+            "Cannot backpropagate beyond the time steps kept in the buffers."
         super(RecurrentNetworkComponent, self).backward()
+        
+    def _shiftBuffers(self, steps):
+        super(RecurrentNetworkComponent, self)._shiftBuffers(steps)
+        self.offset -= steps
+        self.maxoffset = max(self.maxoffset - steps, 0)
+
+    def _limitBuffers(self):
+        """Shrink buffers that have grown beyond the history limit for a whole 
+        sequence back to the size given by .limitHistory(). The time steps up
+        to the current one that are within the limit are kept."""
+        limit = self.historylimit
+        # The size reserved by .limitHistory().
+        length = 2 * limit + 2
+        if self.inputbuffer.shape[0] <= length:
+            return
+        if self.offset > limit + 1:
+            self._shiftBuffers(self.offset - limit - 1)
+        self._growBuffers(length)
+        self.maxoffset = min(self.maxoffset, length - 1)
 
     def _isLastTimestep(self):
         return self.offset == self.maxoffset
@@ -119,8 +285,174 @@ class RecurrentNetworkComponent(object):
             inerr[index:index + m.indim] = m.inputerror[offset]
             index += m.indim
             
+    def activateSequence(self, inputs):
+        """Reset the network and transform a whole sequence of inputs, one time 
+        step per row. Return the matrix of outputs.
+        
+        The buffers are allocated for the whole sequence in advance. Parts of
+        the network that do not depend on their own past (e.g. the input 
+        projections of an LSTM layer) process all time steps at once, and only
+        the truly recurrent parts are stepped through time."""
+        assert self.sorted, ".sortModules() has not been called"
+        if self._provideSequenceStages() is None:
+            return Module.activateSequence(self, inputs)
+        length = len(inputs)
+        outputs = self._forwardSequences(asarray(inputs), length, 1)
+        self.offset = length
+        self.maxoffset = length
+        if self.inferenceOnly and self.historylimit is not None:
+            self._limitBuffers()
+        return outputs
+    
+    def backActivateSequence(self, outerrs):
+        """Backpropagate the output errors of the sequence that was last passed 
+        to .activateSequence() through time. Return the matrix of input 
+        errors."""
+        assert not self.inferenceOnly, "Inference only modules have no errors."
+        if self._provideSequenceStages() is None:
+            return Module.backActivateSequence(self, outerrs)
+        length = len(outerrs)
+        assert length == self.maxoffset
+        inerrs = self._backwardSequences(asarray(outerrs), length, 1)
+        self.offset = 0
+        if self.historylimit is not None:
+            self._limitBuffers()
+        return inerrs
+    
+    def activateSequenceBatch(self, inputs, lengths=None):
+        """Transform a batch of sequences, given as an array of shape 
+        (sequences, time steps, indim), and return the outputs as an array of 
+        shape (sequences, time steps, outdim).
+        
+        Sequences that are shorter than the array are padded at their end; 
+        their `lengths` can be given as a list. The outputs of the padded time 
+        steps are set to zero. All sequences are processed in lockstep, so that
+        every recurrent connection and every cell update handles all sequences
+        at once."""
+        assert self.sorted, ".sortModules() has not been called"
+        inputs = asarray(inputs)
+        width, length = inputs.shape[:2]
+        if lengths is None:
+            lengths = [length] * width
+        mask = arange(length) < asarray(lengths)[:, newaxis]
+        self._sequenceBatch = inputs, mask
+        if not self._lockstepPossible():
+            outputs = zeros((width, length, self.outdim), self.dtype)
+            for i, l in enumerate(lengths):
+                outputs[i, :l] = self.activateSequence(inputs[i, :l])
+            return outputs
+        # Time steps are stored one after the other, each as a block of rows 
+        # that holds all sequences.
+        rows = inputs.transpose(1, 0, 2).reshape(length * width, self.indim)
+        outputs = self._forwardSequences(rows, length, width)
+        outputs = outputs.reshape(length, width, self.outdim).transpose(1, 0, 2)
+        outputs[~mask] = 0
+        self.offset = 0
+        if self.inferenceOnly and self.historylimit is not None:
+            self._limitBuffers()
+        return outputs
+    
+    def backActivateSequenceBatch(self, outerrs):
+        """Backpropagate the output errors of the batch of sequences that was 
+        last passed to .activateSequenceBatch() through time. Return the input
+        errors as an array of shape (sequences, time steps, indim). The errors
+        of padded time steps are ignored."""
+        assert not self.inferenceOnly, "Inference only modules have no errors."
+        inputs, mask = self._sequenceBatch
+        outerrs = asarray(outerrs)
+        width, length = outerrs.shape[:2]
+        assert mask.shape == (width, length)
+        if not self._lockstepPossible():
+            inerrs = zeros((width, length, self.indim), self.dtype)
+            for i, l in enumerate(mask.sum(axis=1)):
+                self.activateSequence(inputs[i, :l])
+                inerrs[i, :l] = self.backActivateSequence(outerrs[i, :l])
+            return inerrs
+        outerrs = outerrs * mask[:, :, newaxis]
+        rows = outerrs.transpose(1, 0, 2).reshape(length * width, self.outdim)
+        inerrs = self._backwardSequences(rows, length, width)
+        inerrs = inerrs.reshape(length, width, self.indim).transpose(1, 0, 2)
+        inerrs[~mask] = 0
+        self.offset = 0
+        if self.historylimit is not None:
+            self._limitBuffers()
+        return inerrs
+    
+    def _lockstepPossible(self):
+        """Tell whether several sequences can be processed in lockstep. Nested
+        networks keep internal state that is bound to a single sequence."""
+        if self._provideSequenceStages() is None:
+            return False
+        for m in self.modules:
+            if isinstance(m, Network):
+                return False
+        return True
+        
+    def _forwardSequences(self, inputs, length, width):
+        """Reset the network and run the forward pass over `length` time steps
+        of `width` sequences in lockstep. The inputs and the returned outputs 
+        hold one block of `width` rows per time step."""
+        rows = length * width
+        self.reset()
+        # One additional time step stands for the (empty) future during the 
+        # backward pass.
+        if self.inputbuffer.shape[0] < rows + width:
+            self._resetBuffers(rows + width)
+        self.inputbuffer[:rows] = inputs
+        index = 0
+        for m in self.inmodules:
+            m.inputbuffer[:rows] = self.inputbuffer[:rows, index:index + m.indim]
+            index += m.indim
+        for stage in self._provideSequenceStages():
+            stage.forward(length, width)
+        index = 0
+        for m in self.outmodules:
+            self.outputbuffer[:rows, index:index + m.outdim] = m.outputbuffer[:rows]
+            index += m.outdim
+        return self.outputbuffer[:rows].copy()
+    
+    def _backwardSequences(self, outerrs, length, width):
+        """Run the backward pass of the sequences that were last passed 
+        through ._forwardSequences(). Return the input errors."""
+        rows = length * width
+        self.outputerror[:rows] = outerrs
+        index = 0
+        for m in self.outmodules:
+            m.outputerror[:rows] = self.outputerror[:rows, index:index + m.outdim]
+            index += m.outdim
+        for stage in reversed(self._provideSequenceStages()):
+            stage.backward(length, width)
+        index = 0
+        for m in self.inmodules:
+            self.inputerror[:rows, index:index + m.indim] = m.inputerror[:rows]
+            index += m.indim
+        return self.inputerror[:rows].copy()
+    
+    def _provideSequenceStages(self):
+        """Return the stages in which a whole sequence is processed, or None if
+        the network contains sequential subnetworks, which have to be stepped 
+        one time step at a time."""
+        if self._sequenceStages is None:
+            for m in self.modules:
+                if isinstance(m, Network) and m.sequential:
+                    self._sequenceStages = False
+                    return None
+            successors = dict((m, [c.outmod for c in self.connections[m]]) 
+                              for m in self.modulesSorted)
+            for c in self.recurrentConns:
+                successors[c.inmod].append(c.outmod)
+            components = _stronglyConnectedComponents(self.modulesSorted, 
+                                                      successors)
+            position = dict((m, i) for i, m in enumerate(self.modulesSorted))
+            self._sequenceStages = [
+                _SequenceStage(sorted(comp, key=position.get), 
+                               self.connections, self.recurrentConns) 
+                for comp in components]
+        return self._sequenceStages or None
+            
     def sortModules(self):
         self.recurrentConns.sort(key=lambda x: x.name)
+        self._sequenceStages = None
         super(RecurrentNetworkComponent, self).sortModules()
         
         
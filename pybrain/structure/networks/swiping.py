@@ -1,16 +1,20 @@
 __author__ = 'Tom Schaul, tom@idsia.ch'
 
 from pybrain.structure.networks.feedforward import FeedForwardNetwork
+from pybrain.structure.networks.wavefront import WavefrontNetworkComponent
 from pybrain.structure.connections.shared import MotherConnection, SharedFullConnection
 from pybrain.utilities import iterCombinations
 
 # TODO: special treatment for multi-dimensional lstm cells: identity connections on state buffers
 
 
-class SwipingNetwork(FeedForwardNetwork):
+class SwipingNetwork(WavefrontNetworkComponent, FeedForwardNetwork):
     """ A network architecture that establishes shared connections between ModuleMeshes (of identical dimensions)
     so that the behavior becomes equivalent to one unit (in+hidden+out components at the same coordinate) swiping
-    over a multidimensional input space and producing a multidimensional output. """
+    over a multidimensional input space and producing a multidimensional output. 
+    
+    The network is evaluated along the wavefronts of all swiping directions at 
+    once, see WavefrontNetworkComponent. """
     
     # if all dimensions should be considered symmetric, their weights are shared
     symmetricdimensions = True
@@ -0,0 +1,334 @@
+"""Module that contains networks which are evaluated wavefront by wavefront.
+
+Networks that are unfolded over a grid, like the swiping networks, consist of
+one module per cell and per swiping direction, linked by connections that share
+their weights. Evaluating them module by module is slow, since every cell costs
+a handful of small matrix operations.
+
+The modules of such a network can be ordered by their depth, i.e. the length of
+the longest path that leads to them from the inputs. All modules of the same
+depth are independent of each other; for a swiping network they form the
+anti-diagonal wavefronts of all swiping directions. Equivalent modules get
+their buffers allocated as rows of a common array, so that every wavefront is
+processed by one operation per kind of module and per shared weight matrix,
+forward as well as backward."""
+
+
+import copy
+
+from scipy import array, dot, diff
+from numpy.lib.stride_tricks import as_strided
+
+from pybrain.structure.modules.module import Module, _activateInContext
+from pybrain.structure.networks.network import Network
+from pybrain.structure.networks.compiled import CompiledNetworkComponent, \
+    _isInstrumented
+from pybrain.structure.connections.full import FullConnection
+from pybrain.structure.connections.shared import SharedFullConnection
+from pybrain.structure.connections.identity import IdentityConnection
+
+
+class _ModuleGroup(object):
+    """Equivalent modules whose buffers are the rows of the buffers of a single
+    stand-in module of the same type. Modules that cannot be grouped form a
+    group of their own, which is processed by the module itself."""
+
+    def __init__(self, modules, grouped=True):
+        self.modules = modules
+        self.rows = dict((m, i) for i, m in enumerate(modules))
+        self.grouped = grouped
+        if not grouped:
+            self.proxy = modules[0]
+            return
+        # The stand-in shares the parameters and settings of the first module,
+        # but gets buffers with one row per module.
+        self.proxy = copy.copy(modules[0])
+        self.proxy._resetBuffers(len(modules))
+        for i, m in enumerate(modules):
+            for name, _ in m._allocatedBuffers():
+                buf = getattr(self.proxy, name)
+                buf[i] = getattr(m, name)[0]
+                setattr(m, name, buf[i:i + 1])
+
+    def buffer(self, name):
+        """Return the buffer of the group with the given name, as a single row
+        that holds the values of all modules."""
+        buf = getattr(self.proxy, name)
+        if self.grouped:
+            return buf.reshape(1, -1)
+        return buf
+
+    def flat(self, name):
+        """Return the first row of every module's buffer as one flat array."""
+        return getattr(self.proxy, name).reshape(-1)
+
+    def forwardStep(self, rows):
+        proxy = self.proxy
+        if not self.grouped:
+            return lambda *offsets: proxy.forward()
+        if hasattr(proxy, '_forwardRows'):
+            return lambda *offsets: proxy._forwardRows(rows)
+        def step(*offsets):
+            proxy._forwardBatchImplementation(proxy.inputbuffer[rows],
+                                              proxy.outputbuffer[rows])
+        return step
+
+    def backwardStep(self, rows):
+        proxy = self.proxy
+        if not self.grouped:
+            return lambda *offsets: proxy.backward()
+        if hasattr(proxy, '_backwardRows'):
+            return lambda *offsets: proxy._backwardRows(rows)
+        def step(*offsets):
+            proxy._backwardBatchImplementation(proxy.outputerror[rows],
+                                               proxy.inputerror[rows],
+                                               proxy.outputbuffer[rows],
+                                               proxy.inputbuffer[rows])
+        return step
+
+
+def _isGroupable(m):
+    """Tell whether a module can be processed together with equivalent ones:
+    it must not have parameters of its own and all its values have to be in
+    rows of its buffers."""
+    if m.sequential or _isInstrumented(m):
+        return False
+    if getattr(m, 'paramdim', 0) > 0 or m.outputbuffer.shape[0] != 1:
+        return False
+    return len(m.bufferlist) == 4 or hasattr(m, '_forwardRows')
+
+
+def _connectionKey(c):
+    """Connections with the same key do the same transformation and can be
+    applied at once."""
+    if _isInstrumented(c):
+        return None
+    if type(c) is SharedFullConnection:
+        return id(c.mother), c.indim, c.outdim
+    elif type(c) is FullConnection:
+        return id(c), c.indim, c.outdim
+    elif type(c) is IdentityConnection:
+        return 'identity', c.indim, c.outdim
+    return None
+
+
+class _ConnectionBatch(object):
+    """Connections of the same kind that are applied at once. None of the
+    elements they read from or write to is shared between two of them."""
+
+    def __init__(self, inflat, outflat):
+        self.connections = []
+        self.inflat = inflat
+        self.outflat = outflat
+        self.inindices = []
+        self.outindices = []
+        self._inused = set()
+        self._outused = set()
+
+    def accepts(self, inindices, outindices):
+        return (self._inused.isdisjoint(inindices) and
+                self._outused.isdisjoint(outindices))
+
+    def add(self, c, inindices, outindices):
+        self.connections.append(c)
+        self.inindices.append(inindices)
+        self.outindices.append(outindices)
+        self._inused.update(inindices)
+        self._outused.update(outindices)
+
+    def _indices(self):
+        order = sorted(range(len(self.connections)),
+                       key=lambda i: self.outindices[i][0])
+        inindices = array([self.inindices[i] for i in order])
+        outindices = array([self.outindices[i] for i in order])
+        return inindices, outindices
+
+    def forwardStep(self):
+        inindices, outindices = self._indices()
+        read = _reader(self.inflat['outputbuffer'], inindices)
+        add = _adder(self.outflat['inputbuffer'], outindices)
+        weights = _weights(self.connections[0])
+        if weights is None:
+            return lambda *offsets: add(read())
+        return lambda *offsets: add(dot(read(), weights.T))
+
+    def backwardStep(self):
+        inindices, outindices = self._indices()
+        read = _reader(self.inflat['outputbuffer'], inindices)
+        readerr = _reader(self.outflat['inputerror'], outindices)
+        adderr = _adder(self.inflat['outputerror'], inindices)
+        c = self.connections[0]
+        weights = _weights(c)
+        if weights is None:
+            return lambda *offsets: adderr(readerr())
+        derivs = c.derivs.reshape(c.outdim, c.indim)
+        def step(*offsets):
+            err = readerr()
+            adderr(dot(err, weights))
+            derivs[:] += dot(err.T, read())
+        return step
+
+
+def _weights(c):
+    if type(c) in (FullConnection, SharedFullConnection):
+        return c.params.reshape(c.outdim, c.indim)
+    return None
+
+
+def _view(flat, indices):
+    """Return a view on the elements of `flat` that are given by the matrix of
+    `indices`, if these are spaced regularly enough, and None otherwise."""
+    rows, cols = indices.shape
+    if not (diff(indices, axis=1) == 1).all():
+        return None
+    stride = cols
+    if rows > 1:
+        stride = indices[1, 0] - indices[0, 0]
+        if stride < cols or not (diff(indices[:, 0]) == stride).all():
+            return None
+    itemsize = flat.itemsize
+    return as_strided(flat[indices[0, 0]:], (rows, cols),
+                      (stride * itemsize, itemsize))
+
+
+def _reader(flat, indices):
+    view = _view(flat, indices)
+    if view is not None:
+        return lambda *offsets: view
+    return lambda *offsets: flat[indices]
+
+
+def _adder(flat, indices):
+    view = _view(flat, indices)
+    if view is not None:
+        def add(x):
+            view[...] += x
+    else:
+        def add(x):
+            flat[indices] += x
+    return add
+
+
+class WavefrontNetworkComponent(CompiledNetworkComponent):
+    """Mixin that evaluates a feed forward network wavefront by wavefront.
+
+    Modules that cannot be grouped with others, and connections of types that
+    are not known to the wavefront engine, are simply processed one by one, so
+    the results are always the same as for the module by module evaluation.
+
+    The steps of the plan take the time offsets like those of the compiled
+    networks, but the network only ever works on the first time step."""
+
+    def _compile(self):
+        for m in self.modules:
+            if isinstance(m, Network):
+                raise ValueError("Nested networks cannot be compiled.")
+        depth = self._moduleDepths()
+        levels = [([], []) for _ in xrange(max(depth.values()) + 1)]
+        members = {}
+        for m in sorted(self.modules, key=lambda m: (depth[m], m.name)):
+            if _isGroupable(m):
+                members.setdefault((m.__class__, m.indim, m.outdim), []).append(m)
+            else:
+                members[m] = [m]
+        groups = []
+        groupOf = {}
+        for key, modules in members.items():
+            group = _ModuleGroup(modules, grouped=_isGroupable(modules[0]))
+            groups.append(group)
+            for m in modules:
+                groupOf[m] = group
+            # The modules are ordered by depth, so the ones of every level
+            # are consecutive rows of the group.
+            bydepth = {}
+            for m in modules:
+                bydepth.setdefault(depth[m], []).append(group.rows[m])
+            for d, rows in bydepth.items():
+                rows = slice(rows[0], rows[-1] + 1)
+                levels[d][1].append((group, rows))
+
+        flats = {}
+        for group in groups:
+            flats[group] = dict((name, group.flat(name))
+                                for name, _ in group.proxy._allocatedBuffers())
+
+        # Connections of the same kind into modules of the same depth are
+        # applied together.
+        batches = {}
+        for m in self.modulesSorted:
+            for c in self.connections[m]:
+                key = _connectionKey(c)
+                if key is None:
+                    levels[depth[c.outmod]][0].append(c)
+                    continue
+                ingroup, outgroup = groupOf[c.inmod], groupOf[c.outmod]
+                inbase = ingroup.rows[c.inmod] * c.inmod.outdim
+                outbase = outgroup.rows[c.outmod] * c.outmod.indim
+                inindices = range(inbase + c.inSliceFrom, inbase + c.inSliceTo)
+                outindices = range(outbase + c.outSliceFrom,
+                                   outbase + c.outSliceTo)
+                key = (depth[c.outmod], ingroup, outgroup) + key
+                candidates = batches.setdefault(key, [])
+                for batch in candidates:
+                    if batch.accepts(inindices, outindices):
+                        break
+                else:
+                    batch = _ConnectionBatch(flats[ingroup], flats[outgroup])
+                    candidates.append(batch)
+                    levels[depth[c.outmod]][0].append(batch)
+                batch.add(c, inindices, outindices)
+
+        plan = {}
+        plan['inputs'] = [m.inputbuffer for m in self.inmodules]
+        plan['outputs'] = [m.outputbuffer for m in self.outmodules]
+        plan['inbuffers'] = [g.buffer('inputbuffer') for g in groups]
+        forward = []
+        for conns, modules in levels:
+            forward.extend(_forwardStep(c) for c in conns)
+            forward.extend(g.forwardStep(rows) for g, rows in modules)
+        plan['forward'] = forward
+        if self.inferenceOnly:
+            self._plan = plan
+            return
+
+        plan['outputerrors'] = [m.outputerror for m in self.outmodules]
+        plan['inputerrors'] = [m.inputerror for m in self.inmodules]
+        plan['outerrors'] = [g.buffer('outputerror') for g in groups]
+        backward = []
+        for conns, modules in reversed(levels):
+            backward.extend(g.backwardStep(rows) for g, rows in modules)
+            backward.extend(_backwardStep(c) for c in conns)
+        plan['backward'] = backward
+        self._plan = plan
+
+    def activate(self, inpt, out=None, ctx=None):
+        """Do one transformation of an input and return the result."""
+        if ctx is not None:
+            return _activateInContext(self, ctx, inpt, out)
+        # The plan clears the accumulating buffers of all modules itself, which
+        # is a lot cheaper than resetting them one by one.
+        if self.offset != 0:
+            self.offset = 0
+        return Module.activate(self, inpt, out)
+
+    def _moduleDepths(self):
+        """Return a dictionary with the length of the longest path from the
+        inputs to every module."""
+        depth = {}
+        for m in self.modulesSorted:
+            depth.setdefault(m, 0)
+            for c in self.connections[m]:
+                depth[c.outmod] = max(depth.get(c.outmod, 0), depth[m] + 1)
+        return depth
+
+
+def _forwardStep(c):
+    if isinstance(c, _ConnectionBatch):
+        return c.forwardStep()
+    return lambda *offsets: c.forward()
+
+
+def _backwardStep(c):
+    if isinstance(c, _ConnectionBatch):
+        return c.backwardStep()
+    return lambda *offsets: c.backward()
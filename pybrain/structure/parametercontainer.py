@@ -1,6 +1,6 @@
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import size, zeros, ndarray, array
+from scipy import size, zeros, ndarray, array, float64
 from numpy.random import randn
 
 from pybrain.structure.evolvables.evolvable import Evolvable
@@ -21,6 +21,9 @@ class ParameterContainer(Evolvable):
     # a flag that enables storage of derivatives
     hasDerivatives = False
     
+    # type of the parameters and derivatives
+    dtype = float64
+    
     def __init__(self, paramdim = 0, **args):
         """ initialize all parameters with random values, normally distributed around 0
         
@@ -29,7 +32,7 @@ class ParameterContainer(Evolvable):
         self.setArgs(**args)
         self.paramdim = paramdim
         if paramdim > 0:
-            self._params = zeros(self.paramdim)
+            self._params = zeros(self.paramdim, self.dtype)
             # enable derivatives if it is a instance of Module or Connection
             # CHECKME: the import can not be global?
             from pybrain.structure.modules.module import Module
@@ -37,7 +40,7 @@ class ParameterContainer(Evolvable):
             if isinstance(self, Module) or isinstance(self, Connection):
                 self.hasDerivatives = True
             if self.hasDerivatives:
-                self._derivs = zeros(self.paramdim)
+                self._derivs = zeros(self.paramdim, self.dtype)
             self.randomize()
                    
     @property
@@ -75,6 +78,11 @@ class ParameterContainer(Evolvable):
         assert size(d) == self.paramdim
         self._derivs = d
     
+    def _dropDerivatives(self):
+        """ free the derivatives, e.g. if the container is only used for inference """
+        self.hasDerivatives = False
+        self._derivs = None
+    
     def resetDerivatives(self):
         """ :note: this method only sets the values to zero, it does not initialize the array. """
         assert self.hasDerivatives
@@ -1,3 +1,4 @@
 from trainer import Trainer
 from backprop import BackpropTrainer
 from rprop import RPropMinusTrainer
+from truncatedbptt import TruncatedBPTTTrainer
@@ -1,11 +1,12 @@
 __author__ = 'Daan Wierstra and Tom Schaul'
 
-from scipy import dot, argmax
+from scipy import dot, argmax, asarray, arange, newaxis
 from random import shuffle
 
 from trainer import Trainer
 from pybrain.utilities import fListToString 
 from pybrain.auxiliary import GradientDescent
+from pybrain.datasets import SequentialDataSet
 
 
 class BackpropTrainer(Trainer):
@@ -15,7 +16,7 @@ class BackpropTrainer(Trainer):
         
     def __init__(self, module, dataset=None, learningrate=0.01, lrdecay=1.0,
                  momentum=0., verbose=False, batchlearning=False,
-                 weightdecay=0.):
+                 weightdecay=0., sequencebatchsize=1):
         """Create a BackpropTrainer to train the specified `module` on the 
         specified `dataset`.
         
@@ -30,12 +31,20 @@ class BackpropTrainer(Trainer):
         
         `weightdecay` corresponds to the weightdecay rate, where 0 is no weight
         decay at all.
+        
+        If `sequencebatchsize` is bigger than one and the dataset is 
+        sequential, that many sequences of similar length are passed to the 
+        module at once, which then processes them in lockstep. This requires a
+        module that supports .activateSequenceBatch(), like the 
+        RecurrentNetwork. Without batch learning, the parameters are updated 
+        after each batch of sequences.
         """
         Trainer.__init__(self, module)
         self.setData(dataset)
         self.verbose = verbose
         self.batchlearning = batchlearning
         self.weightdecay = weightdecay
+        self.sequencebatchsize = sequencebatchsize
         self.epoch = 0
         self.totalepochs = 0
         # set up gradient descender
@@ -51,20 +60,10 @@ class BackpropTrainer(Trainer):
         self.module.resetDerivatives()
         errors = 0        
         ponderation = 0.
-        shuffledSequences = []
-        for seq in self.ds._provideSequences():
-            shuffledSequences.append(seq)
-        shuffle(shuffledSequences)
-        for seq in shuffledSequences:
-            e, p = self._calcDerivs(seq)
+        for batch in self._provideBatches():
+            e, p = self._trainOnBatch(batch, errors)
             errors += e
             ponderation += p
-            if not self.batchlearning:
-                gradient = self.module.derivs - self.weightdecay * self.module.params
-                new = self.descent(gradient, errors)
-                if new is not None:
-                    self.module.params[:] = new
-                self.module.resetDerivatives()
 
         if self.verbose:
             print "Total error:", errors / ponderation
@@ -74,36 +73,84 @@ class BackpropTrainer(Trainer):
         self.totalepochs += 1
         return errors / ponderation
         
+    def _provideBatches(self):
+        """Return the batches of one epoch in random order: batches of padded
+        sequences if `sequencebatchsize` is bigger than one, and single 
+        sequences otherwise."""
+        if self._batchesOfSequences():
+            return self.ds.getPaddedSequenceBatches(self.sequencebatchsize, 
+                                                    randomize=True)
+        batches = []
+        for seq in self.ds._provideSequences():
+            batches.append(seq)
+        shuffle(batches)
+        return batches
+        
+    def _batchesOfSequences(self):
+        """Tell whether the epochs consist of batches of padded sequences."""
+        return (self.sequencebatchsize > 1 
+                and isinstance(self.ds, SequentialDataSet))
+        
+    def _trainOnBatch(self, batch, errors):
+        """Calculate the derivatives for a batch and, without batch learning,
+        update the parameters. `errors` is the error of the epoch so far. 
+        Return the error of the batch and its ponderation."""
+        if self._batchesOfSequences():
+            e, p = self._calcSequenceBatchDerivs(*batch)
+        else:
+            e, p = self._calcDerivs(batch)
+        if not self.batchlearning:
+            self._descend(errors + e)
+        return e, p
+        
+    def _descend(self, error):
+        """Update the parameters along the derivatives, and reset those."""
+        gradient = self.module.derivs - self.weightdecay * self.module.params
+        new = self.descent(gradient, error)
+        if new is not None:
+            self.module.params[:] = new
+        self.module.resetDerivatives()
     
     def _calcDerivs(self, seq):
         """Calculate error function and backpropagate output errors to yield 
         the gradient."""
-        self.module.reset()        
-        for sample in seq:
-            self.module.activate(sample[0])
-        error = 0
-        ponderation = 0.
-        for offset, sample in reversed(list(enumerate(seq))):
-            # need to make a distinction here between datasets containing
-            # importance, and others
-            target = sample[1]
-            outerr = target - self.module.outputbuffer[offset]
-            if len(sample) > 2:
-                importance = sample[2]
-                error += 0.5 * dot(importance, outerr ** 2)
-                ponderation += sum(importance)
-                self.module.backActivate(outerr * importance)                
-            else:
-                error += 0.5 * sum(outerr ** 2)
-                ponderation += len(target)
-                # FIXME: the next line keeps arac from producing NaNs. I don't
-                # know why that is, but somehow the __str__ method of the 
-                # ndarray class fixes something,
-                str(outerr)
-                self.module.backActivate(outerr)
+        # The whole sequence is passed to the module at once, which allows it
+        # to process all time steps that do not depend on each other together.
+        outputs = self.module.activateSequence(asarray([sample[0] for sample in seq]))
+        targets = asarray([sample[1] for sample in seq])
+        outerr = targets - outputs
+        # need to make a distinction here between datasets containing
+        # importance, and others
+        if len(seq[0]) > 2:
+            importance = asarray([sample[2] for sample in seq])
+            error = 0.5 * (importance * outerr ** 2).sum()
+            ponderation = importance.sum()
+            outerr *= importance
+        else:
+            error = 0.5 * (outerr ** 2).sum()
+            ponderation = float(outerr.size)
+        self.module.backActivateSequence(outerr)
             
         return error, ponderation
             
+    def _calcSequenceBatchDerivs(self, arrays, lengths):
+        """Calculate error function and backpropagate output errors of a batch
+        of padded sequences, as given by 
+        SequentialDataSet.getPaddedSequenceBatches()."""
+        outputs = self.module.activateSequenceBatch(arrays[0], lengths)
+        mask = arange(outputs.shape[1]) < lengths[:, newaxis]
+        outerr = (arrays[1] - outputs) * mask[:, :, newaxis]
+        if len(arrays) > 2:
+            importance = arrays[2] * mask[:, :, newaxis]
+            error = 0.5 * (importance * outerr ** 2).sum()
+            ponderation = importance.sum()
+            outerr *= importance
+        else:
+            error = 0.5 * (outerr ** 2).sum()
+            ponderation = float(lengths.sum() * outerr.shape[2])
+        self.module.backActivateSequenceBatch(outerr)
+        return error, ponderation
+            
     def _checkGradient(self, dataset=None, silent=False):
         """Numeric check of the computed gradient for debugging purposes."""
         if dataset:
@@ -138,6 +185,13 @@ class BackpropTrainer(Trainer):
         if dataset == None:
             dataset = self.ds
         dataset.reset()
+        if not (verbose or self.module.sequential 
+                or isinstance(dataset, SequentialDataSet)):
+            # The samples are independent, so they can be processed all at once.
+            targets = asarray(dataset.getField('target'))
+            assert targets.size > 0
+            out = self.module.activateOnDataset(dataset)
+            return 0.5 * ((targets - out) ** 2).sum() / targets.size
         if verbose:
             print '\nTesting on data:'
         errors = []
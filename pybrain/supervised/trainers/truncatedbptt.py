@@ -0,0 +1,111 @@
+from time import time
+
+from scipy import zeros, dot
+
+from pybrain.supervised.trainers import BackpropTrainer
+
+
+class TruncatedBPTTTrainer(BackpropTrainer):
+    """Trainer that trains a recurrent network with truncated backpropagation
+    through time.
+
+    Sequences are processed in chunks of `k1` time steps. After every chunk,
+    the errors are backpropagated through the last `k2` time steps and the
+    parameters are updated. The state of the network is carried on from one
+    chunk to the next, but only the last `k2` time steps are kept in its
+    buffers, so that arbitrarily long sequences (or unbounded streams of
+    samples) can be trained on with constant memory."""
+
+    def __init__(self, module, dataset=None, k1=10, k2=None, **kwargs):
+        """Create a TruncatedBPTTTrainer to train the recurrent network
+        `module` on the specified `dataset`.
+
+            :key k1: number of time steps between two updates (10)
+            :key k2: number of time steps the errors are backpropagated through,
+                at least `k1` (defaults to `k1`)
+
+        All other arguments are passed on to the BackpropTrainer. While the 
+        module is trained on a sequence, its history is limited to `k2` time
+        steps."""
+        BackpropTrainer.__init__(self, module, dataset, **kwargs)
+        if k2 is None:
+            k2 = k1
+        assert k2 >= k1, "Errors have to be backpropagated through each chunk."
+        self.k1 = k1
+        self.k2 = k2
+        # Throughput of the last call to .train()
+        self.timestepsPerSecond = None
+
+    def train(self):
+        """Train the associated module for one epoch."""
+        start = time()
+        error = BackpropTrainer.train(self)
+        self.timestepsPerSecond = len(self.ds) / (time() - start)
+        if self.verbose:
+            print "Time steps per second:", self.timestepsPerSecond
+        return error
+
+    def _trainOnBatch(self, sequence, errors):
+        # The parameters are updated after every chunk instead.
+        return self.trainOnSequence(sequence)
+
+    def trainOnSequence(self, sequence):
+        """Reset the module and train it on a sequence of samples, which can be
+        any iterable (e.g. a generator that yields the samples of a stream).
+        Return the summed error and its ponderation."""
+        module = self.module
+        previous = module.historylimit
+        module.limitHistory(self.k2)
+        try:
+            module.reset()
+            errors = 0
+            ponderation = 0.
+            chunk = []
+            for sample in sequence:
+                chunk.append(sample)
+                if len(chunk) == self.k1:
+                    e, p = self._trainOnChunk(chunk)
+                    errors += e
+                    ponderation += p
+                    chunk = []
+            if chunk:
+                e, p = self._trainOnChunk(chunk)
+                errors += e
+                ponderation += p
+        finally:
+            module.limitHistory(previous)
+        return errors, ponderation
+
+    def _trainOnChunk(self, chunk):
+        """Continue the current sequence with the given samples and
+        backpropagate the errors through the last `k2` time steps."""
+        module = self.module
+        outputs = [module.activate(sample[0]) for sample in chunk]
+        end = module.offset
+        window = min(self.k2, end)
+        # The older time steps of the window have been backpropagated through
+        # before.
+        module._resetErrors(slice(end - window, end))
+        error = 0
+        ponderation = 0.
+        for back in xrange(window):
+            if back < len(chunk):
+                sample = chunk[-1 - back]
+                outerr = sample[1] - outputs[-1 - back]
+                if len(sample) > 2:
+                    importance = sample[2]
+                    error += 0.5 * dot(importance, outerr ** 2)
+                    ponderation += sum(importance)
+                    outerr = outerr * importance
+                else:
+                    error += 0.5 * sum(outerr ** 2)
+                    ponderation += len(outerr)
+            else:
+                # Only the errors of the new time steps are injected.
+                outerr = zeros(module.outdim)
+            module.backActivate(outerr)
+        module.offset = end
+
+        if not self.batchlearning:
+            self._descend(error)
+        return error, ponderation
@@ -0,0 +1,68 @@
+"""
+
+A checkpoint stores the topology of a network as JSON and its parameters as a
+binary array:
+
+    >>> import os, tempfile
+    >>> from scipy import random, float32
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.tools.checkpoint import writeCheckpoint, readCheckpoint
+    >>> f = tempfile.NamedTemporaryFile(dir=".")
+    >>> filename = f.name
+    >>> f.close()
+    >>> n = buildNetwork(3, 5, 2, recurrent=True)
+    >>> writeCheckpoint(n, filename)
+    >>> os.path.getsize(filename) % 64 == (8 * n.paramdim) % 64
+    True
+
+The network read back computes the same function:
+
+    >>> m = readCheckpoint(filename)
+    >>> m.name == n.name, m.__class__ is n.__class__
+    (True, True)
+    >>> X = random.randn(5, 3)
+    >>> n.reset()
+    >>> [abs(n.activate(x) - m.activate(x)).max() < 1e-12 for x in X]
+    [True, True, True, True, True]
+
+Its parameters are mapped from the file. By default, they can be changed
+without affecting the file:
+
+    >>> type(m.params.base).__name__
+    'memmap'
+    >>> m.params[:] = 0
+    >>> abs(readCheckpoint(filename).params - n.params).max()
+    0.0
+    >>> m = readCheckpoint(filename, mode='r')
+    >>> m.params.flags.writeable
+    False
+    >>> m = readCheckpoint(filename, mode=None)
+    >>> m.params.base is None
+    True
+
+The type of the parameters and the restriction to inference are kept as well,
+and so are shared weights:
+
+    >>> n = buildNetwork(3, 5, 2, dtype=float32, inferenceonly=True)
+    >>> writeCheckpoint(n, filename)
+    >>> m = readCheckpoint(filename)
+    >>> m.params.dtype, m.inferenceOnly
+    (dtype('float32'), True)
+    >>> from pybrain.structure.networks.custom.capturegame import CaptureGameNetwork
+    >>> n = CaptureGameNetwork(size=3, hsize=2)
+    >>> writeCheckpoint(n, filename)
+    >>> m = readCheckpoint(filename)
+    >>> len(m.motherconnections) == len(n.motherconnections)
+    True
+    >>> x = random.randn(n.indim)
+    >>> abs(n.activate(x) - m.activate(x)).max() < 1e-12
+    True
+
+    >>> os.unlink(filename)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,70 @@
+"""
+
+Build networks with the compiled backend and check that they compute the same
+as the interpreted ones.
+
+    >>> from scipy import array
+    >>> from scipy import random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer, CompiledFeedForwardNetwork, CompiledRecurrentNetwork
+    >>> from pybrain.tests import gradientCheck
+    
+A feed-forward network:
+    
+    >>> n = buildNetwork(3, 4, 2)
+    >>> f = n.convertToFastNetwork()
+    >>> isinstance(f, CompiledFeedForwardNetwork)
+    True
+    >>> X = random.randn(5, 3)
+    >>> abs(array([n.activate(x) for x in X]) - array([f.activate(x) for x in X])).max() < 1e-12
+    True
+    >>> gradientCheck(f)
+    Perfect gradient
+    True
+    
+A recurrent network with LSTM cells and peepholes can be compiled directly:
+
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, peepholes=True, fast=True)
+    >>> isinstance(n, CompiledRecurrentNetwork)
+    True
+    
+Backpropagation through time gives the same input errors and derivatives as
+in the interpreted network:
+
+    >>> s = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, peepholes=True)
+    >>> n = s.convertToFastNetwork()
+    >>> X = random.randn(10, 2)
+    >>> E = random.randn(10, 1)
+    >>> def backprop(net):
+    ...     net.reset()
+    ...     net.resetDerivatives()
+    ...     for x in X:
+    ...         net.activate(x)
+    ...     return array([net.backActivate(e) for e in E])
+    >>> abs(backprop(n) - backprop(s)).max(), abs(n.derivs - s.derivs).max()
+    (0.0, 0.0)
+    >>> abs(n.derivs).max() > 0
+    True
+    
+The plan is rebuilt when the buffers are grown, so long sequences work:
+    
+    >>> s = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, peepholes=True)
+    >>> n = s.convertToFastNetwork()
+    >>> X = random.randn(20, 2)
+    >>> abs(array([n.activate(x) for x in X]) - array([s.activate(x) for x in X])).max() < 1e-12
+    True
+    
+Parameter changes are seen by the compiled network:
+
+    >>> n.params[:] = 0
+    >>> n.reset()
+    >>> n.activate([1, 2])
+    array([ 0.])
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
+
@@ -0,0 +1,89 @@
+"""
+
+A convolution maps a plane of (height, width, channels) inputs to a plane of 
+feature maps, here from 5x6 positions with 2 channels to 3x3 positions with 4 
+feature maps:
+
+    >>> from scipy import array, zeros, random
+    >>> from pybrain.structure import FeedForwardNetwork, LinearLayer
+    >>> from pybrain.structure import ConvolutionConnection
+    >>> n = FeedForwardNetwork()
+    >>> n.addInputModule(LinearLayer(5 * 6 * 2, name='in'))
+    >>> n.addOutputModule(LinearLayer(3 * 3 * 4, name='out'))
+    >>> c = ConvolutionConnection(n['in'], n['out'], (5, 6, 2), (3, 4))
+    >>> n.addConnection(c)
+    >>> n.sortModules()
+    >>> c.paramdim, c.features
+    (96, 4)
+    
+Each output is the product of one kernel with the window of inputs it covers:
+    
+    >>> x = random.randn(5, 6, 2)
+    >>> out = n.activate(x.flatten()).reshape(3, 3, 4)
+    >>> kernels = c.params.reshape(4, 3, 4, 2)
+    >>> abs(out[1, 2, 3] - (kernels[3] * x[1:4, 2:6]).sum()) < 1e-12
+    True
+    
+Check its gradient, the batch path and whether it can be stored as XML:
+
+    >>> from pybrain.tests import gradientCheck, xmlInvariance
+    >>> gradientCheck(n)
+    Perfect gradient
+    True
+    >>> X = random.randn(4, 60)
+    >>> abs(n.activateBatch(X) - array([n.activate(x) for x in X])).max() < 1e-12
+    True
+    >>> xmlInvariance(n)
+    Same representation
+    Same function
+    Same class
+
+A padding connection surrounds a plane with a trainable value per channel:
+
+    >>> from pybrain.structure.connections.convolution import PaddingConnection
+    >>> n = FeedForwardNetwork()
+    >>> n.addInputModule(LinearLayer(2 * 2, name='in'))
+    >>> n.addOutputModule(LinearLayer(5 * 5, name='out'))
+    >>> n.addConnection(PaddingConnection(n['in'], n['out'], (2, 2, 1), (1, 2)))
+    >>> n.sortModules()
+    >>> n.params[:] = 7
+    >>> print n.activate([1, 2, 3, 4]).reshape(5, 5)
+    [[ 7.  7.  7.  7.  7.]
+     [ 7.  1.  2.  7.  7.]
+     [ 7.  3.  4.  7.  7.]
+     [ 7.  7.  7.  7.  7.]
+     [ 7.  7.  7.  7.  7.]]
+    >>> gradientCheck(n)
+    Perfect gradient
+    True
+
+buildNetwork connects layers that are given as planes by convolutions:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> n = buildNetwork((8, 8, 2), (6, 6, 5), 1)
+    >>> [c.__class__.__name__ for c in n.connections[n['in']]]
+    ['ConvolutionConnection']
+    >>> n.indim, n['hidden0'].indim, n.paramdim
+    (128, 180, 451)
+    
+Planes that cannot be convolved into each other are refused:
+
+    >>> buildNetwork((1, 6, 6), (2, 3, 3), 2)
+    Traceback (most recent call last):
+        ...
+    ValueError: Cannot convolve a plane of shape (1, 6, 6) to one of shape (2, 3, 3): both have to be (height, width, channels), and the second one cannot be higher or wider.
+    >>> buildNetwork((4, 4), (2, 2, 1), 1)
+    Traceback (most recent call last):
+        ...
+    ValueError: Cannot convolve a plane of shape (4, 4) to one of shape (2, 2, 1): both have to be (height, width, channels), and the second one cannot be higher or wider.
+    >>> ConvolutionConnection(LinearLayer(36), LinearLayer(18), (1, 6, 6), (0, 4))
+    Traceback (most recent call last):
+        ...
+    AssertionError: Kernels have to be at least 1x1 and fit into the input plane.
+    
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
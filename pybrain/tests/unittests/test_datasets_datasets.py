@@ -49,6 +49,145 @@ Build up a DataSet for testing:
            [ 1.,  1.]])
            
 
+Bulk construction
+=================
+
+Whole blocks of rows can be added to the linked fields at once:
+
+    >>> from scipy import arange
+    >>> d = datasets.SupervisedDataSet.fromArrays(arange(6).reshape(3, 2), 
+    ...                                           arange(3))
+    >>> len(d), d.indim, d.outdim
+    (3, 2, 1)
+    >>> d.extendLinked([[6, 7], [8, 9]], [[3], [4]])
+    >>> d['input'][-1], d['target'][-1]
+    (array([ 8.,  9.]), array([ 4.]))
+    >>> d.extendLinked([[6, 7], [8, 9]], [[3]])
+    Traceback (most recent call last):
+        ...
+    OutOfSyncError
+
+Room for samples that are still to come can be reserved in advance:
+    
+    >>> d.reserve(100)
+    >>> d.data['input'].shape, len(d)
+    ((100, 2), 5)
+    >>> d.addSample([10, 11], [5])
+    >>> d.data['input'].shape, len(d)
+    ((100, 2), 6)
+
+The other datasets are built from the arrays of their linked fields as well:
+
+    >>> d = datasets.ReinforcementDataSet.fromArrays(arange(4).reshape(2, 2),
+    ...                                              [0, 1], [0.5, 1])
+    >>> d.statedim, d.actiondim, d.getNumSequences()
+    (2, 1, 1)
+    >>> d['reward']
+    array([[ 0.5],
+           [ 1. ]])
+    >>> d = datasets.ClassificationDataSet.fromArrays(arange(4).reshape(2, 2),
+    ...                                               [1, 0], nb_classes=2)
+    >>> d.classHist
+    {0: 1, 1: 1}
+
+
+Sequences
+=========
+
+The starts of the sequences are kept as integers. Sequences are views of the
+fields:
+
+    >>> d = datasets.SequentialDataSet(1, 1)
+    >>> for length in [3, 1, 4, 2]:
+    ...     d.newSequence()
+    ...     for i in range(length):
+    ...         d.addSample([10 * length + i], [length])
+    >>> d['sequence_index'].ravel()
+    array([0, 3, 4, 8])
+    >>> [d.getSequenceLength(i) for i in range(d.getNumSequences())]
+    [3, 1, 4, 2]
+    >>> inp, target = d.getSequence(2)
+    >>> inp.ravel(), inp.base is not None
+    (array([ 40.,  41.,  42.,  43.]), True)
+    >>> d.gotoSequence(2)
+    >>> d.index, d.getCurrentSequence()
+    (4, 2)
+    >>> d.getSequence(4)
+    Traceback (most recent call last):
+        ...
+    IndexError: sequence does not exist.
+
+Removing a sequence moves the following samples to its place:
+
+    >>> d.removeSequence(1)
+    >>> d['input'].ravel(), d['sequence_index'].ravel(), d.index
+    (array([ 30.,  31.,  32.,  40.,  41.,  42.,  43.,  20.,  21.]), array([0, 3, 7]), 3)
+    >>> d.removeSequence(2)
+    >>> d.getNumSequences(), len(d), d.index
+    (2, 7, 7)
+
+Data sets that were saved with a float index are converted when it is used:
+
+    >>> d.setField('sequence_index', d['sequence_index'].astype(float))
+    >>> d.getSequence(1)[1].ravel()
+    array([ 4.,  4.,  4.,  4.])
+    >>> d['sequence_index'].dtype
+    dtype('int64')
+
+
+Splitting
+=========
+
+Samples are split at random, keeping their order. A seed gives the same split
+every time:
+
+    >>> d = datasets.SupervisedDataSet.fromArrays(arange(20).reshape(10, 2), 
+    ...                                           arange(10))
+    >>> left, right = d.splitWithProportion(0.3, seed=1)
+    >>> left['target'].ravel(), right['target'].ravel()
+    (array([ 2.,  6.,  9.]), array([ 0.,  1.,  3.,  4.,  5.,  7.,  8.]))
+    >>> left.__class__.__name__, left.indim
+    ('SupervisedDataSet', 2)
+    >>> [f['target'].ravel() for f in d.splitIntoFolds(3, seed=0)]
+    [array([ 2.,  4.,  8.,  9.]), array([ 1.,  6.,  7.]), array([ 0.,  3.,  5.])]
+    >>> for training, test in d.crossValidationSplits(3, seed=0):
+    ...     print len(training), test['target'].ravel()
+    6 [ 2.  4.  8.  9.]
+    7 [ 1.  6.  7.]
+    7 [ 0.  3.  5.]
+
+Sequential data sets are split into whole sequences:
+
+    >>> d = datasets.SequentialDataSet(1, 1)
+    >>> for length in [3, 1, 4, 2]:
+    ...     d.newSequence()
+    ...     for i in range(length):
+    ...         d.addSample([10 * length + i], [length])
+    >>> left, right = d.splitWithProportion(0.5, seed=2)
+    >>> left['input'].ravel(), left['sequence_index'].ravel()
+    (array([ 40.,  41.,  42.,  43.,  20.,  21.]), array([0, 4]))
+    >>> right['input'].ravel(), right['sequence_index'].ravel()
+    (array([ 30.,  31.,  32.,  10.]), array([0, 3]))
+
+The stratified split keeps the proportions of the classes:
+
+    >>> d = datasets.ClassificationDataSet.fromArrays(
+    ...     arange(40).reshape(20, 2), [0] * 10 + [1] * 6 + [2] * 4, nb_classes=3)
+    >>> training, test, validation = d.stratifiedSplit(0.3, 0.2, seed=0)
+    >>> training['class'].ravel(), test['class'].ravel()
+    (array([0, 0, 0, 0, 0, 1, 1, 1, 1, 2, 2, 2]), array([0, 0, 0, 1, 2]))
+    >>> validation['class'].ravel()
+    array([0, 0, 1])
+    >>> d = datasets.SequenceClassificationDataSet(1, 1, nb_classes=2)
+    >>> for k in range(10):
+    ...     d.newSequence()
+    ...     for i in range(k % 3 + 1):
+    ...         d.addSample([k], [k % 2])
+    >>> training, test = d.stratifiedSplit(0.4, seed=3)
+    >>> training.getSequenceClass(), test.getSequenceClass()
+    (array([0, 1, 0, 0, 1, 1]), array([1, 1, 0, 0]))
+
+
 Serialization
 =============
     
@@ -127,6 +266,55 @@ ReinforcementDataSet
     >>> d.addSample([1,], [1,], [1,])
     >>> saveInvariant(d)
     True
+
+
+NumPy archives
+--------------
+
+Datasets of all classes can be saved as .npz archive of their used rows:
+
+    >>> from scipy import random
+    >>> sets = [datasets.UnsupervisedDataSet.fromArrays(random.randn(5, 2)),
+    ...         datasets.SupervisedDataSet.fromArrays(random.randn(5, 2), 
+    ...                                               random.randn(5)),
+    ...         datasets.ImportanceDataSet.fromArrays(random.randn(5, 2), 
+    ...                                               random.randn(5, 3)),
+    ...         datasets.ClassificationDataSet.fromArrays(
+    ...             random.randn(5, 2), [0, 2, 1, 1, 0], nb_classes=3, 
+    ...             class_labels=class_labels),
+    ...         datasets.ReinforcementDataSet.fromArrays(
+    ...             random.randn(5, 2), [0, 1, 1, 0, 1], random.randn(5))]
+    >>> seq = datasets.SequentialDataSet(1, 1)
+    >>> for i in range(5):
+    ...     if i % 2 == 0:
+    ...         seq.newSequence()
+    ...     seq.addSample([i], [-i])
+    >>> sets.append(seq)
+    >>> [npzInvariant(x) for x in sets]
+    [True, True, True, True, True, True]
+    >>> seq.data['input'].shape[0] > len(seq)
+    True
+    >>> s = StringIO()
+    >>> seq.saveToFileLike(s, format='npz', compressed=True)
+    >>> s.seek(0)
+    >>> x = datasets.SequentialDataSet.loadFromFileLike(s, format='npz')
+    >>> x.data['input'].shape[0], x.getNumSequences(), x.getSequence(2)
+    (5, 3, [array([[ 4.]]), array([[-4.]])])
+    >>> x.addSample([5], [-5])
+    >>> len(x)
+    6
+
+The format is chosen by the extension of the file name as well:
+    
+    >>> import os, tempfile
+    >>> f = tempfile.NamedTemporaryFile(suffix='.npz', dir=".")
+    >>> filename = f.name
+    >>> f.close()
+    >>> sets[3].saveToFile(filename)
+    >>> x = datasets.ClassificationDataSet.loadFromFile(filename)
+    >>> x.nClasses, x.class_labels, x.getClass(int(x['class'][2]))
+    (3, ['Urd', 'Verdandi', 'Skuld'], 'Verdandi')
+    >>> os.unlink(filename)
     
       
 
@@ -141,6 +329,26 @@ from cStringIO import StringIO
 from pybrain.tests import runModuleTestSuite
 
 
+def npzInvariant(dataset):
+    # Save as .npz archive and compare the used rows
+    s = StringIO()
+    dataset.saveToFileLike(s, format='npz')
+    s.seek(0)
+    reconstructed = dataset.__class__.loadFromFileLike(s, format='npz')
+    if reconstructed.__class__ is not dataset.__class__:
+        return False
+    if (reconstructed.link != dataset.link or 
+        reconstructed.endmarker != dataset.endmarker or
+        sorted(reconstructed.data) != sorted(dataset.data)):
+        return False
+    for label in dataset.data:
+        if not (reconstructed[label] == dataset[label]).all():
+            return False
+        if reconstructed[label].dtype != dataset[label].dtype:
+            return False
+    return True
+
+
 def saveInvariant(dataset):
     # Save and reconstruct
     s = StringIO()
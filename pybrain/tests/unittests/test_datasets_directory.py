@@ -0,0 +1,102 @@
+"""
+
+A dataset can keep its fields in a directory, one memory-mapped file per
+field:
+
+    >>> import os, shutil, tempfile
+    >>> from scipy import arange
+    >>> from pybrain.datasets import SupervisedDataSet, SequentialDataSet
+    >>> from pybrain.datasets.dataset import DataSet
+    >>> path = tempfile.mkdtemp(dir=".")
+    >>> ds = SupervisedDataSet.fromArrays(arange(20.).reshape(10, 2), arange(10.))
+    >>> ds.storeInDirectory(os.path.join(path, 'sup'))
+    >>> type(ds['input']).__name__
+    'memmap'
+    >>> sorted(os.listdir(os.path.join(path, 'sup')))
+    ['dataset.json', 'input.dat', 'target.dat']
+
+Appending grows the files:
+
+    >>> for i in range(100):
+    ...     ds.addSample([i, i], [i])
+    >>> len(ds), type(ds.data['target']).__name__
+    (110, 'memmap')
+    >>> ds.flush()
+
+The dataset opened again maps its fields from the files:
+
+    >>> ds2 = DataSet.loadFromDirectory(os.path.join(path, 'sup'))
+    >>> ds2.__class__.__name__, ds2.indim, ds2.outdim, len(ds2)
+    ('SupervisedDataSet', 2, 1, 110)
+    >>> type(ds2['input']).__name__
+    'memmap'
+    >>> bool((ds2['input'] == ds['input']).all())
+    True
+    >>> ds2.getSample(3)
+    [memmap([ 6.,  7.]), memmap([ 3.])]
+    >>> [b.shape for b in ds2.batches('target', 50)]
+    [(50, 1), (50, 1), (10, 1)]
+    >>> ds2.addSample([-1, -1], [-1])
+    >>> ds2.flush()
+    >>> len(DataSet.loadFromDirectory(os.path.join(path, 'sup'), mode='r'))
+    111
+
+In mode 'r', the files are never written to; fields that are changed are copied 
+into memory first:
+
+    >>> ds4 = DataSet.loadFromDirectory(os.path.join(path, 'sup'), mode='r')
+    >>> len(ds4['input']) < ds4.data['input'].shape[0]
+    True
+    >>> ds4.addSample([0, 0], [0])
+    >>> type(ds4.data['input']).__name__, len(ds4)
+    ('ndarray', 112)
+    >>> len(DataSet.loadFromDirectory(os.path.join(path, 'sup')))
+    111
+
+Without writing back:
+
+    >>> ds3 = DataSet.loadFromDirectory(os.path.join(path, 'sup'), mode='c')
+    >>> ds3.reserve(1000)
+    >>> ds3.addSample([0, 0], [0])
+    >>> type(ds3.data['input']).__name__, len(ds3)
+    ('ndarray', 112)
+    >>> len(DataSet.loadFromDirectory(os.path.join(path, 'sup')))
+    111
+
+Sequences are kept as well:
+
+    >>> seq = SequentialDataSet(1, 1)
+    >>> seq.storeInDirectory(os.path.join(path, 'seq'))
+    >>> for length in [3, 1, 4]:
+    ...     seq.newSequence()
+    ...     for i in range(length):
+    ...         seq.addSample([i], [length])
+    >>> seq.flush()
+    >>> seq2 = DataSet.loadFromDirectory(os.path.join(path, 'seq'))
+    >>> seq2.getNumSequences()
+    3
+    >>> [len(s) for s in seq2._provideSequences()]
+    [3, 1, 4]
+    >>> seq2.getSequence(2)[1].ravel()
+    memmap([ 4.,  4.,  4.,  4.])
+    >>> seq2.clear()
+    >>> seq2.flush()
+    >>> len(DataSet.loadFromDirectory(os.path.join(path, 'seq')))
+    0
+
+Strings that are passed to the constructor come back as they were:
+
+    >>> from pybrain.datasets import ClassificationDataSet
+    >>> cls = ClassificationDataSet(2, nb_classes=2, class_labels=['no', 'yes'])
+    >>> cls.storeInDirectory(os.path.join(path, 'cls'))
+    >>> DataSet.loadFromDirectory(os.path.join(path, 'cls')).class_labels
+    ['no', 'yes']
+
+    >>> shutil.rmtree(path)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,99 @@
+"""
+
+An execution context holds the buffers of a network for one caller, while the
+weights stay those of the network:
+
+    >>> from scipy import array, ones, random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import ExecutionContext
+    >>> n = buildNetwork(3, 5, 2)
+    >>> ctx = ExecutionContext(n)
+    >>> ctx.module.params is n.params
+    True
+    >>> X = random.randn(20, 3)
+    >>> expected = array([n.activate(x) for x in X])
+    >>> abs(array([n.activate(x, ctx=ctx) for x in X]) - expected).max() < 1e-12
+    True
+
+Several threads can activate the network at the same time, each with its own
+context:
+
+    >>> import threading
+    >>> contexts = [ExecutionContext(n) for _ in range(4)]
+    >>> results = [None] * 4
+    >>> def run(i):
+    ...     results[i] = array([n.activate(x, ctx=contexts[i]) for x in X])
+    >>> threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+    >>> for t in threads: t.start()
+    >>> for t in threads: t.join()
+    >>> [abs(r - expected).max() < 1e-12 for r in results]
+    [True, True, True, True]
+
+The contexts see the changes of the weights, also if the network gets a new
+parameter array:
+
+    >>> n.params[:] = 0
+    >>> n.activate(X[0], ctx=ctx)
+    array([ 0.,  0.])
+    >>> n._setParameters(ones(n.paramdim))
+    >>> abs(n.activate(X[0], ctx=ctx) - n.activate(X[0])).max() < 1e-12
+    True
+
+A context can only be used with the network it was created for:
+
+    >>> buildNetwork(3, 5, 2).activate(X[0], ctx=ctx)
+    Traceback (most recent call last):
+        ...
+    AssertionError: The context belongs to another module.
+
+Recurrent networks keep the state of every caller in its context:
+
+    >>> n = buildNetwork(3, 5, 2, recurrent=True)
+    >>> expected = array([n.activate(x) for x in X])
+    >>> a, b = ExecutionContext(n), ExecutionContext(n)
+    >>> first = [n.activate(x, ctx=a) for x in X[:10]]
+    >>> second = [n.activate(x, ctx=b) for x in X]
+    >>> first += [n.activate(x, ctx=a) for x in X[10:]]
+    >>> abs(array(first) - expected).max() < 1e-12
+    True
+    >>> abs(array(second) - expected).max() < 1e-12
+    True
+    >>> a.module.offset, n.offset
+    (20, 20)
+
+Contexts are inference only by default. Others accumulate derivatives of their
+own:
+
+    >>> a.module.inferenceOnly
+    True
+    >>> ctx = ExecutionContext(n, inferenceOnly=False)
+    >>> n.reset()
+    >>> n.resetDerivatives()
+    >>> _ = n.activate(X[0])
+    >>> _ = n.backActivate(ones(2))
+    >>> _ = ctx.activate(X[0])
+    >>> _ = ctx.backActivate(ones(2))
+    >>> ctx.derivs is n.derivs
+    False
+    >>> abs(ctx.derivs - n.derivs).max() < 1e-12
+    True
+
+The backward pass also uses a parameter array that the network got in between:
+
+    >>> n.reset()
+    >>> ctx.reset()
+    >>> _ = n.activate(X[0])
+    >>> _ = ctx.activate(X[0])
+    >>> n._setParameters(random.randn(n.paramdim))
+    >>> inerr = ctx.backActivate(ones(2))
+    >>> ctx.module.params is n.params
+    True
+    >>> abs(inerr - n.backActivate(ones(2))).max() < 1e-12
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
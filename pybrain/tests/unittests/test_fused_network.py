@@ -0,0 +1,67 @@
+"""
+
+A fused network computes every layer together with its incoming full
+connections in one step. The connections from the bias unit are folded into
+bias vectors:
+
+    >>> from scipy import array, ones, random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> n = buildNetwork(3, 5, 4, 2, fused=True)
+    >>> n.fused
+    True
+    >>> sorted(m.name for m in n._fusedModules())
+    ['hidden0', 'hidden1', 'out']
+    >>> len(n._plan['forward']), len(n._plan['backward'])
+    (5, 5)
+
+It gives the same results as the network without fusion:
+
+    >>> plain = n.copy()
+    >>> plain.fused = False
+    >>> X = random.randn(4, 3)
+    >>> outputs = array([n.activate(x) for x in X])
+    >>> abs(outputs - array([plain.activate(x) for x in X])).max() < 1e-12
+    True
+    >>> abs(n.backActivate(ones(2)) - plain.backActivate(ones(2))).max() < 1e-12
+    True
+
+The weights are still the parameters of the connections, so training works
+as before:
+
+    >>> from pybrain.tests import gradientCheck
+    >>> gradientCheck(n)
+    Perfect gradient
+    True
+    >>> n.params[:] = 0
+    >>> n.activate(X[0])
+    array([ 0.,  0.])
+
+Layers that are fed back into by recurrent connections are not fused:
+
+    >>> from pybrain.structure import LSTMLayer
+    >>> n = buildNetwork(3, 4, 2, hiddenclass=LSTMLayer, fused=True)
+    >>> sorted(m.name for m in n._fusedModules())
+    ['out']
+    
+Backpropagation through time gives the same input errors and derivatives as
+without fusion:
+
+    >>> plain = n.copy()
+    >>> plain.fused = False
+    >>> X = random.randn(10, 3)
+    >>> E = random.randn(10, 2)
+    >>> def backprop(net):
+    ...     net.reset()
+    ...     net.resetDerivatives()
+    ...     for x in X:
+    ...         net.activate(x)
+    ...     return array([net.backActivate(e) for e in E])
+    >>> abs(backprop(n) - backprop(plain)).max(), abs(n.derivs - plain.derivs).max()
+    (0.0, 0.0)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
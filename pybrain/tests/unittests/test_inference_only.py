@@ -0,0 +1,54 @@
+"""
+
+Inference only networks allocate neither error buffers nor derivatives:
+
+    >>> from scipy import random, ones
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> n = buildNetwork(3, 5, 2)
+    >>> m = n.copy()
+    >>> m.setInferenceOnly()
+    >>> m.derivs is None, m['hidden0'].outputerror is None
+    (True, True)
+    >>> m.connections[m['in']][0].derivs is None
+    True
+    
+They compute the same function as before, and so do their copies:
+
+    >>> X = random.randn(4, 3)
+    >>> abs(n.activate(X[0]) - m.activate(X[0])).max()
+    0.0
+    >>> abs(n.activateBatch(X) - m.copy().activateBatch(X)).max()
+    0.0
+    
+But they cannot be backpropagated through:
+
+    >>> m.backActivate([1, 1])
+    Traceback (most recent call last):
+        ...
+    AssertionError: Inference only modules have no errors.
+    
+The restriction can be lifted again, which allocates fresh derivatives:
+
+    >>> m.setInferenceOnly(False)
+    >>> m.derivs.shape == m.params.shape, m['hidden0'].outputerror.shape
+    (True, (1, 5))
+    >>> _ = m.activate(X[0])
+    >>> abs(m.backActivate([1, 1]) - n.backActivate([1, 1])).max()
+    0.0
+    
+Recurrent and compiled networks can be built in that mode right away:
+
+    >>> from pybrain.structure import LSTMLayer
+    >>> r = buildNetwork(3, 4, 2, hiddenclass=LSTMLayer, fast=True,
+    ...                  inferenceonly=True)
+    >>> r['hidden0'].stateError is None
+    True
+    >>> r.activateSequence(X).shape
+    (4, 2)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,90 @@
+"""
+
+Check that the minibatch path of a feed-forward network gives the same results
+as activating the samples one by one.
+
+    >>> from scipy import array, zeros
+    >>> from scipy import random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import SoftmaxLayer, TanhLayer
+    >>> n = buildNetwork(3, 5, 4, 2, hiddenclass=TanhLayer, outclass=SoftmaxLayer)
+    >>> X = random.randn(7, 3)
+    >>> E = random.randn(7, 2)
+    
+The forward pass:
+    
+    >>> single = array([n.activate(x) for x in X])
+    >>> batch = n.activateBatch(X)
+    >>> batch.shape
+    (7, 2)
+    >>> abs(single - batch).max() < 1e-12
+    True
+    
+The backward pass accumulates the derivatives of all samples:
+    
+    >>> n.resetDerivatives()
+    >>> inerrs = []
+    >>> for x, e in zip(X, E):
+    ...     _ = n.activate(x)
+    ...     inerrs.append(n.backActivate(e))
+    >>> singlederivs = n.derivs.copy()
+    >>> n.resetDerivatives()
+    >>> _ = n.activateBatch(X)
+    >>> batchinerrs = n.backActivateBatch(E)
+    >>> abs(array(inerrs) - batchinerrs).max() < 1e-12
+    True
+    >>> abs(singlederivs - n.derivs).max() < 1e-12
+    True
+    
+Modules without a vectorized implementation fall back to processing the rows
+one by one:
+
+    >>> from pybrain.structure import FeedForwardNetwork, LinearLayer, GateLayer
+    >>> from pybrain.structure import FullConnection
+    >>> n = FeedForwardNetwork()
+    >>> n.addInputModule(LinearLayer(4, name='in'))
+    >>> n.addOutputModule(GateLayer(2, name='out'))
+    >>> n.addConnection(FullConnection(n['in'], n['out']))
+    >>> n.sortModules()
+    >>> X = random.randn(5, 4)
+    >>> abs(array([n.activate(x) for x in X]) - n.activateBatch(X)).max() < 1e-12
+    True
+    
+The trainer uses the batch path to evaluate the network on a dataset:
+
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.supervised import BackpropTrainer
+    >>> n = buildNetwork(2, 3, 1)
+    >>> ds = SupervisedDataSet(2, 1)
+    >>> for x, y in [((0, 0), (0,)), ((0, 1), (1,)), ((1, 0), (1,)), ((1, 1), (0,))]:
+    ...     ds.addSample(x, y)
+    >>> t = BackpropTrainer(n, ds)
+    >>> abs(t.testOnData() - t.testOnData(verbose=True)) < 1e-12 # doctest: +ELLIPSIS
+    <BLANKLINE>
+    Testing on data:
+    ...
+    True
+    
+Results can be written into preallocated arrays instead of new ones:
+
+    >>> out = zeros((4, 1))
+    >>> X = ds['input']
+    >>> n.activateBatch(X, out) is out
+    True
+    >>> row = zeros(1)
+    >>> n.activate(X[2], row) is row, (row == out[2]).all()
+    (True, True)
+    >>> from pybrain.structure import LSTMLayer
+    >>> r = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer)
+    >>> first = r.activate(X[0])
+    >>> r.reset()
+    >>> r.activate(X[0], row) is row, (row == first).all()
+    (True, True)
+    
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
+
@@ -0,0 +1,72 @@
+"""
+
+The parameters of all modules and connections of a network are views on one
+contiguous array:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import FullConnection, LinearLayer
+    >>> n = buildNetwork(2, 3, 1)
+    >>> c = n.connections[n['in']][0]
+    >>> c.params[0] = 42
+    >>> 42 in n.params
+    True
+    
+Sorting the network again does not copy anything as long as its structure is 
+unchanged:
+
+    >>> params, derivs = n.params, n.derivs
+    >>> n.sorted = False
+    >>> n.sortModules()
+    >>> n.params is params, n.derivs is derivs
+    (True, True)
+    
+When connections are added, the values of the existing parameters and 
+derivatives are kept:
+
+    >>> old = n.params.copy()
+    >>> n.derivs[:] = 1
+    >>> n.addModule(LinearLayer(4, name='extra'))
+    >>> n.addConnection(FullConnection(n['extra'], n['out']))
+    >>> n.sortModules()
+    >>> n.paramdim
+    17
+    >>> set(old) <= set(n.params), n.derivs.sum()
+    (True, 13.0)
+    
+This also holds for copies of the network:
+
+    >>> m = n.copy()
+    >>> m.derivs[:] = 5
+    >>> m.connections[m['in']][0].derivs
+    array([ 5.,  5.,  5.,  5.,  5.,  5.])
+    
+Compiled networks own their parameter arrays; their copies are linked the same
+way:
+
+    >>> f = buildNetwork(2, 3, 1).convertToFastNetwork()
+    >>> cp = f.copy()
+    >>> cp.derivs[:] = 7
+    >>> cp.params[:] = 3
+    >>> c = cp.connections[cp['in']][0]
+    >>> c.derivs.max(), c.params.min(), f.params.max() != 3
+    (7.0, 3.0, True)
+    
+Nested networks become part of the array of the outer network:
+
+    >>> from pybrain.structure import FeedForwardNetwork
+    >>> inner = buildNetwork(2, 2)
+    >>> outer = FeedForwardNetwork()
+    >>> outer.addInputModule(LinearLayer(2, name='in'))
+    >>> outer.addOutputModule(inner)
+    >>> outer.addConnection(FullConnection(outer['in'], inner))
+    >>> outer.sortModules()
+    >>> outer.params[:] = 0
+    >>> abs(inner.params).max(), abs(inner.connections[inner['in']][0].params).max()
+    (0.0, 0.0)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,76 @@
+"""
+
+A profiler counts the calls of the kernels of all modules and connections of a
+network and measures their time, but only while it is enabled:
+
+    >>> from scipy import ones
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.tools.profiling import NetworkProfiler
+    >>> n = buildNetwork(2, 3, 1, fast=True, fused=True)
+    >>> profiler = NetworkProfiler(n)
+    >>> y = n.activate([1, 2])
+    >>> profiler.stats()
+    {}
+    >>> profiler.enable()
+    >>> (n.activate([1, 2]) == y).all()
+    True
+    >>> _ = n.backActivate(ones(1))
+    >>> _ = n.activateBatch(ones((5, 2)))
+    >>> profiler.disable()
+    >>> _ = n.activate([1, 2])
+    >>> stats = profiler.stats(groupby='class')
+    >>> for key in sorted(stats):
+    ...     print key, stats[key][0]
+    ('BiasUnit', 'backward') 1
+    ('BiasUnit', 'forward') 2
+    ('FullConnection', 'backward') 4
+    ('FullConnection', 'forward') 8
+    ('LinearLayer', 'backward') 2
+    ('LinearLayer', 'forward') 4
+    ('SigmoidLayer', 'backward') 1
+    ('SigmoidLayer', 'forward') 2
+    >>> profiler.stats()[('hidden0', 'forward')][0]
+    2
+
+The records can be shown as a table:
+
+    >>> print profiler.report(sortby='name').splitlines()[0]
+    name     pass          calls     time (s)  per call (us)
+    >>> len(profiler.report().splitlines())
+    17
+
+LSTM layers process whole sequences at once when a recurrent network is
+trained; they are timed as well:
+
+    >>> from scipy import random
+    >>> from pybrain.structure import LSTMLayer
+    >>> from pybrain.datasets import SequentialDataSet
+    >>> from pybrain.supervised import BackpropTrainer
+    >>> r = buildNetwork(2, 4, 1, hiddenclass=LSTMLayer, recurrent=True)
+    >>> ds = SequentialDataSet(2, 1)
+    >>> for i in range(3):
+    ...     ds.newSequence()
+    ...     for j in range(5):
+    ...         ds.addSample(random.randn(2), random.randn(1))
+    >>> with NetworkProfiler(r) as p:
+    ...     _ = BackpropTrainer(r, ds).train()
+    >>> lstm = p.stats(groupby='class')
+    >>> ('LSTMLayer', 'forward') in lstm, ('LSTMLayer', 'backward') in lstm
+    (True, True)
+    >>> [m for m in r.modules if 'forwardSequence' in m.__dict__]
+    []
+
+Afterwards, the network does not carry any instrumentation:
+
+    >>> [m for m in n.modules if '_forwardImplementation' in m.__dict__]
+    []
+    >>> profiler.reset()
+    >>> profiler.stats()
+    {}
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,89 @@
+"""
+
+The full connections of a network can store their weights as 8 bit integers,
+with a scale for every output:
+
+    >>> from scipy import array, int8, float16, random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.tools.quantization import quantizeNetwork, weightBytes
+    >>> n = buildNetwork(4, 6, 2)
+    >>> q = quantizeNetwork(n)
+    >>> q.inferenceOnly, q.paramdim
+    (True, 0)
+    >>> c = q.connections[q['hidden0']][0]
+    >>> c.__class__.__name__, c.weights.dtype
+    ('QuantizedFullConnection', dtype('int8'))
+    >>> abs(c.weights).max()
+    127
+    >>> abs(c.dequantized().ravel() - n.connections[n['hidden0']][0].params).max() < 0.01
+    True
+    >>> weightBytes(q) < weightBytes(n) / 2
+    True
+
+The outputs hardly change, for single inputs as well as for batches:
+
+    >>> X = random.randn(5, 4)
+    >>> Y = array([n.activate(x) for x in X])
+    >>> abs(array([q.activate(x) for x in X]) - Y).max() < 0.1
+    True
+    >>> abs(q.activateBatch(X) - array([q.activate(x) for x in X])).max() < 1e-6
+    True
+
+Half precision floats are supported as well:
+
+    >>> q = quantizeNetwork(n, float16)
+    >>> q.connections[q['hidden0']][0].weights.dtype
+    dtype('float16')
+    >>> abs(array([q.activate(x) for x in X]) - Y).max() < 0.01
+    True
+
+Quantized networks can be written to XML files and to checkpoints:
+
+    >>> from pybrain.tests import xmlInvariance
+    >>> xmlInvariance(quantizeNetwork(n))
+    Same representation
+    Same function
+    Same class
+    >>> xmlInvariance(q)
+    Same representation
+    Same function
+    Same class
+    >>> import os, tempfile
+    >>> from pybrain.tools.checkpoint import writeCheckpoint, readCheckpoint
+    >>> f = tempfile.NamedTemporaryFile(dir=".")
+    >>> filename = f.name
+    >>> f.close()
+    >>> writeCheckpoint(q, filename)
+    >>> r = readCheckpoint(filename)
+    >>> r.connections[r['hidden0']][0].weights.dtype, r.inferenceOnly
+    (dtype('float16'), True)
+    >>> abs(r.activateBatch(X) - q.activateBatch(X)).max()
+    0.0
+    >>> os.unlink(filename)
+
+The report compares the quantized networks to the original one on a dataset:
+
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.tools.quantization import quantizationReport
+    >>> ds = SupervisedDataSet(4, 2)
+    >>> for x in X:
+    ...     ds.addSample(x, [0, 1])
+    >>> lines = quantizationReport(n, ds).splitlines()
+    >>> [l.split()[0] for l in lines]
+    ['weights', 'float64', 'int8', 'float16']
+
+The reference row shows the type of the network:
+
+    >>> from scipy import float32
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> m = buildNetwork(4, 3, 2, dtype=float32)
+    >>> lines = quantizationReport(m, ds).splitlines()
+    >>> lines[1].split()[:2] == ['float32', str(4 * m.paramdim)]
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
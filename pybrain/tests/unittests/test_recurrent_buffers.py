@@ -0,0 +1,85 @@
+"""
+
+Buffers of recurrent networks can be allocated in advance for a given sequence
+length:
+
+    >>> from scipy import array, random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, peepholes=True)
+    >>> n.params[:] = random.randn(n.paramdim)
+    >>> m = n.copy()
+    >>> n.reserveBuffers(100)
+    >>> n.inputbuffer.shape
+    (101, 2)
+    >>> n['hidden0'].state.shape
+    (101, 3)
+    
+Activating the network for that many steps does not reallocate them:
+
+    >>> buf = n.inputbuffer
+    >>> X = random.randn(100, 2)
+    >>> outputs = array([n.activate(x) for x in X])
+    >>> n.inputbuffer is buf
+    True
+    
+With a limited history, only the recent time steps are kept and the buffers 
+are never reallocated:
+
+    >>> m.limitHistory(10)
+    >>> buf = m.inputbuffer
+    >>> limitedOutputs = array([m.activate(x) for x in X])
+    >>> m.inputbuffer is buf, buf.shape
+    (True, (22, 2))
+    >>> abs(outputs - limitedOutputs).max() < 1e-12
+    True
+    
+Backpropagation through the last time steps gives the same errors and 
+derivatives as with the complete history:
+
+    >>> E = random.randn(10, 1)
+    >>> n.resetDerivatives()
+    >>> m.resetDerivatives()
+    >>> inerrs = array([n.backActivate(e) for e in E])
+    >>> limitedInerrs = array([m.backActivate(e) for e in E])
+    >>> abs(inerrs - limitedInerrs).max() < 1e-12
+    True
+    >>> abs(n.derivs - m.derivs).max() < 1e-12
+    True
+
+Whole sequences are kept until they have been backpropagated through, then the
+buffers are shrunk back:
+
+    >>> from pybrain.datasets import SequentialDataSet
+    >>> from pybrain.supervised.trainers import BackpropTrainer
+    >>> m.limitHistory(6)
+    >>> ds = SequentialDataSet(2, 1)
+    >>> ds.newSequence()
+    >>> for x in X[:20]:
+    ...     ds.addSample(x, [1])
+    >>> error = BackpropTrainer(m, ds).train()
+    >>> m.inputbuffer.shape, m['hidden0'].state.shape
+    ((14, 2), (14, 3))
+    
+After a whole sequence, the network can be activated step by step within the
+limit again:
+
+    >>> n._setParameters(m.params.copy())
+    >>> n.reset()
+    >>> outputs = array([n.activate(x) for x in X[:25]])
+    >>> abs(m.activateSequence(X[:20]) - outputs[:20]).max() < 1e-12
+    True
+    >>> m.inputbuffer.shape
+    (21, 2)
+    >>> limitedOutputs = array([m.activate(x) for x in X[20:25]])
+    >>> abs(limitedOutputs - outputs[20:]).max() < 1e-12
+    True
+    >>> m.inputbuffer.shape
+    (14, 2)
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,46 @@
+"""
+
+An ActionValueNetwork evaluates all actions of a state in a single batch:
+
+    >>> from scipy import array, random, r_, argmax
+    >>> from pybrain.utilities import one_to_n
+    >>> from pybrain.rl.learners.valuebased import ActionValueNetwork, NFQ
+    >>> m = ActionValueNetwork(3, 4)
+    >>> s = random.randn(3)
+    >>> values = m.getActionValues(s)
+    >>> values.shape
+    (4,)
+    >>> single = [m.network.activate(r_[s, one_to_n(i, 4)])[0] for i in range(4)]
+    >>> abs(values - single).max() < 1e-12
+    True
+    >>> m.getMaxAction(s) == argmax(single)
+    True
+
+Many states at once:
+
+    >>> S = random.randn(5, 3)
+    >>> values = m.getActionValuesBatch(S)
+    >>> values.shape
+    (5, 4)
+    >>> abs(values[2] - m.getActionValues(S[2])).max() < 1e-12
+    True
+    >>> abs(m.getValues(S, [0, 1, 2, 3, 0]) - values[range(5), [0, 1, 2, 3, 0]]).max() < 1e-12
+    True
+
+NFQ builds its training set from these batches:
+
+    >>> from pybrain.datasets import ReinforcementDataSet
+    >>> ds = ReinforcementDataSet(3, 1)
+    >>> for _ in range(10):
+    ...     ds.addSample(random.randn(3), [random.randint(4)], [random.randn()])
+    >>> learner = NFQ(maxEpochs=2)
+    >>> learner.module = m
+    >>> learner.dataset = ds
+    >>> learner.learn()
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == '__main__':
+    runModuleTestSuite(__import__('__main__'))
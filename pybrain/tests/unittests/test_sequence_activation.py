@@ -0,0 +1,104 @@
+"""
+
+Check that processing a whole sequence at once gives the same results as 
+stepping through it one time step at a time.
+
+    >>> from scipy import array, random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer, TanhLayer
+    
+A helper that computes outputs, input errors and derivatives both ways:
+    
+    >>> def compare(net, X, E):
+    ...     net.reset()
+    ...     net.resetDerivatives()
+    ...     outs = array([net.activate(x) for x in X])
+    ...     inerrs = array([net.backActivate(e) for e in reversed(E)])[::-1]
+    ...     derivs = net.derivs.copy()
+    ...     net.resetDerivatives()
+    ...     seqouts = net.activateSequence(X)
+    ...     seqinerrs = net.backActivateSequence(E)
+    ...     return (abs(outs - seqouts).max() < 1e-10,
+    ...             abs(inerrs - seqinerrs).max() < 1e-10,
+    ...             abs(derivs - net.derivs).max() < 1e-10)
+    
+    >>> X = random.randn(9, 2)
+    >>> E = random.randn(9, 3)
+    
+An LSTM network with and without peepholes:
+
+    >>> n = buildNetwork(2, 4, 3, hiddenclass=LSTMLayer, recurrent=True)
+    >>> compare(n, X, E)
+    (True, True, True)
+    >>> n = buildNetwork(2, 4, 3, hiddenclass=LSTMLayer, recurrent=True, peepholes=True)
+    >>> compare(n, X, E)
+    (True, True, True)
+    
+An LSTM layer that does not feed back into itself processes the whole 
+sequence in one go:
+
+    >>> from pybrain.structure import RecurrentNetwork, LinearLayer, FullConnection
+    >>> n = RecurrentNetwork()
+    >>> n.addInputModule(LinearLayer(2, name='in'))
+    >>> n.addModule(LSTMLayer(4, name='hidden'))
+    >>> n.addOutputModule(LinearLayer(3, name='out'))
+    >>> n.addConnection(FullConnection(n['in'], n['hidden']))
+    >>> n.addConnection(FullConnection(n['hidden'], n['out']))
+    >>> n.sortModules()
+    >>> compare(n, X, E)
+    (True, True, True)
+    
+An MDLSTM layer keeps its internal state per time step, with and without 
+peepholes:
+
+    >>> from pybrain.structure.modules.mdlstm import MDLSTMLayer
+    >>> for peepholes in [False, True]:
+    ...     n = RecurrentNetwork()
+    ...     n.addInputModule(LinearLayer(2, name='in'))
+    ...     n.addModule(MDLSTMLayer(4, peepholes=peepholes, name='hidden'))
+    ...     n.addOutputModule(LinearLayer(3, name='out'))
+    ...     n.addConnection(FullConnection(n['in'], n['hidden']))
+    ...     n.addConnection(FullConnection(n['hidden'], n['out'], inSliceTo=4))
+    ...     n.sortModules()
+    ...     print compare(n, X, E)
+    (True, True, True)
+    (True, True, True)
+    
+A simple recurrent network, where the hidden layer feeds back into itself and 
+the output layer into the hidden layer:
+    
+    >>> n = buildNetwork(2, 5, 3, hiddenclass=TanhLayer, recurrent=True)
+    >>> n.addRecurrentConnection(FullConnection(n['hidden0'], n['hidden0']))
+    >>> n.addRecurrentConnection(FullConnection(n['out'], n['hidden0']))
+    >>> n.sortModules()
+    >>> compare(n, X, E)
+    (True, True, True)
+    
+The sequence can be shorter than the previous one:
+
+    >>> compare(n, X[:4], E[:4])
+    (True, True, True)
+    
+The trainer passes whole sequences to the network. Its derivatives point in 
+the direction of decreasing error, so they are the negative of the numerical 
+gradient:
+
+    >>> from pybrain.datasets import SequentialDataSet
+    >>> from pybrain.supervised import BackpropTrainer
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, recurrent=True)
+    >>> ds = SequentialDataSet(2, 1)
+    >>> for i in range(2):
+    ...     ds.newSequence()
+    ...     for j in range(5):
+    ...         ds.addSample(random.randn(2), random.randn(1))
+    >>> t = BackpropTrainer(n, ds)
+    >>> res = t._checkGradient(silent=True)
+    >>> max(abs(a + b) for r in res for a, b in r) < 1e-6
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
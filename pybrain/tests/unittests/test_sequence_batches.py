@@ -0,0 +1,89 @@
+"""
+
+Check that processing several sequences in lockstep gives the same results as
+processing them one after the other.
+
+    >>> from scipy import array, random, zeros
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer, FullConnection
+    
+A helper that computes outputs, input errors and derivatives both ways. The 
+sequences have different lengths and are padded at their end:
+    
+    >>> lengths = [5, 3, 7, 1]
+    >>> def compare(net, X, E):
+    ...     net.resetDerivatives()
+    ...     outs = zeros(X.shape[:2] + (net.outdim,))
+    ...     inerrs = zeros(X.shape)
+    ...     for i, l in enumerate(lengths):
+    ...         outs[i, :l] = net.activateSequence(X[i, :l])
+    ...         inerrs[i, :l] = net.backActivateSequence(E[i, :l])
+    ...     derivs = net.derivs.copy()
+    ...     net.resetDerivatives()
+    ...     batchouts = net.activateSequenceBatch(X, lengths)
+    ...     batchinerrs = net.backActivateSequenceBatch(E)
+    ...     return (abs(outs - batchouts).max() < 1e-10,
+    ...             abs(inerrs - batchinerrs).max() < 1e-10,
+    ...             abs(derivs - net.derivs).max() < 1e-10)
+    
+An LSTM network with peepholes, where the output also feeds back into the 
+hidden layer:
+
+    >>> n = buildNetwork(2, 4, 3, hiddenclass=LSTMLayer, peepholes=True)
+    >>> n.addRecurrentConnection(FullConnection(n['out'], n['hidden0']))
+    >>> n.sortModules()
+    >>> X = random.randn(4, 7, 2)
+    >>> E = random.randn(4, 7, 3)
+    >>> compare(n, X, E)
+    (True, True, True)
+    
+The outputs of padded time steps are zero:
+
+    >>> outs = n.activateSequenceBatch(X, lengths)
+    >>> outs.shape
+    (4, 7, 3)
+    >>> abs(outs[1, 3:]).max()
+    0.0
+    
+A multi-dimensional LSTM layer that passes its state on through a recurrent 
+connection:
+
+    >>> from pybrain.tests.unittests.test_simple_mdlstm import buildSimpleMDLSTMNetwork
+    >>> n = buildSimpleMDLSTMNetwork(peepholes=True)
+    >>> n.params[:] = random.randn(n.paramdim)
+    >>> compare(n, random.randn(4, 7, 1), random.randn(4, 7, 1))
+    (True, True, True)
+    
+The dataset groups sequences of similar length into padded batches:
+
+    >>> from pybrain.datasets import SequentialDataSet
+    >>> ds = SequentialDataSet(2, 1)
+    >>> for l in [3, 5, 2, 5, 4]:
+    ...     ds.newSequence()
+    ...     for j in range(l):
+    ...         ds.addSample(random.randn(2), random.randn(1))
+    >>> for arrays, seqlengths in ds.getPaddedSequenceBatches(2):
+    ...     print [a.shape for a in arrays], list(seqlengths)
+    [(2, 3, 2), (2, 3, 1)] [2, 3]
+    [(2, 5, 2), (2, 5, 1)] [4, 5]
+    [(1, 5, 2), (1, 5, 1)] [5]
+    
+Training on batches of sequences computes the same error and gradient as 
+training on one sequence after the other:
+
+    >>> from pybrain.supervised import BackpropTrainer
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer)
+    >>> m = n.copy()
+    >>> e1 = BackpropTrainer(n, ds, batchlearning=True).train()
+    >>> e2 = BackpropTrainer(m, ds, batchlearning=True, sequencebatchsize=2).train()
+    >>> abs(e1 - e2) < 1e-10
+    True
+    >>> abs(n.params - m.params).max() < 1e-10
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
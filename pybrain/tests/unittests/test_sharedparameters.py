@@ -0,0 +1,73 @@
+"""
+
+Parameter vectors can be kept in shared memory, one per slot. The network is
+attached to one slot at a time:
+
+    >>> from scipy import array, random, zeros
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.tools.sharedparameters import SharedParameters, ParallelEvaluator
+    >>> n = buildNetwork(3, 4, 1)
+    >>> shared = SharedParameters(n, slots=2)
+    >>> shared.vectors.shape == (2, n.paramdim)
+    True
+    >>> m = shared.attach(1)
+    >>> m is n, n.params.base is not None
+    (True, True)
+    >>> shared.vectors[1] = 0
+    >>> n.activate([1, 2, 3])
+    array([ 0.])
+
+Worker processes evaluate many candidates for the same topology. They only
+get the parameters of every candidate:
+
+    >>> x = array([1., 2., 3.])
+    >>> def evaluator(net):
+    ...     return net.activate(x)[0]
+    >>> candidates = random.randn(7, n.paramdim)
+    >>> expected = []
+    >>> for c in candidates:
+    ...     n._setParameters(c)
+    ...     expected.append(evaluator(n))
+    >>> pe = ParallelEvaluator(n, evaluator, processes=3)
+    >>> abs(array(pe(candidates)) - expected).max() < 1e-12
+    True
+    >>> pe.close()
+
+Every worker gets the next candidate as soon as it is done, so the results
+stay in order even if some candidates take longer than others:
+
+    >>> import time
+    >>> def slowEvaluator(net):
+    ...     time.sleep(0.02 * (net.params[0] > 0))
+    ...     return net.activate(x)[0]
+    >>> pe = ParallelEvaluator(n, slowEvaluator, processes=3)
+    >>> abs(array(pe(candidates)) - expected).max() < 1e-12
+    True
+    >>> pe.close()
+    
+Exceptions of the evaluator are raised in the calling process, and the workers
+keep running:
+
+    >>> def failingEvaluator(net):
+    ...     if net.params[0] > 100:
+    ...         raise ValueError("Parameter out of range.")
+    ...     return net.activate(x)[0]
+    >>> pe = ParallelEvaluator(n, failingEvaluator, processes=3)
+    >>> failing = candidates.copy()
+    >>> failing[4, 0] = 1000
+    >>> pe(failing)
+    Traceback (most recent call last):
+        ...
+    ValueError: Parameter out of range.
+    >>> abs(array(pe(candidates)) - expected).max() < 1e-12
+    True
+    >>> [w.is_alive() for w in pe.workers]
+    [True, True, True]
+    >>> pe.close()
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,63 @@
+"""
+
+Networks can be built with single precision parameters and buffers:
+
+    >>> from scipy import float32, random
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer
+    >>> n = buildNetwork(3, 5, 2, dtype=float32)
+    >>> n.params.dtype, n.derivs.dtype
+    (dtype('float32'), dtype('float32'))
+    >>> n['hidden0'].outputbuffer.dtype
+    dtype('float32')
+    >>> n.activate([1, 2, 3]).dtype
+    dtype('float32')
+    
+Existing networks can be converted, and compute the same function up to the 
+precision:
+
+    >>> m = buildNetwork(3, 4, 2, hiddenclass=LSTMLayer, peepholes=True)
+    >>> X = random.randn(10, 3)
+    >>> double = m.activateSequence(X)
+    >>> m.setDtype(float32)
+    >>> m['hidden0'].state.dtype, m.connections[m['in']][0].params.dtype
+    (dtype('float32'), dtype('float32'))
+    >>> abs(m.activateSequence(X) - double).max() < 1e-5
+    True
+
+Batch buffers that were allocated before the conversion are replaced as well:
+
+    >>> m = buildNetwork(3, 4, 2)
+    >>> double = m.activateBatch(X)
+    >>> m.setDtype(float32)
+    >>> single = m.activateBatch(X)
+    >>> single.dtype, m['hidden0'].outputbatch.dtype
+    (dtype('float32'), dtype('float32'))
+    >>> abs(single - double).max() < 1e-5
+    True
+    
+Datasets store their linked fields with the same type, and the trainer keeps
+everything in single precision:
+
+    >>> from pybrain.datasets import SupervisedDataSet
+    >>> from pybrain.supervised import BackpropTrainer
+    >>> ds = SupervisedDataSet(3, 2)
+    >>> ds.setDtype(float32)
+    >>> for i in range(10):
+    ...     ds.addSample(random.randn(3), random.randn(2))
+    >>> ds['input'].dtype, ds['target'].dtype
+    (dtype('float32'), dtype('float32'))
+    >>> t = BackpropTrainer(n, ds, momentum=0.9)
+    >>> _ = t.train()
+    >>> n.params.dtype, t.descent.momentumvector.dtype
+    (dtype('float32'), dtype('float32'))
+    >>> ds.clear()
+    >>> ds['input'].dtype
+    dtype('float32')
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
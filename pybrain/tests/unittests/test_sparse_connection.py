@@ -0,0 +1,73 @@
+"""
+
+A sparse connection only has the weights that are given by a mask:
+
+    >>> from scipy import array, ones, random
+    >>> from pybrain.structure import FeedForwardNetwork, LinearLayer
+    >>> from pybrain.structure import SparseConnection
+    >>> n = FeedForwardNetwork()
+    >>> n.addInputModule(LinearLayer(3, name='in'))
+    >>> n.addOutputModule(LinearLayer(2, name='out'))
+    >>> mask = [[True, False, True],
+    ...         [False, False, True]]
+    >>> c = SparseConnection(n['in'], n['out'], mask)
+    >>> n.addConnection(c)
+    >>> n.sortModules()
+    >>> n.paramdim
+    3
+    >>> c.indices, c.indptr
+    ([0, 2, 2], [0, 2, 3])
+    >>> n.params[:] = [1, 2, 3]
+    >>> n.activate([1, 10, 100])
+    array([ 201.,  300.])
+
+Check its gradient, the batch path and whether it can be stored as XML:
+
+    >>> from pybrain.tests import gradientCheck, xmlInvariance
+    >>> gradientCheck(n)
+    Perfect gradient
+    True
+    >>> X = random.randn(4, 3)
+    >>> abs(n.activateBatch(X) - array([n.activate(x) for x in X])).max() < 1e-12
+    True
+    >>> xmlInvariance(n)
+    Same representation
+    Same function
+    Same class
+
+The full connections of a network, here a recurrent one whose weights have
+been pruned, can be replaced by sparse ones that keep the weights that are not
+zero:
+
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> n = buildNetwork(4, 5, 2, recurrent=True)
+    >>> n.params[random.rand(n.paramdim) < 0.5] = 0
+    >>> from pybrain.tools.sparsity import sparsifyNetwork
+    >>> sparse = sparsifyNetwork(n)
+    >>> sparse.paramdim == (n.params != 0).sum()
+    True
+    >>> sorted(set(c.__class__.__name__ for c in sparse._containerIterator()))
+    ['SparseConnection']
+    >>> n.reset()
+    >>> abs(sparse.activate(ones(4)) - n.activate(ones(4))).max() < 1e-12
+    True
+    >>> gradientCheck(sparse)
+    Perfect gradient
+    True
+
+A masked module provides its network with only the enabled weights:
+
+    >>> from pybrain.structure.evolvables.maskedmodule import MaskedModule
+    >>> masked = MaskedModule(buildNetwork(4, 5, 2))
+    >>> sparse = masked.sparseModule()
+    >>> sparse.paramdim == masked.paramdim
+    True
+    >>> abs(sparse.activate(ones(4)) - masked.activate(ones(4))).max() < 1e-12
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,103 @@
+"""
+
+Build a recurrent network and a sequential dataset:
+
+    >>> from scipy import random, zeros
+    >>> from pybrain.tools.shortcuts import buildNetwork
+    >>> from pybrain.structure import LSTMLayer
+    >>> from pybrain.datasets import SequentialDataSet
+    >>> from pybrain.supervised import BackpropTrainer, TruncatedBPTTTrainer
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, peepholes=True)
+    >>> ds = SequentialDataSet(2, 1)
+    >>> for j in range(12):
+    ...     ds.addSample(random.randn(2), random.randn(1))
+    
+If the chunks are as long as the sequence, the gradient is the same as that of
+complete backpropagation through time:
+
+    >>> t = TruncatedBPTTTrainer(n, ds, k1=12, batchlearning=True)
+    >>> n.resetDerivatives()
+    >>> e, p = t.trainOnSequence(ds.getSequenceIterator(0))
+    >>> truncated = n.derivs.copy()
+    >>> n.resetDerivatives()
+    >>> e2, p2 = BackpropTrainer(n, ds)._calcDerivs(list(ds.getSequenceIterator(0)))
+    >>> abs(e - e2) < 1e-10, p == p2
+    (True, True)
+    >>> abs(truncated - n.derivs).max() < 1e-10
+    True
+    
+With chunks of k1 time steps that are shorter than the k2 time steps the errors
+are backpropagated through, every chunk adds the gradient of its own errors 
+through the last k2 steps; the older steps of that window get no errors. As a 
+reference, every window is replayed on a copy of the network with its full 
+history:
+
+    >>> X = ds['input']
+    >>> Y = ds['target']
+    >>> def reference(net, k1, k2):
+    ...     derivs = 0
+    ...     for end in range(k1, len(X) + 1, k1):
+    ...         m = net.copy()
+    ...         m.reset()
+    ...         m.resetDerivatives()
+    ...         outputs = [m.activate(x) for x in X[:end]]
+    ...         for t in reversed(range(max(0, end - k2), end)):
+    ...             if t >= end - k1:
+    ...                 m.backActivate(Y[t] - outputs[t])
+    ...             else:
+    ...                 m.backActivate(zeros(1))
+    ...         derivs = derivs + m.derivs
+    ...     return derivs
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer, peepholes=True)
+    >>> expected = reference(n, 4, 6)
+    >>> t = TruncatedBPTTTrainer(n, ds, k1=4, k2=6, batchlearning=True)
+    >>> n.resetDerivatives()
+    >>> e, p = t.trainOnSequence(ds.getSequenceIterator(0))
+    >>> abs(n.derivs - expected).max() < 1e-10
+    True
+    
+The truncation makes a difference:
+
+    >>> abs(n.derivs - reference(n, 4, 12)).max() > 1e-6
+    True
+    
+With shorter chunks, the state is carried on between them. Only the last `k2`
+time steps are kept, so that the network can be trained on a stream of samples
+with constant memory:
+
+    >>> n = buildNetwork(2, 3, 1, hiddenclass=LSTMLayer)
+    >>> t = TruncatedBPTTTrainer(n, k1=5, k2=10, learningrate=0.01)
+    >>> def stream(length):
+    ...     for j in xrange(length):
+    ...         x = random.randn(2)
+    ...         yield x, x[:1]
+    >>> e, p = t.trainOnSequence(stream(1000))
+    >>> p
+    1000.0
+    >>> n.inputbuffer.shape
+    (22, 2)
+    
+The limit only holds while the trainer works on a sequence; afterwards, the 
+network can be backpropagated through any number of time steps again:
+
+    >>> n.historylimit is None
+    True
+    >>> n.reset()
+    >>> outputs = [n.activate(random.randn(2)) for j in range(30)]
+    >>> inerrs = [n.backActivate(random.randn(1)) for j in range(30)]
+    >>> n.offset
+    0
+    
+Training an epoch reports the throughput:
+
+    >>> t.setData(ds)
+    >>> error = t.train()
+    >>> t.timestepsPerSecond > 0
+    True
+
+"""
+
+from pybrain.tests import runModuleTestSuite
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
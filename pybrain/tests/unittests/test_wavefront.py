@@ -0,0 +1,83 @@
+"""
+
+Swiping networks are evaluated along the wavefronts of all swiping directions
+at once. Build a 3x4 BorderSwipingNetwork with tanh units:
+
+    >>> from scipy import array, zeros, random
+    >>> from pybrain import ModuleMesh, LinearLayer, TanhLayer
+    >>> from pybrain.structure.networks import BorderSwipingNetwork
+    >>> inmesh = ModuleMesh.constructWithLayers(LinearLayer, 2, (3, 4), 'in')
+    >>> hmesh = ModuleMesh.constructWithLayers(TanhLayer, 3, (3, 4, 4), 'h')
+    >>> outmesh = ModuleMesh.constructWithLayers(LinearLayer, 1, (3, 4), 'out')
+    >>> n = BorderSwipingNetwork(inmesh, hmesh, outmesh)
+    >>> n.randomize()
+
+The cells of the grid are grouped by their distance to the corners, the
+12 hidden cells of every swiping direction are spread over 6 wavefronts:
+
+    >>> depth = n._moduleDepths()
+    >>> sorted(set(depth[m] for m in n.modules if m.name.startswith('h')))
+    [1, 2, 3, 4, 5, 6]
+
+The results are the same as for the evaluation module by module:
+
+    >>> x = random.randn(n.indim)
+    >>> y = n.activate(x)
+    >>> abs(y - moduleByModule(n, x)).max() < 1e-12
+    True
+
+Check its gradient:
+
+    >>> from pybrain.tests import gradientCheck
+    >>> gradientCheck(n)
+    Perfect gradient
+    True
+
+The same holds for multi-dimensional LSTM cells, whose states are passed on
+by identity connections:
+
+    >>> from pybrain import MDLSTMLayer
+    >>> from pybrain.structure.networks.custom.capturegame import CaptureGameNetwork
+    >>> n = CaptureGameNetwork(size=3, hsize=2, componentclass=MDLSTMLayer)
+    >>> n.randomize()
+    >>> x = random.randn(n.indim)
+    >>> abs(n.activate(x) - moduleByModule(n, x)).max() < 1e-12
+    True
+    >>> gradientCheck(n)
+    Perfect gradient
+    True
+
+Batches of MDLSTM inputs keep the values of every sample for the backward
+pass:
+
+    >>> m = MDLSTMLayer(3, 2)
+    >>> X = random.randn(4, m.indim)
+    >>> E = random.randn(4, m.outdim)
+    >>> Y = m.activateBatch(X)
+    >>> inerrs = m.backActivateBatch(E)
+    >>> single = []
+    >>> for x, e in zip(X, E):
+    ...     m.reset()
+    ...     _ = m.activate(x)
+    ...     single.append(m.backActivate(e))
+    >>> abs(inerrs - array(single)).max() < 1e-12
+    True
+
+"""
+
+from scipy import zeros
+
+from pybrain.structure.networks.feedforward import FeedForwardNetworkComponent
+from pybrain.tests import runModuleTestSuite
+
+
+def moduleByModule(n, x):
+    """Evaluate the network `n` on the input `x` one module after another."""
+    n.reset()
+    y = zeros(n.outdim)
+    FeedForwardNetworkComponent._forwardImplementation(n, x, y)
+    return y
+
+
+if __name__ == "__main__":
+    runModuleTestSuite(__import__('__main__'))
@@ -0,0 +1,261 @@
+"""Binary checkpoints of networks.
+
+A checkpoint file consists of
+
+  - the magic string 'PYBRAIN\\x01',
+  - the length of the header as a little-endian unsigned 64 bit integer,
+  - a JSON header with the topology of the network: the classes, names and
+    arguments of the network and all its modules and connections, and for
+    every parameter container the offset of its parameters,
+  - all parameters of the network as one contiguous little-endian array,
+    which starts at a multiple of 64 bytes.
+
+Other than the XML files, the parameters are never converted to text: they are
+written straight from the network's parameter array, and they can be
+memory-mapped into the network when it is read back."""
+
+import json
+import struct
+from inspect import isclass
+
+from scipy import dtype as _dtype, asarray, fromfile
+from numpy import memmap
+
+from pybrain.structure.connections.shared import SharedConnection
+from pybrain.structure.networks.network import Network
+from pybrain.structure.networks.recurrent import RecurrentNetwork
+from pybrain.utilities import canonicClassString, Named
+
+
+MAGIC = 'PYBRAIN\x01'
+
+# The parameters start at a multiple of this many bytes.
+ALIGNMENT = 64
+
+
+def writeCheckpoint(net, filename):
+    """Write the network to a new checkpoint file."""
+    dt = _dtype(net.dtype).newbyteorder('<')
+    header = {'dtype': dt.str,
+              'paramdim': net.paramdim,
+              'inferenceOnly': net.inferenceOnly,
+              'network': _describeNetwork(net, _offsets(net))}
+    header = json.dumps(header)
+    start = len(MAGIC) + 8 + len(header)
+    header += ' ' * (-start % ALIGNMENT)
+    f = open(filename, 'wb')
+    try:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        if net.paramdim > 0:
+            asarray(net.params, dtype=dt).tofile(f)
+    finally:
+        f.close()
+
+
+def readCheckpoint(filename, mode='c'):
+    """Read a network from a checkpoint file.
+
+    :key mode: how the parameters are mapped into memory, as for
+        numpy.memmap: 'r' for read only parameters, 'c' for parameters that
+        can be changed without affecting the file, 'r+' for parameters whose
+        changes are written back to the file. If None, the parameters are
+        read into memory."""
+    f = open(filename, 'rb')
+    try:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a network checkpoint." % filename)
+        length, = struct.unpack('<Q', f.read(8))
+        header = json.loads(f.read(length))
+        offset = f.tell()
+        dt = _dtype(str(header['dtype']))
+        paramdim = header['paramdim']
+        params = None
+        if paramdim > 0 and mode is None:
+            params = fromfile(f, dtype=dt, count=paramdim)
+    finally:
+        f.close()
+    if paramdim > 0 and mode is not None:
+        params = asarray(memmap(filename, dtype=dt, mode=mode,
+                                offset=offset, shape=(paramdim,)))
+
+    stored = {}
+    net = _buildNetwork(header['network'], {}, stored)
+    if dt != _dtype(net.dtype):
+        net.setDtype(dt.newbyteorder('='))
+    if header['inferenceOnly']:
+        net.setInferenceOnly()
+    if paramdim > 0:
+        _setParameters(net, params, stored)
+    return net
+
+
+def _setParameters(net, params, stored):
+    """Give the network the parameters that have been stored for its
+    containers. If they have been laid out in the same order as by the
+    network, the array becomes the network's parameter array."""
+    offsets = _offsets(net)
+    if params.dtype.isnative and params.dtype == net.params.dtype and \
+        all(offsets[x] == stored[x] for x in offsets):
+        net._setParameters(params)
+        return
+    for x, index in offsets.items():
+        start = stored[x]
+        net.params[index:index + x.paramdim] = params[start:start + x.paramdim]
+
+
+def _offsets(net, base=0, result=None):
+    """Return a dictionary with the index of the parameters of every container
+    of the network (but not the nested networks) in its parameter array."""
+    if result is None:
+        result = {}
+    index = base
+    for x in net._containerIterator():
+        if isinstance(x, Network):
+            _offsets(x, index, result)
+        else:
+            result[x] = index
+        index += x.paramdim
+    return result
+
+
+def _describeNetwork(net, offsets):
+    modules = []
+    # The input modules and the output modules come first, in order.
+    for m in net.inmodules:
+        modules.append(_describeModule(m, offsets, inmodule=True))
+    for m in net.outmodules:
+        if m not in net.inmodules:
+            modules.append(_describeModule(m, offsets, outmodule=True))
+    for m in net.modulesSorted:
+        if m not in net.inmodules and m not in net.outmodules:
+            modules.append(_describeModule(m, offsets))
+    connections = []
+    for m in net.modulesSorted:
+        for c in net.connections[m]:
+            connections.append(_describeBuildable(c, offsets))
+    if isinstance(net, RecurrentNetwork):
+        for c in net.recurrentConns:
+            d = _describeBuildable(c, offsets)
+            d['recurrent'] = True
+            connections.append(d)
+    return {'name': net.name,
+            'class': canonicClassString(net),
+            'args': _encodeArgs(net.argdict),
+            'modules': modules,
+            'mothers': [_describeBuildable(mc, offsets)
+                        for mc in net.motherconnections],
+            'connections': connections}
+
+
+def _describeModule(m, offsets, inmodule=False, outmodule=False):
+    if isinstance(m, Network):
+        d = _describeNetwork(m, offsets)
+    else:
+        d = _describeBuildable(m, offsets)
+    if inmodule:
+        d['inmodule'] = True
+    elif outmodule:
+        d['outmodule'] = True
+    return d
+
+
+def _describeBuildable(x, offsets):
+    d = {'name': x.name,
+         'class': canonicClassString(x),
+         'args': _encodeArgs(x.argdict)}
+    if x.paramdim > 0 and not isinstance(x, SharedConnection):
+        d['offset'] = offsets[x]
+    return d
+
+
+def _encodeArgs(argdict):
+    if not argdict:
+        return {}
+    return dict((name, _encode(val)) for name, val in argdict.items()
+                if val is not None)
+
+
+def _encode(val):
+    """Return a JSON representation of an argument. Everything that is not
+    a plain value is tagged with its kind."""
+    if isclass(val):
+        return {'class': canonicClassString(val)}
+    elif isinstance(val, Named):
+        return {'ref': val.name}
+    elif isinstance(val, tuple):
+        return {'tuple': [_encode(v) for v in val]}
+    elif isinstance(val, list):
+        return [_encode(v) for v in val]
+    elif hasattr(val, 'tolist'):
+        # Arrays and numpy scalars.
+        return {'array': val.tolist(), 'dtype': str(val.dtype)}
+    elif val is None or isinstance(val, (bool, int, long, float, basestring)):
+        return val
+    raise ValueError("Cannot store argument %r." % (val,))
+
+
+def _decode(val, named):
+    if isinstance(val, list):
+        return [_decode(v, named) for v in val]
+    elif not isinstance(val, dict):
+        if isinstance(val, unicode):
+            return str(val)
+        return val
+    elif 'class' in val:
+        return _classFromString(val['class'])
+    elif 'ref' in val:
+        return named[val['ref']]
+    elif 'tuple' in val:
+        return tuple(_decode(v, named) for v in val['tuple'])
+    result = asarray(val['array'], dtype=str(val['dtype']))
+    if result.ndim == 0:
+        return result[()]
+    return result
+
+
+def _decodeArgs(args, named):
+    return dict((str(name), _decode(val, named)) for name, val in args.items())
+
+
+def _classFromString(s):
+    modulename, _, classname = str(s).rpartition('.')
+    module = __import__(modulename, fromlist=[classname])
+    return getattr(module, classname)
+
+
+def _buildNetwork(d, named, stored):
+    net = _classFromString(d['class'])(**_decodeArgs(d['args'], named))
+    net.name = str(d['name'])
+    for md in d['modules']:
+        if 'modules' in md:
+            m = _buildNetwork(md, named, stored)
+        else:
+            m = _build(md, named, stored)
+        named[m.name] = m
+        if md.get('inmodule'):
+            net.addInputModule(m)
+        elif md.get('outmodule'):
+            net.addOutputModule(m)
+        else:
+            net.addModule(m)
+    for md in d['mothers']:
+        m = _build(md, named, stored)
+        named[m.name] = m
+    for cd in d['connections']:
+        c = _build(cd, named, stored)
+        if cd.get('recurrent'):
+            net.addRecurrentConnection(c)
+        else:
+            net.addConnection(c)
+    net.sortModules()
+    return net
+
+
+def _build(d, named, stored):
+    x = _classFromString(d['class'])(**_decodeArgs(d['args'], named))
+    x.name = str(d['name'])
+    if 'offset' in d:
+        stored[x] = d['offset']
+    return x
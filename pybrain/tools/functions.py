@@ -1,6 +1,7 @@
 __author__ = 'Tom Schaul, tom@idsia.ch'
 
 from scipy import array, exp, tanh, clip, log, dot, sqrt, power, pi, tan, diag, rand, real_if_close
+from scipy import asarray, float32
 from scipy.linalg import inv, det, svd, logm, expm2
 
 
@@ -48,6 +49,10 @@ def semilinearPrime(x):
 
 def safeExp(x):
     """ Bounded range for the exponential function (won't rpoduce inf or NaN). """         
+    x = asarray(x)
+    if x.dtype == float32:
+        # single precision overflows much earlier
+        return exp(clip(x, -88, 88))
     return exp(clip(x, -500, 500))
 
 
@@ -0,0 +1,180 @@
+"""Timing of the modules and connections of a network.
+
+A NetworkProfiler replaces the kernels of every module and connection of a
+network, and their methods for whole sequences and time steps, by ones that
+count their calls and measure the time they take:
+
+    profiler = NetworkProfiler(net)
+    profiler.enable()
+    trainer.train()
+    profiler.disable()
+    print profiler.report(groupby='class')
+
+Nothing is changed as long as the profiler is not enabled. While it is, the
+compiled and wavefront networks process the instrumented modules and
+connections one by one, without fusing or grouping them, so that their time
+can be attributed to them. Networks should not be copied while their
+profiler is enabled."""
+
+from timeit import default_timer
+
+from pybrain.structure.networks.network import Network
+
+
+# The kernels that are timed, and the pass they are counted for. Modules like
+# the LSTMLayer process sequences and time steps without going through their
+# single and batch kernels, so those entry points are timed as well.
+KERNELS = [('_forwardImplementation', 'forward'),
+           ('_backwardImplementation', 'backward'),
+           ('_forwardBatchImplementation', 'forward'),
+           ('_backwardBatchImplementation', 'backward'),
+           ('forwardSequence', 'forward'),
+           ('backwardSequence', 'backward'),
+           ('forwardStep', 'forward'),
+           ('backwardStep', 'backward')]
+
+
+def _timed(kernel, record, x, stack):
+    """Return a function that calls `kernel` and adds its time to `record`.
+    
+    The time of nested calls of other objects, e.g. of the recurrent 
+    connections a module applies between its time steps, is counted for them
+    only. Nested calls of the same object, e.g. of the kernel of a time step 
+    within a sequence, are not counted again."""
+    def timed(*args):
+        if stack and stack[-1][0] is x:
+            return kernel(*args)
+        frame = [x, 0.]
+        stack.append(frame)
+        start = default_timer()
+        try:
+            result = kernel(*args)
+        finally:
+            elapsed = default_timer() - start
+            stack.pop()
+        record[0] += 1
+        record[1] += elapsed - frame[1]
+        if stack:
+            stack[-1][1] += elapsed
+        return result
+    return timed
+
+
+class NetworkProfiler(object):
+    """Records the number of calls and the cumulated wall time of the forward
+    and backward passes of all modules and connections of a network."""
+
+    def __init__(self, net):
+        self.net = net
+        self.enabled = False
+        # Maps (object, pass) to a list [calls, seconds].
+        self.records = {}
+        # The timed calls in progress, with the time of their nested calls.
+        self._stack = []
+
+    def _components(self, net=None):
+        """Return the modules and connections of the network and its nested
+        networks, but not the networks themselves."""
+        if net is None:
+            net = self.net
+        result = []
+        for m in net.modules:
+            if isinstance(m, Network):
+                result.extend(self._components(m))
+            else:
+                result.append(m)
+        for conns in net.connections.values():
+            result.extend(conns)
+        result.extend(getattr(net, 'recurrentConns', []))
+        return result
+
+    def _networks(self, net=None):
+        if net is None:
+            net = self.net
+        result = [net]
+        for m in net.modules:
+            if isinstance(m, Network):
+                result.extend(self._networks(m))
+        return result
+
+    def _invalidate(self):
+        # Execution plans hold on to the kernels they were built with.
+        for net in self._networks():
+            if hasattr(net, '_invalidate'):
+                net._invalidate()
+
+    def enable(self):
+        """Start timing the modules and connections of the network."""
+        if self.enabled:
+            return
+        for x in self._components():
+            for attr, kind in KERNELS:
+                if not hasattr(x, attr):
+                    continue
+                record = self.records.setdefault((x, kind), [0, 0.])
+                setattr(x, attr, _timed(getattr(x, attr), record, x,
+                                        self._stack))
+        self.enabled = True
+        self._invalidate()
+
+    def disable(self):
+        """Stop timing and restore the original kernels. The records are
+        kept."""
+        if not self.enabled:
+            return
+        for x in self._components():
+            for attr, _ in KERNELS:
+                if attr in x.__dict__:
+                    delattr(x, attr)
+        self.enabled = False
+        self._invalidate()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.disable()
+
+    def reset(self):
+        """Set all records to zero."""
+        for record in self.records.values():
+            record[:] = [0, 0.]
+
+    def stats(self, groupby='name'):
+        """Return a dictionary that maps (key, pass) to the number of calls and
+        the cumulated time in seconds. The key is the name of every module and
+        connection if `groupby` is 'name', and the name of its class if it is
+        'class'."""
+        assert groupby in ('name', 'class')
+        result = {}
+        for (x, kind), (calls, seconds) in self.records.items():
+            if not calls:
+                continue
+            if groupby == 'name':
+                key = x.name
+            else:
+                key = x.__class__.__name__
+            total = result.setdefault((key, kind), [0, 0.])
+            total[0] += calls
+            total[1] += seconds
+        return dict((k, tuple(v)) for k, v in result.items())
+
+    def report(self, groupby='name', sortby='time'):
+        """Return a table of the records as a string.
+
+        :key groupby: 'name' or 'class', see .stats()
+        :key sortby: 'time', 'calls', 'percall' or 'name'"""
+        sortkeys = {'time': lambda (k, (c, s)): -s,
+                    'calls': lambda (k, (c, s)): -c,
+                    'percall': lambda (k, (c, s)): -s / c,
+                    'name': lambda (k, (c, s)): k}
+        rows = sorted(self.stats(groupby).items(), key=sortkeys[sortby])
+        width = max([len(groupby)] + [len(k) for (k, _), _ in rows])
+        lines = ['%-*s %-8s %10s %12s %14s' % (width, groupby, 'pass', 'calls',
+                                               'time (s)', 'per call (us)')]
+        for (key, kind), (calls, seconds) in rows:
+            lines.append('%-*s %-8s %10d %12.6f %14.2f'
+                         % (width, key, kind, calls, seconds,
+                            1e6 * seconds / calls))
+        return '\n'.join(lines)
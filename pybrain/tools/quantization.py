@@ -0,0 +1,76 @@
+"""Quantization of networks for inference.
+
+Networks that are only used for forward passes can store the weights of their
+full connections with less precision: as 8 bit integers, with a scale for every
+output, or as half precision floats. That takes an eighth or a quarter of the
+memory of the double precision weights; how much accuracy and speed is lost
+depends on the network and can be checked with quantizationReport()."""
+
+from timeit import default_timer
+
+from scipy import int8, float16, dtype as _dtype
+
+from pybrain.structure.connections.full import FullConnection
+from pybrain.structure.connections.quantized import QuantizedFullConnection
+
+
+def quantizeNetwork(net, dtype=int8):
+    """Return an inference only copy of the network whose full connections
+    store their weights as `dtype`, int8 or float16."""
+    assert net.sorted, ".sortModules() has not been called"
+    cp = net.copy()
+    quantized = {}
+    for x in list(cp._containerIterator()):
+        if type(x) is FullConnection:
+            quantized[id(x)] = \
+                QuantizedFullConnection.fromFullConnection(x, dtype)
+    cp.setInferenceOnly()
+    cp._replaceConnections(quantized)
+    return cp
+
+
+def weightBytes(net):
+    """Return the number of bytes taken by the weights of the network."""
+    total = 0
+    if net.paramdim > 0:
+        total += net.params.nbytes
+    for conns in net.connections.values():
+        for c in conns:
+            if isinstance(c, QuantizedFullConnection):
+                total += c.weights.nbytes
+                if c.scales is not None:
+                    total += c.scales.nbytes
+    return total
+
+
+def _timeActivations(net, inputs, repeat):
+    start = default_timer()
+    for _ in xrange(repeat):
+        for x in inputs:
+            net.activate(x)
+    return (default_timer() - start) / (repeat * len(inputs))
+
+
+def quantizationReport(net, dataset, dtypes=(int8, float16), repeat=1):
+    """Compare the quantized versions of a network to the original one on a
+    SupervisedDataSet and return a table of the results as a string.
+
+    For the original network and every type, it shows the memory taken by the
+    weights, the mean squared error on the targets, the largest deviation
+    of the outputs from the ones of the original network and the time per
+    activation, measured over `repeat` passes through the dataset."""
+    inputs = dataset['input']
+    targets = dataset['target']
+    reference = net.activateBatch(inputs)
+    lines = ['%-8s %12s %12s %12s %16s' % ('weights', 'bytes', 'mse',
+                                           'max. dev.', 'activation (us)')]
+    nets = [(net.dtype, net)] + [(dt, quantizeNetwork(net, dt)) for dt in dtypes]
+    for dt, n in nets:
+        outputs = n.activateBatch(inputs)
+        mse = ((outputs - targets) ** 2).mean()
+        deviation = abs(outputs - reference).max()
+        seconds = _timeActivations(n, inputs, repeat)
+        lines.append('%-8s %12d %12.6g %12.6g %16.2f'
+                     % (_dtype(dt).name, weightBytes(n), mse, deviation,
+                        1e6 * seconds))
+    return '\n'.join(lines)
@@ -0,0 +1,132 @@
+"""Evaluation of many parameter vectors of one network in worker processes.
+
+Sending a copy of the network to a worker for every candidate costs as much as
+pickling the whole network. Instead, the workers get the network once, when
+they are started, and attach its parameters to a row of an array in shared
+memory. For every candidate, only its parameters are written into the row of a
+worker and the worker is told to evaluate them."""
+
+import ctypes
+import multiprocessing
+from select import select
+from traceback import format_exc
+
+from scipy import frombuffer, dtype as _dtype
+
+
+class SharedParameters(object):
+    """A number of parameter vectors for a network in shared memory, one per
+    slot. Processes that are forked from the one that created them see the
+    same vectors."""
+
+    def __init__(self, net, slots=1):
+        self.net = net
+        self.slots = slots
+        dt = _dtype(net.dtype)
+        self._buffer = multiprocessing.RawArray(
+            ctypes.c_byte, max(1, slots * net.paramdim * dt.itemsize))
+        self.vectors = frombuffer(self._buffer, dtype=dt,
+                                  count=slots * net.paramdim)
+        self.vectors = self.vectors.reshape(slots, net.paramdim)
+        self.vectors[:] = net.params
+
+    def attach(self, slot):
+        """Make the parameters of the network those of the given slot, and
+        return the network."""
+        self.net._setParameters(self.vectors[slot])
+        return self.net
+
+
+def _work(shared, slot, evaluator, conn):
+    net = shared.attach(slot)
+    while True:
+        if conn.recv() is None:
+            break
+        # Exceptions are sent back instead of ending the worker.
+        try:
+            reply = True, evaluator(net)
+        except Exception, e:
+            reply = False, e
+        try:
+            conn.send(reply)
+        except Exception:
+            # The fitness or the exception cannot be pickled.
+            conn.send((False, RuntimeError(format_exc())))
+    conn.close()
+
+
+class ParallelEvaluator(object):
+    """Evaluate parameter vectors of a network in several worker processes.
+
+    `evaluator` is a function that takes the network and returns its fitness.
+    It is passed to the workers when they are started, so it does not have to
+    be picklable on systems that fork them.
+
+        pe = ParallelEvaluator(net, evaluator, processes=4)
+        fitnesses = pe(candidates)
+        pe.close()
+    """
+
+    def __init__(self, net, evaluator, processes=None):
+        if processes is None:
+            processes = multiprocessing.cpu_count()
+        self.shared = SharedParameters(net, processes)
+        self.workers = []
+        self.conns = []
+        for slot in range(processes):
+            conn, child = multiprocessing.Pipe()
+            worker = multiprocessing.Process(
+                target=_work, args=(self.shared, slot, evaluator, child))
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+            self.conns.append(conn)
+
+    def __call__(self, candidates):
+        """Return the fitnesses of a sequence of parameter vectors.
+
+        Every worker gets the next candidate as soon as it is done with the
+        previous one. If the evaluator raises an exception, no more candidates
+        are handed out, and once the workers are done with the ones they have,
+        the exception is raised again."""
+        fitnesses = [None] * len(candidates)
+        pending = iter(enumerate(candidates))
+        # The index of the candidate that every busy worker evaluates.
+        busy = {}
+        for slot in range(len(self.workers)):
+            self._dispatch(slot, pending, busy)
+        error = None
+        while busy:
+            ready, _, _ = select([self.conns[slot] for slot in busy], [], [])
+            for conn in ready:
+                slot = self.conns.index(conn)
+                success, result = conn.recv()
+                index = busy.pop(slot)
+                if not success:
+                    if error is None:
+                        error = result
+                elif error is None:
+                    fitnesses[index] = result
+                    self._dispatch(slot, pending, busy)
+        if error is not None:
+            raise error
+        return fitnesses
+
+    def _dispatch(self, slot, pending, busy):
+        """Hand the next of the `pending` candidates, if any, to the worker of
+        the given slot."""
+        for index, x in pending:
+            self.shared.vectors[slot] = x
+            self.conns[slot].send(slot)
+            busy[slot] = index
+            break
+
+    def close(self):
+        """Stop the workers."""
+        for conn in self.conns:
+            conn.send(None)
+            conn.close()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.conns = []
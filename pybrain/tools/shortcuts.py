@@ -7,12 +7,18 @@ from sys import exit as errorexit
 from pybrain.structure.networks.feedforward import FeedForwardNetwork
 from pybrain.structure.networks.recurrent import RecurrentNetwork
 from pybrain.structure.modules import BiasUnit, SigmoidLayer, LinearLayer, LSTMLayer
-from pybrain.structure.connections import FullConnection, IdentityConnection
+from pybrain.structure.connections import FullConnection, IdentityConnection, \
+    ConvolutionConnection
+from pybrain.structure.networks.compiled import CompiledFeedForwardNetwork, \
+    CompiledRecurrentNetwork
 
 try:
     from arac.pybrainbridge import _RecurrentNetwork, _FeedForwardNetwork
 except ImportError, e:
-    logging.info("No fast networks available: %s" % e)
+    logging.info("No arac networks available, using compiled networks: %s" % e)
+    from pybrain.structure.networks.compiled import \
+        CompiledFeedForwardNetwork as _FeedForwardNetwork, \
+        CompiledRecurrentNetwork as _RecurrentNetwork
 
 
 class NetworkError(Exception): pass
@@ -22,7 +28,10 @@ def buildNetwork(*layers, **options):
     """Build arbitrarily deep networks.
     
     `layers` should be a list or tuple of integers, that indicate how many 
-    neurons the layers should have. `bias` and `outputbias` are flags to 
+    neurons the layers should have. A layer can also be given as a tuple 
+    (height, width, channels) of a two-dimensional plane; two consecutive planes
+    are connected by a convolution, with kernels as big as the difference of 
+    their sizes. `bias` and `outputbias` are flags to 
     indicate whether the network should have the corresponding biases; both
     default to True.
         
@@ -33,7 +42,18 @@ def buildNetwork(*layers, **options):
     otherwise a :class:`FeedForwardNetwork`.
     
     If the `fast` flag is set, faster arac networks will be used instead of the 
-    pybrain implementations."""
+    pybrain implementations. Without arac, the built-in compiled networks are 
+    used.
+    
+    If the `fused` flag is set, a compiled network is built that computes 
+    every layer together with its incoming full connections in a single step,
+    with the connections from the bias unit folded in as bias vectors.
+    
+    The `dtype` option gives the type of the parameters and buffers, e.g. 
+    float32 for single precision. By default, double precision is used.
+    
+    If the `inferenceonly` flag is set, the network allocates neither error 
+    buffers nor derivatives and can only be activated."""
     # options
     opt = {'bias': True,
            'hiddenclass': SigmoidLayer,
@@ -42,6 +62,9 @@ def buildNetwork(*layers, **options):
            'peepholes': False,
            'recurrent': False,
            'fast': False,
+           'fused': False,
+           'dtype': None,
+           'inferenceonly': False,
     }
     for key in options:
         if key not in opt.keys():
@@ -56,18 +79,21 @@ def buildNetwork(*layers, **options):
         (False, False): FeedForwardNetwork,
         (True, False): RecurrentNetwork,
     }
-    try:
-        network_map[(False, True)] = _FeedForwardNetwork
-        network_map[(True, True)] = _RecurrentNetwork
-    except NameError:
-        if opt['fast']:
-            raise NetworkError("No fast networks available.")
+    network_map[(False, True)] = _FeedForwardNetwork
+    network_map[(True, True)] = _RecurrentNetwork
     if opt['hiddenclass'].sequential or opt['outclass'].sequential:
         if not opt['recurrent']:
             # CHECKME: a warning here?
             opt['recurrent'] = True
     Network = network_map[opt['recurrent'], opt['fast']]
-    n = Network()
+    if opt['fused']:
+        Network = (CompiledFeedForwardNetwork, CompiledRecurrentNetwork)[
+            opt['recurrent']]
+        n = Network(fused=True)
+    else:
+        n = Network()
+    shapes = layers
+    layers = [_layerSize(l) for l in layers]
     # linear input layer
     n.addInputModule(LinearLayer(layers[0], name='in'))
     # output layer of type 'outclass'
@@ -86,15 +112,17 @@ def buildNetwork(*layers, **options):
             n.addConnection(FullConnection(n['bias'], n[layername]))
     # connections between hidden layers
     for i in range(len(layers) - 3):
-        n.addConnection(FullConnection(n['hidden%i' % i], n['hidden%i' % (i + 1)]))
+        n.addConnection(_layerConnection(n['hidden%i' % i], n['hidden%i' % (i + 1)],
+                                         shapes[i + 1], shapes[i + 2]))
     # other connections
     if len(layers) == 2:
         # flat network, connection from in to out
-        n.addConnection(FullConnection(n['in'], n['out']))
+        n.addConnection(_layerConnection(n['in'], n['out'], shapes[0], shapes[1]))
     else:
         # network with hidden layer(s), connections from in to first hidden and last hidden to out
-        n.addConnection(FullConnection(n['in'], n['hidden0']))
-        n.addConnection(FullConnection(n['hidden%i' % (len(layers) - 3)], n['out']))
+        n.addConnection(_layerConnection(n['in'], n['hidden0'], shapes[0], shapes[1]))
+        n.addConnection(_layerConnection(n['hidden%i' % (len(layers) - 3)], n['out'],
+                                         shapes[-2], shapes[-1]))
     
     # recurrent connections
     if issubclass(opt['hiddenclass'], LSTMLayer):
@@ -103,9 +131,36 @@ def buildNetwork(*layers, **options):
         n.addRecurrentConnection(FullConnection(n['hidden0'], n['hidden0']))
 
     n.sortModules()
+    if opt['dtype'] is not None:
+        n.setDtype(opt['dtype'])
+    if opt['inferenceonly']:
+        n.setInferenceOnly()
     return n
     
 
+def _layerSize(layer):
+    """Return the number of neurons of a layer given to buildNetwork."""
+    if isinstance(layer, tuple):
+        return reduce(lambda x, y: x * y, layer)
+    return layer
+
+
+def _layerConnection(inmod, outmod, inshape, outshape):
+    """Return a convolution between two planes, and a full connection 
+    otherwise."""
+    if isinstance(inshape, tuple) and isinstance(outshape, tuple):
+        if (len(inshape) != 3 or len(outshape) != 3
+            or not 1 <= outshape[0] <= inshape[0]
+            or not 1 <= outshape[1] <= inshape[1]):
+            raise ValueError("Cannot convolve a plane of shape %s to one of "
+                             "shape %s: both have to be (height, width, "
+                             "channels), and the second one cannot be higher "
+                             "or wider." % (inshape, outshape))
+        kernelshape = (inshape[0] - outshape[0] + 1, inshape[1] - outshape[1] + 1)
+        return ConvolutionConnection(inmod, outmod, inshape, kernelshape)
+    return FullConnection(inmod, outmod)
+
+
 def _buildNetwork(*layers, **options):
     """This is a helper function to create different kinds of networks.
 
@@ -0,0 +1,32 @@
+"""Sparse versions of networks.
+
+Networks whose weights have been pruned, or of which only some weights are
+enabled by a mask, can replace their full connections by SparseConnections
+that only store and compute with the remaining weights."""
+
+from pybrain.structure.connections.full import FullConnection
+from pybrain.structure.connections.sparse import SparseConnection
+
+
+def sparsifyNetwork(net, mask=None):
+    """Return a copy of the network whose full connections are replaced by
+    sparse connections.
+
+    Only the weights for which the boolean array `mask` over the parameters
+    of the network is true are kept; by default, the weights that are not
+    zero."""
+    assert net.sorted, ".sortModules() has not been called"
+    cp = net.copy()
+    sparse = {}
+    index = 0
+    for x in list(cp._containerIterator()):
+        if type(x) is FullConnection:
+            part = None
+            if mask is not None:
+                part = mask[index:index + x.paramdim]
+            c = SparseConnection.fromFullConnection(x, part)
+            c.owner = cp
+            sparse[id(x)] = c
+        index += x.paramdim
+    cp._replaceConnections(sparse)
+    return cp
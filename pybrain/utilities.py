@@ -22,8 +22,11 @@ known_extensions = {
     'txt': 'ascii',
     'svm': 'libsvm',
     'pkl': 'pickle',
+    'npz': 'npz',
     'nc' : 'netcdf' }
 
+binary_formats = ['npz']
+
     
 def abstractMethod():
     """ This should be called when an abstract method is called that should have been 
@@ -193,7 +196,9 @@ class Serializable(object):
         if format is None:
             # try to derive protocol from file extension
             format = formatFromExtension(filename)
-        with file(filename, 'rbU') as fp:
+        # Newlines must not be translated in binary formats.
+        mode = 'rb' if format in binary_formats else 'rbU'
+        with file(filename, mode) as fp:
             obj = cls.loadFromFileLike(fp, format)
             obj.filename = filename
             return obj